@@ -2,18 +2,13 @@
 
 import argparse
 import csv
+import logging
 import textwrap
-import time
 from dataclasses import dataclass
 from pathlib import Path
-from urllib.error import HTTPError
 
-from playwright.sync_api import TimeoutError as PwTimeoutError
-from playwright.sync_api import sync_playwright
-from pylib import log
-
-ERROR_RETRY = 2  # Make a few attempts to download a page
-TIMEOUT = 2  # Wait this many seconds for the page to load
+from pylib import fetcher, log, refresh
+from pylib.manifest import Manifest, fna_page
 
 BASE_URL = "http://floranorthamerica.org"
 
@@ -45,43 +40,38 @@ def main(args: argparse.Namespace) -> None:
 
     taxa = get_target_taxa(args.taxon_csv)
 
-    for i, taxon in enumerate(taxa, 1):
-        print(i, taxon.family, taxon.species)
-        url = BASE_URL + f"/{taxon.name}"
-        path = args.html_dir / f"{taxon.stem}.html"
-        download(path, url)
+    jobs = [
+        fetcher.Job(url=BASE_URL + f"/{t.name}", path=args.html_dir / f"{t.stem}.html")
+        for t in taxa
+    ]
+
+    manifest_db = args.manifest_db or args.html_dir / "manifest.sqlite"
+
+    with Manifest(manifest_db) as manifest:
+        if args.previous_dir:
+            jobs = refresh.refresh(
+                jobs,
+                args.previous_dir,
+                manifest,
+                max_age_days=args.max_age_days,
+                validate=fna_page,
+            )
+
+        fetcher.download_all(
+            jobs,
+            workers=args.workers,
+            contexts=args.contexts,
+            pages_per_context=args.pages_per_context,
+            per_host=args.per_host,
+            delay=args.delay,
+            validate=fna_page,
+            manifest=manifest,
+        )
+        logging.info(f"Manifest {manifest.counts()}")
 
     log.finished()
 
 
-def download(path: Path, url: str, retries: int = ERROR_RETRY) -> None:
-    if path.exists():
-        return
-
-    for attempt in range(1, retries + 1):
-        if attempt > 1:
-            print(f"Attempt {attempt}")
-
-        try:
-            with sync_playwright() as playwright:
-                browser = playwright.chromium.launch()
-                ctx = browser.new_context(viewport={"width": 1920, "height": 1080})
-                page = ctx.new_page()
-                page.goto(url, wait_until="domcontentloaded")
-
-                with path.open("w", encoding="utf-8") as f:
-                    f.write(page.content())
-
-                time.sleep(TIMEOUT)
-
-                browser.close()
-
-            break
-
-        except TimeoutError, HTTPError, PwTimeoutError:
-            time.sleep(attempt * TIMEOUT)
-
-
 def get_target_taxa(target_taxa_csv: Path) -> list[Taxon]:
     with target_taxa_csv.open(encoding="utf-8-sig") as f:
         reader = csv.DictReader(f)
@@ -112,6 +102,75 @@ def parse_args() -> argparse.Namespace:
         help="""Save downloaded web pages into this directory.""",
     )
 
+    arg_parser.add_argument(
+        "--previous-dir",
+        type=Path,
+        metavar="PATH",
+        help="""Refresh from the previous snapshot in this directory. Pages younger
+            than --max-age-days are linked into --html-dir instead of being
+            downloaded again.""",
+    )
+
+    arg_parser.add_argument(
+        "--max-age-days",
+        type=float,
+        metavar="DAYS",
+        help="""Download pages from the previous snapshot again if they are older
+            than this.""",
+    )
+
+    arg_parser.add_argument(
+        "--manifest-db",
+        type=Path,
+        metavar="PATH",
+        help="""Record every download in this manifest database.
+            (default: manifest.sqlite in the --html-dir)""",
+    )
+
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        default=fetcher.WORKERS,
+        metavar="INT",
+        help="""Fetch this many pages at once. (default: %(default)s)""",
+    )
+
+    arg_parser.add_argument(
+        "--contexts",
+        type=int,
+        default=fetcher.CONTEXTS,
+        metavar="INT",
+        help="""Share this many browser contexts among the workers.
+            (default: %(default)s)""",
+    )
+
+    arg_parser.add_argument(
+        "--pages-per-context",
+        type=int,
+        default=fetcher.PAGES_PER_CONTEXT,
+        metavar="INT",
+        help="""Replace a browser context after it has loaded this many pages.
+            Use 0 to never replace them. (default: %(default)s)""",
+    )
+
+    arg_parser.add_argument(
+        "--per-host",
+        type=int,
+        default=fetcher.PER_HOST,
+        metavar="INT",
+        help="""Allow this many concurrent requests to the FNA site.
+            (default: %(default)s)""",
+    )
+
+    arg_parser.add_argument(
+        "--delay",
+        type=float,
+        default=fetcher.TIMEOUT,
+        metavar="SECONDS",
+        help="""Pause this long after each request to the FNA site.
+            (default: %(default)s)""",
+    )
+
     args = arg_parser.parse_args()
     return args
 
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+
+import argparse
+import logging
+import random
+import textwrap
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from ccf.pylib import lm_cache, lm_runner, log
+from ccf.pylib.batch_scores import ScoreTable, score_batch
+from ccf.pylib.track_scores import TrackScores
+from ccf.pylib.trait_fields import TRAIT_FIELDS
+
+if TYPE_CHECKING:
+    import dspy
+
+SCHEMA = pa.schema(
+    [
+        ("model", pa.string()),
+        ("split", pa.string()),
+        ("family", pa.string()),
+        ("taxon", pa.string()),
+        ("total_score", pa.float64()),
+        *[(f"{f}_score", pa.float64()) for f in TRAIT_FIELDS],
+        *[(f"{f}_pred", pa.string()) for f in TRAIT_FIELDS],
+        ("latency", pa.float64()),  # Seconds the model took, or spent failing
+        ("attempts", pa.int64()),
+        ("cached", pa.bool_()),
+        ("prompt_tokens", pa.int64()),
+        ("completion_tokens", pa.int64()),
+        ("error", pa.string()),
+    ]
+)
+
+
+def main(args: argparse.Namespace) -> None:
+    import dspy  # noqa: PLC0415
+
+    from ccf.pylib import trait_asker as ta  # noqa: PLC0415
+    from ccf.pylib import trait_extractor as te  # noqa: PLC0415
+
+    log.started(args=args)
+
+    random.seed(args.seed)  # The same seed gives the same splits
+    examples = te.read_examples(args.examples_json)
+    examples = te.split_examples(examples, args.train_split, args.dev_split)
+    examples = examples[args.split]
+    examples = examples[: args.limit] if args.limit else examples
+
+    lm = dspy.LM(
+        args.model,
+        api_base=args.api_base,
+        api_key=args.api_key,
+        cache=False,
+        timeout=args.timeout,
+        num_retries=0,
+    )
+    dspy.configure(lm=lm, track_usage=True)
+
+    cache = None
+    if args.no_cache:
+        cache = lm_cache.LMCache(args.cache_db, max_bytes=args.cache_mb * 1024**2)
+
+    asker = ta.TraitAsker(model=args.model, api_base=args.api_base, cache=cache)
+
+    def predict(example: dspy.Example) -> lm_cache.Answer:
+        return asker.ask_usage(example, tuple(TRAIT_FIELDS))
+
+    runner = lm_runner.LMRunner(
+        predict, concurrency=args.concurrency, retries=args.retries
+    )
+    results = list(runner.run(examples))
+
+    failed = sum(not r.ok for r in results)
+    if failed:
+        logging.info(f"{failed} of {len(results)} examples failed and score zero")
+
+    # A failed example is scored as an empty answer so runs stay comparable
+    answers = [r.prediction.fields if r.ok else {} for r in results]
+    table = score_batch(examples, answers)
+
+    rows = result_rows(results, table, model=args.model, split=args.split)
+    write_results(rows, parquet_path=args.out_parquet, csv_path=args.out_csv)
+
+    cache_stats = cache.stats() if cache else None
+    if cache:
+        cache.close()
+
+    if len(table):
+        TrackScores.summarize_table(table, cache_stats)
+
+    log.finished()
+
+
+def result_rows(
+    results: list[lm_runner.LMResult], table: ScoreTable, *, model: str, split: str
+) -> list[dict]:
+    """Make one row per example with its scores, answers, latency, and tokens."""
+    rows = []
+    for result, scores in zip(results, table.records(), strict=True):
+        example = result.example
+        answer = result.prediction if result.ok else lm_cache.Answer()
+        rows.append(
+            {
+                "model": model,
+                "split": split,
+                "family": example.family,
+                "taxon": example.taxon,
+                "total_score": scores["total"],
+                **{f"{f}_score": scores[f] for f in TRAIT_FIELDS},
+                **{f"{f}_pred": answer.fields.get(f, "") for f in TRAIT_FIELDS},
+                "latency": answer.latency if result.ok else result.elapsed,
+                "attempts": result.attempts,
+                "cached": answer.cached,
+                "prompt_tokens": answer.prompt_tokens,
+                "completion_tokens": answer.completion_tokens,
+                "error": result.error,
+            }
+        )
+    return rows
+
+
+def write_results(
+    rows: list[dict], *, parquet_path: Path | None, csv_path: Path | None
+) -> None:
+    """Write the rows with their numbers and flags typed for comparing runs."""
+    table = pa.Table.from_pylist(rows, schema=SCHEMA)
+    if parquet_path:
+        pq.write_table(table, parquet_path)
+    if csv_path:
+        pa_csv.write_csv(table, csv_path)
+
+
+def parse_args() -> argparse.Namespace:
+    arg_parser = argparse.ArgumentParser(
+        allow_abbrev=True,
+        description=textwrap.dedent(
+            """
+            Evaluate a language model on a split of the DSPy examples. Examples are
+            run concurrently and the model's answers are cached, so scoring a split
+            again after a metric change does not ask the model anything. Each
+            example's scores, latency, and token counts are written to a Parquet
+            and/or CSV file for comparing models.
+            """
+        ),
+    )
+
+    arg_parser.add_argument(
+        "--examples-json",
+        type=Path,
+        required=True,
+        metavar="PATH",
+        help="""Get language model examples from this JSON file.""",
+    )
+
+    arg_parser.add_argument(
+        "--out-parquet",
+        type=Path,
+        metavar="PATH",
+        help="""Write the results to this Parquet file.""",
+    )
+
+    arg_parser.add_argument(
+        "--out-csv",
+        type=Path,
+        metavar="PATH",
+        help="""Write the results to this CSV file.""",
+    )
+
+    arg_parser.add_argument(
+        "--split",
+        choices=["train", "dev", "test"],
+        default="dev",
+        help="""Evaluate this split of the examples. (default: %(default)s)""",
+    )
+
+    arg_parser.add_argument(
+        "--train-split",
+        type=float,
+        default=0.1,
+        metavar="FRACTION",
+        help="""How many of the examples are for training. (default: %(default)s)""",
+    )
+
+    arg_parser.add_argument(
+        "--dev-split",
+        type=float,
+        default=0.5,
+        metavar="FRACTION",
+        help="""How many of the examples are for development, the rest are for
+            testing. (default: %(default)s)""",
+    )
+
+    arg_parser.add_argument(
+        "--seed",
+        type=int,
+        default=2025,
+        metavar="INT",
+        help="""Seed for splitting the examples. (default: %(default)s)""",
+    )
+
+    arg_parser.add_argument(
+        "--model",
+        default="ollama_chat/gemma3:27b",
+        help="""Use this LLM model. (default: %(default)s)""",
+    )
+
+    arg_parser.add_argument(
+        "--api-base",
+        default="http://localhost:11434",
+        help="""URL for the LM model. (default: %(default)s)""",
+    )
+
+    arg_parser.add_argument(
+        "--api-key",
+        help="""Key for the LM provider.""",
+    )
+
+    arg_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=lm_runner.CONCURRENCY,
+        metavar="INT",
+        help="""Send up to this many requests to the model at once.
+            (default: %(default)s)""",
+    )
+
+    arg_parser.add_argument(
+        "--timeout",
+        type=float,
+        default=lm_runner.TIMEOUT,
+        metavar="SECS",
+        help="""Give up on a model request after this many seconds.
+            (default: %(default)s)""",
+    )
+
+    arg_parser.add_argument(
+        "--retries",
+        type=int,
+        default=lm_runner.RETRIES,
+        metavar="INT",
+        help="""Retry a failed model request this many times.
+            (default: %(default)s)""",
+    )
+
+    arg_parser.add_argument(
+        "--limit",
+        type=int,
+        default=0,
+        metavar="INT",
+        help="""Limit to this many examples from the split.""",
+    )
+
+    arg_parser.add_argument(
+        "--no-cache",
+        action="store_false",
+        help="""Turn off caching for the model.""",
+    )
+
+    arg_parser.add_argument(
+        "--cache-db",
+        type=Path,
+        default=lm_cache.CACHE_DB,
+        metavar="PATH",
+        help="""Cache model answers in this SQLite file. (default: %(default)s)""",
+    )
+
+    arg_parser.add_argument(
+        "--cache-mb",
+        type=int,
+        default=lm_cache.MAX_BYTES // 1024**2,
+        metavar="INT",
+        help="""Drop the least recently used answers when the cache is bigger than
+            this many megabytes. (default: %(default)s)""",
+    )
+
+    args = arg_parser.parse_args()
+
+    if not args.out_parquet and not args.out_csv:
+        arg_parser.error("Give --out-parquet, --out-csv, or both.")
+
+    return args
+
+
+if __name__ == "__main__":
+    ARGS = parse_args()
+    main(ARGS)
@@ -1,78 +1,49 @@
 #!/usr/bin/env python3
 
 import argparse
-import re
 import textwrap
-from collections import defaultdict
 from pathlib import Path
 
-import ftfy
-from bs4 import BeautifulSoup
-
+from ccf.pylib import page_store
 from ccf.pylib.fna_parse_treatment import PARSE
+from ccf.pylib.key_census import CENSUS_DB, KeyCensus
 
 
 def main(args):
-    pages = sorted(args.html_dir.glob("*.html"))
-
-    all_keys = defaultdict(list)
-    all_pages = defaultdict(list)
-
-    for page in pages:
-        print(page.stem)
-        with page.open() as f:
-            text = f.read()
-
-        soup = BeautifulSoup(text, features="lxml")
-
-        treat = get_treatment(soup)
+    census_db = args.census_db or args.html_dir / CENSUS_DB
 
-        for key, value in treat.items():
-            all_keys[key].append(value)
-            all_pages[key].append(page.stem)
+    with (
+        page_store.open_pages(args.html_dir) as pages,
+        KeyCensus(census_db) as census,
+    ):
+        done = census.update(pages, workers=args.workers)
+        print(", ".join(f"{v} {k}" for k, v in done.items()), "pages")
 
-    missing_keys = {k: v for k, v in all_keys.items() if k not in PARSE}
-    missing_keys = dict(sorted(missing_keys.items()))
+        all_keys = census.counts()
+        missing_keys = census.missing(PARSE)
 
     print()
-    for key, taxon in missing_keys.items():
-        print(f"{key:<12} {taxon[:]}")
-        print(f"{'':<12} {all_pages[key][:3]}")
+    for missing in missing_keys:
+        print(f"{missing.key:<12} {missing.count} pages {missing.stems}")
+        for sample in missing.samples:
+            print(f"{'':<12} {sample}")
         print()
     print()
-    for key in missing_keys:
-        print(f'"{key}": None,')
+    for missing in missing_keys:
+        print(f'"{missing.key}": None,')
     print()
     print(f"All keys {len(all_keys)}, missing keys {len(missing_keys)}")
 
 
-def get_treatment(soup):
-    treat = soup.find("span", class_="statement")
-    if not treat:
-        return {}
-
-    text = str(treat).replace("<i>", "").replace("</i>", "")
-    text = re.sub(r"(Perennials|Annuals|Biennials);", r"<b>\1</b>", text)
-    text = clean(text)
-
-    soup2 = BeautifulSoup(text, features="lxml")
-    parts = [p.text.strip() for p in soup2.find_all(string=True)]
-    treat = dict(zip(parts[0::2], parts[1::2], strict=True))
-    return treat
-
-
-def clean(text):
-    text = ftfy.fix_text(text)  # Handle common mojibake
-    text = re.sub(r"[–—\-]+", "-", text)
-    text = text.replace("±", "+/-")
-    return text
-
-
 def parse_args():
     arg_parser = argparse.ArgumentParser(
         allow_abbrev=True,
         description=textwrap.dedent(
-            "Get keys from treatments in downloaded HTML files."
+            """
+            Get keys from treatments in downloaded HTML files. The keys on every
+            page are kept in a census database so later runs only read pages that
+            are new or changed.
+            """
         ),
     )
 
@@ -81,7 +52,24 @@ def parse_args():
         type=Path,
         required=True,
         metavar="PATH",
-        help="""Parse HTML files in this directory.""",
+        help="""Parse HTML files in this directory or page store.""",
+    )
+
+    arg_parser.add_argument(
+        "--census-db",
+        type=Path,
+        metavar="PATH",
+        help=f"""Keep the key census in this SQLite database.
+            (default: {CENSUS_DB} in --html-dir)""",
+    )
+
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        metavar="INT",
+        help="""Extract treatments from new pages with this many processes.
+            (default: %(default)s)""",
     )
 
     args = arg_parser.parse_args()
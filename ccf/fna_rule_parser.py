@@ -1,94 +1,104 @@
 #!/usr/bin/env python3
 
 import argparse
-import re
+import contextlib
+import multiprocessing as mp
 import textwrap
 from pathlib import Path
 
-import pandas as pd
-from bs4 import BeautifulSoup
 from tqdm import tqdm
 
-from ccf.pylib import log, pipeline, str_util
+from ccf.pylib import log, page_store, pipeline
+from ccf.pylib.treatment import extract
+
+PIPE = None  # Built once before forking so workers share it copy-on-write
+CHUNK_SIZE = 16  # Pages sent to a worker at a time
 
 
 def main(args: argparse.Namespace) -> None:
+    global PIPE
     log.started()
 
-    pages = sorted(args.html_dir.glob("*.html"), key=lambda t: t.stem.split("_")[1:])
+    pages = page_store.open_pages(args.html_dir)
 
     with args.target_csv.open() as f:
         targets = {ln.strip() for ln in f.readlines()}
 
-    pipe = pipeline.build()
+    PIPE = pipeline.load(args.profile)
+
+    jobs = (
+        (stem, text)
+        for stem, text in pages.pages(key=lambda s: s.split("_")[1:])
+        if " ".join(stem.split("_")[1:]) in targets
+    )
 
     records = []
 
     hits, sects = 0, 0
 
-    for page in tqdm(pages):
-        with page.open() as f:
-            text = f.read()
-        name = " ".join(page.stem.split("_")[1:])
-        if name not in targets:
-            continue
-        hits += 1
-        print(f"Hit {name}")
+    with contextlib.ExitStack() as stack:
+        if args.workers > 1:
+            pool = stack.enter_context(
+                mp.get_context("fork").Pool(processes=args.workers)
+            )
+            results = pool.imap(parse_page, jobs, chunksize=CHUNK_SIZE)
+        else:
+            results = map(parse_page, jobs)
+
+        # Results come back in page order so the output matches a serial run
+        for record, output in tqdm(results):
+            hits += 1
+            print(output, end="")
+            if record:
+                sects += 1
+                records.append(record)
 
-        soup = BeautifulSoup(text, features="lxml")
-        treatment = find_treatment(soup)
+    print(f"Hits {hits}  with leaf section {sects}")
 
-        section = treatment.get("Leaf", treatment.get("Leaves"))
-        if not section:
-            continue
+    import pandas as pd  # noqa: PLC0415
 
-        sects += 1
-        print(section)
+    df = pd.DataFrame(records)
+    df.to_csv(args.out_csv, index=False)
 
-        doc = pipe(section)
-        traits = [e._.trait for e in doc.ents]
+    log.finished()
 
-        record = {"taxon": page.stem.replace("_", " ")}
-        shape, surface, margin = [], [], []
 
-        for trait in traits:
-            print(trait)
-            match trait._trait:
-                case "shape":
-                    shape.append(trait.shape)
-                case "surface":
-                    surface.append(trait.surface)
-                case "margin":
-                    margin.append(trait.margin)
+def parse_page(job: tuple[str, str]) -> tuple[dict | None, str]:
+    """Parse one page and return its record and what the serial loop printed."""
+    stem, text = job
+    name = " ".join(stem.split("_")[1:])
+    output = [f"Hit {name}"]
 
-        print()
-        record["shape"] = ", ".join(shape)
-        record["surface"] = ", ".join(surface)
-        record["margin"] = ", ".join(margin)
+    treatment = extract(text).as_dict()
 
-        records.append(record)
+    section = treatment.get("Leaf", treatment.get("Leaves"))
+    if not section:
+        return None, "\n".join(output) + "\n"
 
-    print(f"Hits {hits}  with leaf section {sects}")
-    df = pd.DataFrame(records)
-    df.to_csv(args.out_csv, index=False)
+    output.append(section)
 
-    log.finished()
+    doc = PIPE(section)
+    traits = [e._.trait for e in doc.ents]
 
+    record = {"taxon": stem.replace("_", " ")}
+    shape, surface, margin = [], [], []
 
-def find_treatment(soup: BeautifulSoup) -> dict:
-    treatment = soup.find("span", class_="statement")
-    if not treatment:
-        return {}
+    for trait in traits:
+        output.append(str(trait))
+        match trait._trait:
+            case "shape":
+                shape.append(trait.shape)
+            case "surface":
+                surface.append(trait.surface)
+            case "margin":
+                margin.append(trait.margin)
 
-    text = str(treatment).replace("<i>", "").replace("</i>", "")
-    text = re.sub(r"(Perennials|Annuals|Biennials);", r"<b>\1</b>", text)
-    text = str_util.clean(text)
+    output.append("")
+    record["shape"] = ", ".join(shape)
+    record["surface"] = ", ".join(surface)
+    record["margin"] = ", ".join(margin)
 
-    soup2 = BeautifulSoup(text, features="lxml")
-    parts = [p.text.strip() for p in soup2.find_all(string=True)]
-    # print(f"{parts=}")
-    treatment = dict(zip(parts[0::2], parts[1::2], strict=True))
-    return treatment
+    return record, "\n".join(output) + "\n"
 
 
 def parse_args() -> argparse.Namespace:
@@ -101,7 +111,7 @@ def parse_args() -> argparse.Namespace:
         type=Path,
         required=True,
         metavar="PATH",
-        help="""Parse HTML files in this directory.""",
+        help="""Parse HTML files in this directory or page store.""",
     )
     arg_parser.add_argument(
         "--target-csv",
@@ -116,6 +126,21 @@ def parse_args() -> argparse.Namespace:
         metavar="PATH",
         help="""Output the results to this CSV file.""",
     )
+    arg_parser.add_argument(
+        "--profile",
+        choices=pipeline.PROFILES,
+        default=pipeline.FULL,
+        help="""Build this spaCy pipeline. The lean one skips the tagger, parser,
+            and word vectors that the rules do not use. (default: %(default)s)""",
+    )
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        metavar="INT",
+        help="""Parse pages in this many forked processes. The output is the same
+            as a serial run. (default: %(default)s)""",
+    )
     args = arg_parser.parse_args()
     return args
 
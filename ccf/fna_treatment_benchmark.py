@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+import argparse
+import logging
+import re
+import textwrap
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from bs4 import BeautifulSoup
+from pylib import log, page_store, str_util, treatment
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+def main(args: argparse.Namespace) -> None:
+    log.started(args=args)
+
+    with page_store.open_pages(args.html_dir) as pages:
+        texts = [t for _, t in pages.pages()]
+    texts = texts[: args.limit] if args.limit else texts
+
+    soup_secs, soups = timed(soup_treatment, texts)
+    lxml_secs, lxmls = timed(lambda t: treatment.extract(t).as_dict(), texts)
+
+    differ = sum(s != x for s, x in zip(soups, lxmls, strict=True))
+
+    logging.info(f"BeautifulSoup: {rate(texts, soup_secs)}")
+    logging.info(f"lxml:          {rate(texts, lxml_secs)}")
+    speedup = soup_secs / lxml_secs if lxml_secs else 0.0
+    logging.info(f"Speedup {speedup:.1f}x, {differ} of {len(texts)} pages differ")
+
+    log.finished()
+
+
+def timed(func: Callable[[str], dict], texts: list[str]) -> tuple[float, list[dict]]:
+    began = time.perf_counter()
+    results = [func(t) for t in texts]
+    return time.perf_counter() - began, results
+
+
+def rate(texts: list[str], secs: float) -> str:
+    pages_per_sec = len(texts) / secs if secs else 0.0
+    return f"{len(texts)} pages in {secs:.2f}s ({pages_per_sec:.1f} pages/sec)"
+
+
+def soup_treatment(page: str) -> dict:
+    """Get the treatment the way the scripts did before the lxml extractor."""
+    soup = BeautifulSoup(page, features="lxml")
+    statement = soup.find("span", class_="statement")
+    if not statement:
+        return {}
+
+    text = str(statement).replace("<i>", "").replace("</i>", "")
+    text = re.sub(r"(Perennials|Annuals|Biennials);", r"<b>\1</b>", text)
+    text = str_util.clean(text)
+
+    soup2 = BeautifulSoup(text, features="lxml")
+    parts = [p.text.strip() for p in soup2.find_all(string=True)]
+    try:
+        return dict(zip(parts[0::2], parts[1::2], strict=True))
+    except ValueError:  # Keys and texts do not alternate on this page
+        return {}
+
+
+def parse_args() -> argparse.Namespace:
+    arg_parser = argparse.ArgumentParser(
+        allow_abbrev=True,
+        description=textwrap.dedent(
+            """
+            Compare the speed of the lxml treatment extractor with the old
+            BeautifulSoup one and count the pages where their results differ.
+            """
+        ),
+    )
+
+    arg_parser.add_argument(
+        "--html-dir",
+        type=Path,
+        required=True,
+        metavar="PATH",
+        help="""Use HTML files in this directory or page store.""",
+    )
+
+    arg_parser.add_argument(
+        "--limit",
+        type=int,
+        default=0,
+        metavar="INT",
+        help="""Only use this many pages. (default: all)""",
+    )
+
+    args = arg_parser.parse_args()
+
+    return args
+
+
+if __name__ == "__main__":
+    ARGS = parse_args()
+    main(ARGS)
@@ -1,35 +1,142 @@
 #!/usr/bin/env python3
 
 import argparse
+import json
 import textwrap
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import dspy
-from pylib import log
-from pylib import track_scores as ts
-from pylib import trait_extractor as te
 from rich import print as rprint
 
+from ccf.pylib import lm_cache, lm_runner, log
+from ccf.pylib import request_packer as packer
+from ccf.pylib import track_scores as ts
+from ccf.pylib.trait_fields import TRAIT_FIELDS
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    import dspy
+
+    from ccf.pylib.lm_cache import LMCache
+    from ccf.pylib.lm_runner import LMResult
+
 # from pprint import pp
 
 
-def main(args):
+def main(args: argparse.Namespace) -> None:
+    import dspy  # noqa: PLC0415
+
+    from ccf.pylib import trait_asker as ta  # noqa: PLC0415
+    from ccf.pylib import trait_extractor as te  # noqa: PLC0415
+
     log.started()
 
     examples = te.read_examples(args.examples_json)
     examples = examples[: args.limit] if args.limit else examples
 
+    # The runner does the retrying so the client should give up on its own.
+    # Answers are cached by the project cache below and not by DSPy.
     lm = dspy.LM(
-        args.model, api_base=args.api_base, api_key=args.api_key, cache=args.no_cache
+        args.model,
+        api_base=args.api_base,
+        api_key=args.api_key,
+        cache=False,
+        timeout=args.timeout,
+        num_retries=0,
     )
     dspy.configure(lm=lm)
 
-    trait_extractor = dspy.Predict(te.TraitExtractor)
-    # trait_extractor = dspy.ChainOfThought(TraitExtractor)
+    cache = open_cache(args)
+    asker = ta.TraitAsker(model=args.model, api_base=args.api_base, cache=cache)
+    ask = asker.ask_scoped if args.scoped else asker.ask
+
+    # Run the rules up front, spaCy and the doc cache are not thread safe
+    rules = rule_answers(examples) if args.hybrid else {}
+
+    def predict(example: dspy.Example) -> dspy.Prediction:
+        if not args.hybrid:
+            return dspy.Prediction(**ask(example, tuple(TRAIT_FIELDS)))
+
+        traits, missing = rules[id(example)]
+        if missing:
+            traits = traits | ask(example, missing)
+        return dspy.Prediction(**traits)
+
+    def predict_pack(pack: list[dspy.Example]) -> list[dspy.Prediction]:
+        return [dspy.Prediction(**u) for u in asker.ask_pack(pack)]
+
+    if args.pack:
+        packs = packer.pack(examples, ta.describe, context_tokens=args.context_tokens)
+        rprint(f"[blue]Packed {len(examples)} examples into {len(packs)} requests")
+        runner = lm_runner.LMRunner(
+            predict_pack, concurrency=args.concurrency, retries=args.retries
+        )
+        results = runner.unpack(runner.run(packs))
+    else:
+        runner = lm_runner.LMRunner(
+            predict, concurrency=args.concurrency, retries=args.retries
+        )
+        results = runner.run(examples)
+
+    scores = show_results(results, len(examples))
+
+    if args.save_predictions:
+        with args.save_predictions.open("w") as f:
+            json.dump(asker.answers, f, indent=2)
+
+    cache_stats = cache.stats() if cache else None
+    if cache:
+        cache.close()
+
+    if scores:
+        ts.TrackScores.summarize_scores(scores, cache_stats=cache_stats)
+
+    log.finished()
+
 
+def open_cache(args: argparse.Namespace) -> LMCache | None:
+    """Open the answer cache and warm it with saved predictions."""
+    if not args.no_cache:
+        return None
+
+    cache = lm_cache.LMCache(args.cache_db, max_bytes=args.cache_mb * 1024**2)
+
+    if args.warm_cache:
+        with args.warm_cache.open() as f:
+            warmed = cache.warm(json.load(f), [*TRAIT_FIELDS, "traits"])
+        rprint(f"[blue]Warmed the cache with {warmed} answers")
+
+    return cache
+
+
+def rule_answers(
+    examples: list[dspy.Example],
+) -> dict[int, tuple[dict[str, str], tuple[str, ...]]]:
+    """Fill the traits with the rule parsers and find the ones to ask the model."""
+    from ccf.pylib.rule_traits import rule_traits  # noqa: PLC0415
+
+    rules = {}
+    for example in examples:
+        traits, unsure = rule_traits(example.sections, example.info)
+        missing = tuple(f for f in TRAIT_FIELDS if not traits[f] or f in unsure)
+        rules[id(example)] = (traits, missing)
+
+    asking = sum(len(m) for _, m in rules.values())
+    total = len(examples) * len(TRAIT_FIELDS)
+    rprint(f"[blue]Asking the model for {asking} of {total} trait fields")
+
+    return rules
+
+
+def show_results(results: Iterable[LMResult], count: int) -> list[ts.TrackScores]:
+    """Print each example with its scores and return the scores."""
     scores = []
+    failed = 0
+
+    for i, result in enumerate(results, 1):
+        example = result.example
 
-    for i, example in enumerate(examples, 1):
         rprint(f"[blue]{'=' * 80}")
         rprint(f"[blue]{i} {example.family}")
         rprint(f"[blue]{i} {example.taxon}")
@@ -38,24 +145,25 @@ def main(args):
         rprint(f"[blue]{example.text}")
         print()
 
-        pred = trait_extractor(
-            family=example.family,
-            taxon=example.taxon,
-            text=example.text,
-            prompt=te.PROMPT,
-        )
+        if not result.ok:
+            rprint(f"[red]Failed after {result.attempts} attempts: {result.error}")
+            failed += 1
+            continue
 
-        score = ts.TrackScores.track_scores(example=example, prediction=pred)
+        score = ts.TrackScores.track_scores(
+            example=example, prediction=result.prediction
+        )
         score.display()
 
         scores.append(score)
 
-    ts.TrackScores.summarize_scores(scores)
+    if failed:
+        rprint(f"[red]{failed} of {count} examples failed")
 
-    log.finished()
+    return scores
 
 
-def parse_args():
+def parse_args() -> argparse.Namespace:
     arg_parser = argparse.ArgumentParser(
         allow_abbrev=True,
         description=textwrap.dedent("Extract information from downloaded HTML files."),
@@ -86,6 +194,66 @@ def parse_args():
         help="""Key for the LM provider.""",
     )
 
+    arg_parser.add_argument(
+        "--hybrid",
+        action="store_true",
+        help="""Fill the traits with the rule parsers first and only ask the model
+            for the ones they missed or are unsure of. The examples must come from
+            a fna_training_data.py that saves treatment sections.""",
+    )
+
+    arg_parser.add_argument(
+        "--scoped",
+        action="store_true",
+        help="""Ask for each group of traits (plant, leaf, fruit, seed, info) in
+            its own request with only the treatment sections for that group. The
+            examples must come from a fna_training_data.py that saves treatment
+            sections.""",
+    )
+
+    arg_parser.add_argument(
+        "--pack",
+        action="store_true",
+        help="""Ask about several examples in each request. Packs are as big as
+            will fit in --context-tokens.""",
+    )
+
+    arg_parser.add_argument(
+        "--context-tokens",
+        type=int,
+        default=packer.CONTEXT_TOKENS,
+        metavar="INT",
+        help="""The model's context window in tokens, for sizing packs.
+            (default: %(default)s)""",
+    )
+
+    arg_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=lm_runner.CONCURRENCY,
+        metavar="INT",
+        help="""Send up to this many requests to the model at once.
+            (default: %(default)s)""",
+    )
+
+    arg_parser.add_argument(
+        "--timeout",
+        type=float,
+        default=lm_runner.TIMEOUT,
+        metavar="SECS",
+        help="""Give up on a model request after this many seconds.
+            (default: %(default)s)""",
+    )
+
+    arg_parser.add_argument(
+        "--retries",
+        type=int,
+        default=lm_runner.RETRIES,
+        metavar="INT",
+        help="""Retry a failed model request this many times.
+            (default: %(default)s)""",
+    )
+
     arg_parser.add_argument(
         "--limit",
         type=int,
@@ -99,8 +267,44 @@ def parse_args():
         help="""Turn off caching for the model.""",
     )
 
+    arg_parser.add_argument(
+        "--cache-db",
+        type=Path,
+        default=lm_cache.CACHE_DB,
+        metavar="PATH",
+        help="""Cache model answers in this SQLite file. (default: %(default)s)""",
+    )
+
+    arg_parser.add_argument(
+        "--cache-mb",
+        type=int,
+        default=lm_cache.MAX_BYTES // 1024**2,
+        metavar="INT",
+        help="""Drop the least recently used answers when the cache is bigger than
+            this many megabytes. (default: %(default)s)""",
+    )
+
+    arg_parser.add_argument(
+        "--save-predictions",
+        type=Path,
+        metavar="PATH",
+        help="""Save the model's predictions to this JSON file. They can warm the
+            cache in a later run.""",
+    )
+
+    arg_parser.add_argument(
+        "--warm-cache",
+        type=Path,
+        metavar="PATH",
+        help="""Add the predictions saved by an earlier run (--save-predictions)
+            to the cache before asking the model anything.""",
+    )
+
     args = arg_parser.parse_args()
 
+    if args.pack and (args.hybrid or args.scoped):
+        arg_parser.error("--pack cannot be used with --hybrid or --scoped.")
+
     return args
 
 
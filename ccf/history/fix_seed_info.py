@@ -7,7 +7,7 @@ from pathlib import Path
 
 import pandas as pd
 from bs4 import BeautifulSoup
-from pylib import log
+from pylib import log, page_store
 from tqdm import tqdm
 
 
@@ -16,14 +16,11 @@ def main(args):
 
     taxa = get_taxa(args.taxon_csv)
 
-    pages = sorted(args.html_dir.glob("*.html"))
+    pages = page_store.open_pages(args.html_dir)
 
     records = []
 
-    for page in tqdm(pages):
-        with page.open() as f:
-            page = f.read()
-
+    for _stem, page in tqdm(pages.pages(), total=len(pages)):
         soup = BeautifulSoup(page, features="lxml")
 
         for a in soup.find_all("a"):
@@ -36,7 +33,7 @@ def main(args):
     df.to_csv(args.links_csv, index=False)
 
     in_records = {r["taxon"].split()[0] for r in records}
-    file_names = {p.stem for p in pages}
+    file_names = set(pages.stems())
     genera = {t.split()[0] for t in taxa}
 
     missing = genera - in_records
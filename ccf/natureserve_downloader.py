@@ -7,14 +7,12 @@ import logging
 import textwrap
 import time
 from pathlib import Path
-from urllib.error import HTTPError
 
-from playwright.sync_api import TimeoutError as PwTimeoutError
-from playwright.sync_api import sync_playwright
-from pylib import log
+from pylib import fetcher, log, refresh
+from pylib.manifest import Manifest, nature_serve_page
+from pylib.work_queue import MAX_ATTEMPTS, WorkItem, WorkQueue
 
-ERROR_RETRY = 2  # Make a few attempts to download a page
-TIMEOUT = 2  # Wait this many seconds for the page to load
+CLAIM = 100  # Claim this many queued pages at a time when harvesting
 
 BASE_URL = "https://explorer.natureserve.org"
 
@@ -36,40 +34,110 @@ def main(args: argparse.Namespace) -> None:
 
     logging.info(f"There are {len(targets)} overlapping taxa.")
 
-    for i, target in enumerate(targets, 1):
+    manifest_db = args.manifest_db or args.html_dir / "manifest.sqlite"
+
+    jobs = {}
+    for target in targets:
         record = nature_serve[target]
-        path = get_download_file_name(record, args.html_dir)
-        if path.exists():
-            logging.info(f"{i} {target} EXISTS")
-            continue
-        logging.info(f"{i} {target}")
         url = get_download_url(record)
-        download(path, url)
+        jobs[url] = fetcher.Job(
+            url=url,
+            path=get_download_file_name(record, args.html_dir),
+            fingerprint=refresh.record_fingerprint(record),
+        )
+
+    with Manifest(manifest_db) as manifest:
+        todo = list(jobs.values())
+        if args.previous_dir:
+            previous = {}
+            if args.previous_json:
+                previous = {
+                    get_download_url(r): refresh.record_fingerprint(r)
+                    for r in get_nature_serve_taxa(args.previous_json).values()
+                }
+            todo = refresh.refresh(
+                todo,
+                args.previous_dir,
+                manifest,
+                max_age_days=args.max_age_days,
+                previous_fingerprints=previous,
+                validate=nature_serve_page,
+            )
+
+        if args.queue_db:
+            harvest(args, {j.url: j for j in todo}, manifest)
+        else:
+            fetcher.download_all(
+                todo,
+                workers=args.workers,
+                per_host=args.per_host,
+                wait_until="networkidle",
+                validate=nature_serve_page,
+                manifest=manifest,
+            )
+
+        logging.info(f"Manifest {manifest.counts()}")
 
     log.job_elapsed(started)
 
 
-def download(path: Path, url: str, retries: int = ERROR_RETRY) -> None:
-    for attempt in range(1, retries + 1):
-        if attempt > 1:
-            logging.info(f"ATTEMPT {attempt}")
-
-        try:
-            with sync_playwright() as playwright:
-                browser = playwright.chromium.launch()
-                ctx = browser.new_context(viewport={"width": 1920, "height": 1080})
-                page = ctx.new_page()
-                page.goto(url, wait_until="networkidle")  # domcontentloaded
-
-                with path.open("w", encoding="utf-8") as f:
-                    f.write(page.content())
-
-                browser.close()
-
-            break
-
-        except TimeoutError, HTTPError, PwTimeoutError:
-            time.sleep(attempt * TIMEOUT)
+def harvest(
+    args: argparse.Namespace, jobs: dict[str, fetcher.Job], manifest: Manifest
+) -> None:
+    """Fetch pages concurrently, tracking progress in a persistent work queue."""
+    items = {u: WorkItem(key=u, url=u, path=j.path) for u, j in jobs.items()}
+
+    with WorkQueue(args.queue_db, max_attempts=args.max_attempts) as queue:
+        added = queue.add(items.values())
+        logging.info(f"Queued {added} new pages")
+
+        # The manifest decides what is done, bad or missing pages go back in the queue
+        for item in items.values():
+            if manifest.is_done(item.url, item.path, nature_serve_page):
+                queue.done(item.key)
+            else:
+                queue.requeue(item.key)
+
+        def save(job: fetcher.Job, html: str) -> None:
+            fetcher.write_page(job, html)
+            queue.done(job.url)
+
+        def failed(job: fetcher.Job, error: Exception) -> None:
+            queue.failed(job.url, str(error))
+
+        while True:
+            logging.info(f"Queue {queue.counts()}")
+
+            batch = queue.claim(CLAIM)
+
+            if not batch:
+                next_try = queue.next_retry()
+                if next_try is None:
+                    break
+                wait = max(0.0, next_try - time.time())
+                logging.info(f"Waiting {wait:.0f}s to retry failed pages")
+                time.sleep(wait)
+                continue
+
+            todo = [jobs.get(i.url, fetcher.Job(url=i.url, path=i.path)) for i in batch]
+            try:
+                fetcher.download_all(
+                    todo,
+                    workers=args.workers,
+                    per_host=args.per_host,
+                    retries=1,
+                    wait_until="networkidle",
+                    skip_existing=False,
+                    save=save,
+                    on_failure=failed,
+                    validate=nature_serve_page,
+                    manifest=manifest,
+                )
+            finally:
+                # A page that raised something unexpected is not left in flight
+                queue.release([i.key for i in batch], "The fetch did not finish")
+
+        logging.info(f"Queue {queue.counts()}")
 
 
 def get_target_taxa(target_taxa_csv: Path) -> list[str]:
@@ -150,8 +218,78 @@ def parse_args() -> argparse.Namespace:
         help="""Limit to this many downloads.""",
     )
 
+    arg_parser.add_argument(
+        "--previous-dir",
+        type=Path,
+        metavar="PATH",
+        help="""Refresh from the previous snapshot in this directory. Pages whose
+            export record is unchanged and that are younger than --max-age-days are
+            linked into --html-dir instead of being downloaded again.""",
+    )
+
+    arg_parser.add_argument(
+        "--previous-json",
+        type=Path,
+        metavar="PATH",
+        help="""The NatureServe JSON export the previous snapshot was downloaded
+            from. Only needed when the previous snapshot's manifest does not record
+            the export records.""",
+    )
+
+    arg_parser.add_argument(
+        "--max-age-days",
+        type=float,
+        metavar="DAYS",
+        help="""Download pages from the previous snapshot again if they are older
+            than this.""",
+    )
+
+    arg_parser.add_argument(
+        "--manifest-db",
+        type=Path,
+        metavar="PATH",
+        help="""Record every download in this manifest database.
+            (default: manifest.sqlite in the --html-dir)""",
+    )
+
+    arg_parser.add_argument(
+        "--queue-db",
+        type=Path,
+        metavar="PATH",
+        help="""Harvest pages concurrently and track progress in this work queue
+            database. Rerunning with the same database resumes an interrupted
+            harvest and retries failed pages.""",
+    )
+
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        default=fetcher.WORKERS,
+        metavar="INT",
+        help="""Fetch this many pages at once. (default: %(default)s)""",
+    )
+
+    arg_parser.add_argument(
+        "--per-host",
+        type=int,
+        metavar="INT",
+        help="""Allow this many concurrent requests to the NatureServe site.
+            (default: the number of --workers)""",
+    )
+
+    arg_parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=MAX_ATTEMPTS,
+        metavar="INT",
+        help="""Give up on a page after this many failed attempts when harvesting.
+            (default: %(default)s)""",
+    )
+
     args = arg_parser.parse_args()
 
+    args.per_host = args.per_host or args.workers
+
     return args
 
 
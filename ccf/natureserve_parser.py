@@ -6,54 +6,68 @@ import textwrap
 from pathlib import Path
 from typing import Any
 
-import pandas as pd
-from bs4 import BeautifulSoup, Tag
-from pylib import log
+from bs4 import BeautifulSoup, SoupStrainer, Tag
 from tqdm import tqdm
 
+from ccf.pylib import log, page_store
+from ccf.pylib.record_writer import BATCH_SIZE, RecordWriter
+
+DATA_SECTIONS = SoupStrainer("div", attrs={"class": "data-section"})
+
 
 def main(args: argparse.Namespace) -> None:
     log.started()
 
-    pages = sorted(args.html_dir.glob("*.html"))
+    pages = page_store.open_pages(args.html_dir)
     # pages = [p for p in pages if p.stem.startswith("Zizia_aptera")]
 
-    records = []
+    out_path = args.out_parquet or args.out_csv
+    parts_dir = out_path.with_name(f".{out_path.name}.parts")
 
-    for page in tqdm(pages):
-        rec = {}
+    with RecordWriter(parts_dir, batch_size=args.batch_size) as writer:
+        for _stem, page in tqdm(pages.pages(), total=len(pages)):
+            writer.write(parse_page(page, strained=not args.full_tree))
 
-        with page.open() as f:
-            page = f.read()
+        writer.finalize(
+            parquet_path=args.out_parquet, csv_path=args.out_csv, order=sort_columns
+        )
 
-        soup = BeautifulSoup(page, features="lxml")
+    log.finished()
 
-        for section in soup.find_all("div", attrs={"class": "data-section"}):
-            heading = section.find("h2", attrs={"class": "label-div"})
 
-            if not heading:
-                continue
+def parse_page(page: str, *, strained: bool = True) -> dict:
+    """
+    Parse the data sections on a page into a record.
 
-            value = section.find("div", attrs={"class": "value-div"})
+    A strained parse only builds the data section subtrees and skips the rest of
+    the rendered page (scripts, menus, maps) which is most of it.
+    """
+    rec = {}
 
-            parse_sections(heading, rec, value)
+    parse_only = DATA_SECTIONS if strained else None
+    soup = BeautifulSoup(page, features="lxml", parse_only=parse_only)
 
-        records.append(rec)
+    for section in soup.find_all("div", attrs={"class": "data-section"}):
+        heading = section.find("h2", attrs={"class": "label-div"})
 
-    df = pd.DataFrame(records)
-    df = sort_columns(df)
+        if not heading:
+            continue
 
-    df.to_csv(args.out_csv, index=False)
+        value = section.find("div", attrs={"class": "value-div"})
 
-    log.finished()
+        parse_sections(heading, rec, value)
 
+    soup.decompose()  # Free the tree now instead of waiting for the collector
 
-def sort_columns(df: pd.DataFrame) -> Any:  # pd.DataFrame:
+    return rec
+
+
+def sort_columns(columns: list[str]) -> list[str]:
     states = get_states()
 
     others, canada, usa = [], [], []
 
-    for col in df.columns:
+    for col in columns:
         if col in states and states[col][0] == "Canada":
             state = states[col]
             canada.append((state[1], col))
@@ -67,7 +81,7 @@ def sort_columns(df: pd.DataFrame) -> Any:  # pd.DataFrame:
     canada = [c[1] for c in sorted(canada)]
     columns = others + usa + canada
 
-    return df[columns]
+    return columns
 
 
 def get_states() -> dict:
@@ -212,19 +226,44 @@ def parse_args() -> argparse.Namespace:
         type=Path,
         required=True,
         metavar="PATH",
-        help="""Parse HTML files in this directory.""",
+        help="""Parse HTML files in this directory or page store.""",
     )
 
     arg_parser.add_argument(
         "--out-csv",
         type=Path,
-        required=True,
         metavar="PATH",
         help="""Output the results to this CSV file.""",
     )
 
+    arg_parser.add_argument(
+        "--out-parquet",
+        type=Path,
+        metavar="PATH",
+        help="""Output the results to this Parquet file.""",
+    )
+
+    arg_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=BATCH_SIZE,
+        metavar="INT",
+        help="""Write records to disk in batches of this size while parsing.
+            (default: %(default)s)""",
+    )
+
+    arg_parser.add_argument(
+        "--full-tree",
+        action="store_true",
+        help="""Build the whole page tree instead of only the data sections. This
+            is slower and gives the same records.""",
+    )
+
     args = arg_parser.parse_args()
 
+    if not args.out_csv and not args.out_parquet:
+        arg_parser.error("Give --out-csv, --out-parquet, or both.")
+
     return args
 
 
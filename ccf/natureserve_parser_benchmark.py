@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+import argparse
+import logging
+import textwrap
+import time
+from pathlib import Path
+
+from natureserve_parser import parse_page
+from pylib import log, page_store
+
+
+def main(args: argparse.Namespace) -> None:
+    log.started(args=args)
+
+    with page_store.open_pages(args.html_dir) as pages:
+        texts = [t for _, t in pages.pages()]
+    texts = texts[: args.limit] if args.limit else texts
+
+    full_secs, fulls = timed(texts, strained=False)
+    strained_secs, straineds = timed(texts, strained=True)
+
+    differ = sum(f != s for f, s in zip(fulls, straineds, strict=True))
+
+    logging.info(f"Full tree: {rate(texts, full_secs)}")
+    logging.info(f"Strained:  {rate(texts, strained_secs)}")
+    speedup = full_secs / strained_secs if strained_secs else 0.0
+    logging.info(f"Speedup {speedup:.1f}x, {differ} of {len(texts)} records differ")
+
+    log.finished()
+
+
+def timed(texts: list[str], *, strained: bool) -> tuple[float, list[dict]]:
+    began = time.perf_counter()
+    records = [parse_page(t, strained=strained) for t in texts]
+    return time.perf_counter() - began, records
+
+
+def rate(texts: list[str], secs: float) -> str:
+    pages_per_sec = len(texts) / secs if secs else 0.0
+    return f"{len(texts)} pages in {secs:.2f}s ({pages_per_sec:.1f} pages/sec)"
+
+
+def parse_args() -> argparse.Namespace:
+    arg_parser = argparse.ArgumentParser(
+        allow_abbrev=True,
+        description=textwrap.dedent(
+            """
+            Compare the speed of parsing NatureServe pages with the whole page tree
+            and with only the data sections, and count the records that differ.
+            """
+        ),
+    )
+
+    arg_parser.add_argument(
+        "--html-dir",
+        type=Path,
+        required=True,
+        metavar="PATH",
+        help="""Use HTML files in this directory or page store.""",
+    )
+
+    arg_parser.add_argument(
+        "--limit",
+        type=int,
+        default=0,
+        metavar="INT",
+        help="""Only use this many pages. (default: all)""",
+    )
+
+    args = arg_parser.parse_args()
+
+    return args
+
+
+if __name__ == "__main__":
+    ARGS = parse_args()
+    main(ARGS)
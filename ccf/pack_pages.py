@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+import argparse
+import logging
+import textwrap
+from pathlib import Path
+
+from pylib import log
+from pylib.page_store import DEFAULT_CODEC, GZIP, ZSTD, PageDir, PageStore
+from tqdm import tqdm
+
+
+def main(args: argparse.Namespace) -> None:
+    log.started(args=args)
+
+    with (
+        PageDir(args.html_dir) as pages,
+        PageStore(args.store_dir, codec=args.codec) as store,
+    ):
+        added = store.put_many(tqdm(pages.pages(), total=len(pages)))
+        stats = store.stats()
+
+    ratio = stats["stored_bytes"] / stats["html_bytes"] if stats["html_bytes"] else 0.0
+    logging.info(
+        f"Stored {added} new pages. The store has {stats['pages']} pages with "
+        f"{stats['unique']} unique contents, {stats['stored_bytes']:,} bytes "
+        f"compressed from {stats['html_bytes']:,} ({ratio:.1%})"
+    )
+
+    log.finished()
+
+
+def parse_args() -> argparse.Namespace:
+    arg_parser = argparse.ArgumentParser(
+        allow_abbrev=True,
+        description=textwrap.dedent(
+            """
+            Pack a directory of downloaded HTML pages into a compressed page store.
+
+            The parsers read a page store anywhere they take an --html-dir.
+            """
+        ),
+    )
+
+    arg_parser.add_argument(
+        "--html-dir",
+        type=Path,
+        required=True,
+        metavar="PATH",
+        help="""Pack the HTML files in this directory.""",
+    )
+
+    arg_parser.add_argument(
+        "--store-dir",
+        type=Path,
+        required=True,
+        metavar="PATH",
+        help="""Add the pages to the page store in this directory.""",
+    )
+
+    arg_parser.add_argument(
+        "--codec",
+        choices=[ZSTD, GZIP],
+        default=DEFAULT_CODEC,
+        help="""Compress pages with this codec. (default: %(default)s)""",
+    )
+
+    args = arg_parser.parse_args()
+
+    return args
+
+
+if __name__ == "__main__":
+    ARGS = parse_args()
+    main(ARGS)
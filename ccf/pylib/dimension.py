@@ -1,7 +1,8 @@
 from dataclasses import dataclass
 
 
-@dataclass(eq=False)
+# Slots because there is one of these for every dimension of every size in the corpus
+@dataclass(eq=False, slots=True)
 class Dimension:
     dim: str = None
     units: str = None
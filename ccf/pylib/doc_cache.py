@@ -0,0 +1,196 @@
+"""
+Remember the traits spaCy found in a text so the same text is only parsed once.
+
+The same section text is parsed over and over: a key and its text, two trait parsers
+that share a section, and family boilerplate that recurs in every species. The cache
+keeps the entities (label, character offsets, and trait) of recently parsed texts in
+a size-bounded LRU. Entries pushed out of memory can spill into a SQLite file so
+they survive between runs, and they are committed in small batches so a crashed run
+keeps most of them.
+
+Priming parses texts in batches ahead of their use. More texts than the cache holds
+would push the first ones out before they are used, so primed() primes the texts of
+a run of items in chunks that fit and hands each chunk's items back before the next.
+
+Keys hash the text together with a fingerprint of the pipeline, so editing a term
+file or a rule invalidates everything. Text normalization is limited to trailing
+whitespace because callers slice the original text with the cached offsets.
+"""
+
+import hashlib
+import logging
+import pickle
+import sqlite3
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+    from pathlib import Path
+
+    from spacy.language import Language
+    from spacy.tokens import Doc
+
+MAX_SIZE = 10_000  # Keep this many texts in memory
+BATCH_SIZE = 256  # Number of texts spaCy processes at once in prime()
+COMMIT_EVERY = 100  # Commit the spill file after this many evicted entries
+
+
+class Ent(NamedTuple):
+    label: str
+    start: int
+    end: int
+    trait: Any
+
+
+def doc_ents(doc: Doc) -> list[Ent]:
+    return [Ent(e.label_, e.start_char, e.end_char, e._.trait) for e in doc.ents]
+
+
+class DocCache:
+    def __init__(
+        self,
+        nlp: Language,
+        fingerprint: str,
+        *,
+        max_size: int = MAX_SIZE,
+        spill_db: Path | None = None,
+    ) -> None:
+        self.nlp = nlp
+        self.fingerprint = fingerprint
+        self.max_size = max_size
+        self.cache: OrderedDict[str, list[Ent]] = OrderedDict()
+
+        self.hits = 0
+        self.spill_hits = 0
+        self.misses = 0
+
+        self.spill = None
+        self.uncommitted = 0  # Spilled entries that are not committed yet
+        if spill_db:
+            self.open_spill(spill_db)
+
+    def open_spill(self, spill_db: Path) -> None:
+        """Spill entries evicted from memory into this file and read them back."""
+        self.spill = sqlite3.connect(spill_db)
+        self.spill.execute(
+            "create table if not exists ents (key text primary key, ents blob)"
+        )
+
+    def key(self, text: str) -> str:
+        text = f"{self.fingerprint}\0{text.rstrip()}"
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def ents(self, text: str) -> list[Ent]:
+        """Get the entities for the text, parsing it if it is not cached."""
+        key = self.key(text)
+
+        if (ents := self._get(key)) is not None:
+            return ents
+
+        self.misses += 1
+        ents = doc_ents(self.nlp(text))
+        self._put(key, ents)
+        return ents
+
+    def prime(
+        self, texts: Iterable[str], batch_size: int = BATCH_SIZE, n_process: int = 1
+    ) -> None:
+        """Parse all of the texts that are not cached yet in batches."""
+        todo = {}  # Dicts preserve order sets do not
+        for text in texts:
+            key = self.key(text)
+            if key not in todo and self._get(key, count=False) is None:
+                todo[key] = text
+
+        if len(todo) > self.max_size:
+            logging.warning(
+                f"Priming {len(todo)} texts but only {self.max_size} fit in the cache"
+            )
+
+        self.misses += len(todo)
+        docs = self.nlp.pipe(
+            ((t, k) for k, t in todo.items()),
+            as_tuples=True,
+            batch_size=batch_size,
+            n_process=n_process,
+        )
+        for doc, key in docs:
+            self._put(key, doc_ents(doc))
+
+    def primed(
+        self,
+        items: Iterable[Any],
+        texts: Callable[[Any], list[str]],
+        batch_size: int = BATCH_SIZE,
+        n_process: int = 1,
+    ) -> Iterator[Any]:
+        """Prime the texts of the items a chunk at a time and yield primed items."""
+        chunk, chunk_texts = [], []
+
+        for item in items:
+            item_texts = texts(item)
+            if chunk and len(chunk_texts) + len(item_texts) > self.max_size:
+                self.prime(chunk_texts, batch_size=batch_size, n_process=n_process)
+                yield from chunk
+                chunk, chunk_texts = [], []
+            chunk.append(item)
+            chunk_texts += item_texts
+
+        if chunk:
+            self.prime(chunk_texts, batch_size=batch_size, n_process=n_process)
+            yield from chunk
+
+    def _get(self, key: str, *, count: bool = True) -> list[Ent] | None:
+        if key in self.cache:
+            self.hits += count
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+        if self.spill:
+            row = self.spill.execute(
+                "select ents from ents where key = ?", (key,)
+            ).fetchone()
+            if row:
+                self.spill_hits += count
+                ents = pickle.loads(row[0])  # noqa: S301 Our own cache file
+                self._put(key, ents)
+                return ents
+
+        return None
+
+    def _put(self, key: str, ents: list[Ent]) -> None:
+        self.cache[key] = ents
+        self.cache.move_to_end(key)
+
+        while len(self.cache) > self.max_size:
+            old_key, old_ents = self.cache.popitem(last=False)
+            if self.spill:
+                self.spill.execute(
+                    "insert or replace into ents (key, ents) values (?, ?)",
+                    (old_key, pickle.dumps(old_ents)),
+                )
+                self.uncommitted += 1
+
+        if self.spill and self.uncommitted >= COMMIT_EVERY:
+            self.spill.commit()
+            self.uncommitted = 0
+
+    def close(self) -> None:
+        """Spill everything still in memory so the next run can use it."""
+        if self.spill:
+            self.spill.executemany(
+                "insert or replace into ents (key, ents) values (?, ?)",
+                ((k, pickle.dumps(v)) for k, v in self.cache.items()),
+            )
+            self.spill.commit()
+            self.spill.close()
+            self.spill = None
+
+    def log_stats(self) -> None:
+        total = self.hits + self.spill_hits + self.misses
+        rate = (self.hits + self.spill_hits) / total if total else 0.0
+        logging.info(
+            f"Doc cache: {self.hits} hits, {self.spill_hits} spill hits, "
+            f"{self.misses} misses ({rate:.1%} hit rate), {len(self.cache)} cached"
+        )
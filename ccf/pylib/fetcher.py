@@ -0,0 +1,322 @@
+"""
+Download web pages concurrently with a small pool of long-lived browser contexts.
+
+Launching a browser per page dominates the run time of a large pull, so one Chromium
+is started per run and a few contexts are shared by the fetch workers. A context is
+replaced after it has served a set number of pages to keep its memory from growing
+without bound. Requests to the same host are throttled so we stay polite.
+"""
+
+import asyncio
+import contextlib
+import logging
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+from urllib.parse import urlparse
+
+from ccf.pylib.manifest import (
+    ERROR,
+    INVALID,
+    InvalidPageError,
+    check_page,
+    write_atomic,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Callable, Iterable
+    from pathlib import Path
+
+    from playwright.async_api import Browser, BrowserContext, Page
+
+    from ccf.pylib.manifest import Manifest
+
+ERROR_RETRY = 2  # Make a few attempts to download a page
+TIMEOUT = 2  # Wait this many seconds between requests to the same host
+
+WORKERS = 4  # Fetch this many pages at once
+CONTEXTS = 2  # Number of browser contexts shared by the workers
+PAGES_PER_CONTEXT = 50  # Recycle a browser context after this many pages
+PER_HOST = 2  # Limit concurrent requests to any one host
+
+VIEWPORT = {"width": 1920, "height": 1080}
+
+
+@dataclass
+class Job:
+    url: str
+    path: Path
+    fingerprint: str | None = None  # Identifies the source record for refreshes
+
+
+@dataclass
+class FetchStats:
+    fetched: int = 0
+    skipped: int = 0
+    failed: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def pages_per_sec(self) -> float:
+        elapsed = self.elapsed
+        return self.fetched / elapsed if elapsed > 0.0 else 0.0
+
+    def report(self) -> None:
+        logging.info(
+            f"Fetched {self.fetched}, skipped {self.skipped}, failed {self.failed} "
+            f"in {self.elapsed:.1f}s ({self.pages_per_sec:.2f} pages/sec)"
+        )
+
+
+@dataclass
+class _Slot:
+    context: BrowserContext
+    pages: int = 0
+
+
+class ContextPool:
+    """Hand out browser contexts and replace each one after it has served N pages."""
+
+    def __init__(
+        self, browser: Browser, size: int = CONTEXTS, pages_per_context: int = 0
+    ) -> None:
+        self.browser = browser
+        self.size = max(1, size)
+        self.pages_per_context = pages_per_context
+        self.slots: asyncio.Queue[_Slot] = asyncio.Queue()
+        self.recycled = 0
+
+    async def open(self) -> None:
+        for _ in range(self.size):
+            await self.slots.put(await self._new_slot())
+
+    async def close(self) -> None:
+        while not self.slots.empty():
+            slot = self.slots.get_nowait()
+            await slot.context.close()
+
+    async def _new_slot(self) -> _Slot:
+        context = await self.browser.new_context(viewport=VIEWPORT)
+        return _Slot(context=context)
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        slot = await self.slots.get()
+        try:
+            page = await slot.context.new_page()
+            try:
+                yield page
+            finally:
+                await page.close()
+        finally:
+            slot.pages += 1
+            try:
+                if self.pages_per_context and slot.pages >= self.pages_per_context:
+                    slot = await self._recycle(slot)
+            finally:
+                self.slots.put_nowait(slot)  # The slot always goes back to the pool
+
+    async def _recycle(self, slot: _Slot) -> _Slot:
+        """Replace a worn out context, or keep it when a new one cannot be opened."""
+        try:
+            fresh = await self._new_slot()
+        except Exception as err:  # noqa: BLE001
+            logging.warning(f"Could not replace a browser context: {err!r}")
+            return slot  # Try again after its next page
+        with contextlib.suppress(Exception):
+            await slot.context.close()
+        self.recycled += 1
+        return fresh
+
+
+class HostLimiter:
+    """Limit concurrent requests per host and pause between them."""
+
+    def __init__(self, per_host: int = PER_HOST, delay: float = TIMEOUT) -> None:
+        self.delay = delay
+        self.semaphores: dict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(max(1, per_host))
+        )
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        host = urlparse(url).netloc
+        async with self.semaphores[host]:
+            yield
+            if self.delay:
+                await asyncio.sleep(self.delay)
+
+
+def write_page(job: Job, html: str) -> None:
+    write_atomic(job.path, html)
+
+
+@dataclass
+class Fetcher:
+    """Fetch one job at a time, retrying failures, and record how it went."""
+
+    pool: ContextPool
+    limiter: HostLimiter
+    stats: FetchStats = field(default_factory=FetchStats)
+    retries: int = ERROR_RETRY
+    delay: float = TIMEOUT  # Back off this many seconds times the attempt number
+    wait_until: str = "domcontentloaded"
+    save: Callable[[Job, str], None] = write_page
+    on_failure: Callable[[Job, Exception], None] | None = None
+    validate: Callable[[str], bool] | None = None
+    manifest: Manifest | None = None
+    errors: tuple[type[Exception], ...] = (TimeoutError, InvalidPageError)
+
+    async def download(self, url: str) -> str:
+        async with self.limiter.slot(url), self.pool.page() as page:
+            await page.goto(url, wait_until=self.wait_until)
+            return await page.content()
+
+    async def fetch(self, job: Job) -> None:
+        error: Exception | None = None
+        started = time.perf_counter()
+
+        for attempt in range(1, self.retries + 1):
+            if attempt > 1:
+                logging.info(f"ATTEMPT {attempt} {job.url}")
+            try:
+                html = await self.download(job.url)
+                check_page(html, job.url, self.validate)
+                self.save(job, html)
+            except self.errors as err:
+                error = err
+                if attempt < self.retries:
+                    await asyncio.sleep(attempt * self.delay)
+            else:
+                self.fetched(job, html, attempt, time.perf_counter() - started)
+                return
+
+        self.failed(job, error, time.perf_counter() - started)
+
+    def fetched(self, job: Job, html: str, attempts: int, duration: float) -> None:
+        self.stats.fetched += 1
+        logging.info(f"{self.stats.fetched} {job.path.stem}")
+        if self.manifest:
+            self.manifest.record(
+                job.url,
+                job.path,
+                html,
+                duration=duration,
+                attempts=attempts,
+                fingerprint=job.fingerprint,
+            )
+
+    def failed(self, job: Job, error: Exception | None, duration: float) -> None:
+        self.stats.failed += 1
+        logging.warning(f"FAILED {job.url}: {error!r}")
+        if self.manifest:
+            self.manifest.failed(
+                job.url,
+                job.path,
+                status=INVALID if isinstance(error, InvalidPageError) else ERROR,
+                duration=duration,
+                attempts=self.retries,
+                error=repr(error),
+            )
+        if self.on_failure and error:
+            self.on_failure(job, error)
+
+
+async def run_workers(
+    queue: asyncio.Queue[Job], fetcher: Fetcher, workers: int
+) -> None:
+    """Drain the queue with this many concurrent workers."""
+
+    async def worker() -> None:
+        while True:
+            try:
+                job = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await fetcher.fetch(job)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, workers))))
+
+
+async def fetch_all(
+    jobs: Iterable[Job],
+    *,
+    workers: int = WORKERS,
+    contexts: int = CONTEXTS,
+    pages_per_context: int = PAGES_PER_CONTEXT,
+    per_host: int = PER_HOST,
+    delay: float = TIMEOUT,
+    retries: int = ERROR_RETRY,
+    wait_until: str = "domcontentloaded",
+    skip_existing: bool = True,
+    save: Callable[[Job, str], None] = write_page,
+    on_failure: Callable[[Job, Exception], None] | None = None,
+    validate: Callable[[str], bool] | None = None,
+    manifest: Manifest | None = None,
+) -> FetchStats:
+    """
+    Fetch every job's URL and save it, returning the run statistics.
+
+    A page that fails validation is treated like a failed request and fetched again.
+    When there is a manifest it decides which pages are already done and records the
+    outcome of every fetch.
+    """
+    from playwright.async_api import Error as PwError  # noqa: PLC0415
+    from playwright.async_api import async_playwright  # noqa: PLC0415
+
+    stats = FetchStats()
+    queue: asyncio.Queue[Job] = asyncio.Queue()
+
+    for job in jobs:
+        if skip_existing and (
+            manifest.is_done(job.url, job.path, validate)
+            if manifest
+            else job.path.exists()
+        ):
+            stats.skipped += 1
+            continue
+        queue.put_nowait(job)
+
+    logging.info(f"{queue.qsize()} pages to fetch, {stats.skipped} already exist")
+    if queue.empty():
+        return stats
+
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch()
+        pool = ContextPool(browser, size=contexts, pages_per_context=pages_per_context)
+        await pool.open()
+
+        fetcher = Fetcher(
+            pool=pool,
+            limiter=HostLimiter(per_host=per_host, delay=delay),
+            stats=stats,
+            retries=retries,
+            delay=delay,
+            wait_until=wait_until,
+            save=save,
+            on_failure=on_failure,
+            validate=validate,
+            manifest=manifest,
+            errors=(TimeoutError, PwError, InvalidPageError),
+        )
+
+        try:
+            await run_workers(queue, fetcher, workers)
+        finally:
+            await pool.close()
+            await browser.close()
+
+    logging.info(f"Recycled {pool.recycled} browser contexts")
+    stats.report()
+    return stats
+
+
+def download_all(jobs: Iterable[Job], **kwargs: Any) -> FetchStats:
+    """Run fetch_all() from synchronous code."""
+    return asyncio.run(fetch_all(jobs, **kwargs))
@@ -1,31 +1,80 @@
-import csv
-import re
-from pathlib import Path
-
-from bs4 import BeautifulSoup
+import functools
+from typing import TYPE_CHECKING
 
 from ccf.pylib import pipeline
 from ccf.pylib.dimension import Dimension
+from ccf.pylib.doc_cache import BATCH_SIZE, DocCache
+from ccf.pylib.size_batch import SizeBatch
 from ccf.pylib.str_util import clean
-from ccf.rules.size import Size
+from ccf.pylib.vocab_matcher import TERMS_DIR, VocabMatcher
+
+if TYPE_CHECKING:
+    from ccf.rules.size import Size
 
-PIPELINE = pipeline.build()
 
-SHAPES = set()
-FRUIT_TYPES = set()
-DURATION = set()
+@functools.cache
+def get_cache(profile: str = pipeline.FULL) -> DocCache:
+    """Load the pipeline the first time a text is parsed, not on import."""
+    return DocCache(pipeline.load(profile), pipeline.fingerprint(profile))
 
 
 def parse_treatment(record, treatment):
+    sizes = SizeBatch()
+    add_treatment(record, treatment, sizes)
+    finish_sizes(sizes)
+
+
+def add_treatment(record, treatment, sizes: SizeBatch):
+    """Parse a treatment, leaving its sizes in the batch to be converted later."""
     used = set()
 
     for key, text in treatment.items():
         if funcs := PARSE.get(key):
             for func in funcs:
-                if func not in used and func(key, text, record):
+                if func not in used and func(key, text, record, sizes):
                     used.add(func)  # Only parse a trait once
 
 
+def parse_treatments(
+    pages: list[tuple[dict, dict, dict | None]],
+    batch_size: int = BATCH_SIZE,
+    n_process: int = 1,
+) -> list[dict]:
+    """
+    Parse many pages at once.
+
+    Each page is a (record, treatment, info) tuple. The section texts that the size
+    parsers need are run through spaCy in batches to fill the doc cache first, as
+    many pages at a time as the cache holds, and then those pages are parsed exactly
+    as parse_treatment() and parse_info() would parse them one by one. The sizes from
+    every page are converted together at the end. With n_process above one spaCy
+    parses the batches in that many processes.
+    """
+    sizes = SizeBatch()
+    primed = get_cache().primed(
+        pages, spacy_texts, batch_size=batch_size, n_process=n_process
+    )
+    for record, treatment, info in primed:
+        add_treatment(record, treatment, sizes)
+        if info:
+            parse_info(info, record)
+
+    finish_sizes(sizes)
+
+    return [p[0] for p in pages]
+
+
+def spacy_texts(page: tuple[dict, dict, dict | None]) -> list[str]:
+    """Get the texts of a page that the size parsers run through spaCy."""
+    # Only the size parsers use spaCy, the vocabulary parsers do not
+    size_parsers = {plant_height, leaf_size, seed_size, fruit_size}
+    _record, treatment, info = page
+    texts = [t for k, t in treatment.items() if size_parsers & set(PARSE.get(k) or ())]
+    if info:
+        texts.append(info.get("Elevation", ""))
+    return texts
+
+
 def init_record(page):
     taxon = page.stem.replace("_", " ")
     taxon = taxon[0].upper() + taxon[1:]
@@ -34,143 +83,97 @@ def init_record(page):
     return record
 
 
-def find_treatment(soup):
-    treatment = soup.find("span", class_="statement")
-    if not treatment:
-        return {}
-
-    text = str(treatment).replace("<i>", "").replace("</i>", "")
-    text = re.sub(r"(Perennials|Annuals|Biennials);", r"<b>\1</b>", text)
-    text = clean(text)
-
-    soup2 = BeautifulSoup(text, features="lxml")
-    parts = [p.text.strip() for p in soup2.find_all(string=True)]
-    treatment = dict(zip(parts[0::2], parts[1::2], strict=True))
-    return treatment
-
-
 def has_value(dim):
     return any(getattr(dim, k) is not None for k in ("min", "low", "high", "max"))
 
 
-def plant_height(_key, text, record):
+def plant_height(_key, text, record, sizes: SizeBatch):
     size = get_size_trait(text, "", "")
-    size = Size.convert_units_to_cm(size)
 
     length = get_size_dim(size, ["length", "height"])
 
-    record["plant_height_min_cm"] = length.min
-    record["plant_height_low_cm"] = length.low
-    record["plant_height_high_cm"] = length.high
-    record["plant_height_max_cm"] = length.max
+    sizes.add(record, "plant_height", length)
 
     return has_value(length)
 
 
-def plant_deciduousness(key, text, record):
-    record["deciduousness"] = vocab_hits(text, DURATION, key)
+def plant_deciduousness(key, text, record, _sizes: SizeBatch):
+    record["deciduousness"] = vocab_hits(text, "leaf_duration", key)
     return bool(record["deciduousness"])
 
 
-def leaf_size(_key, text, record):
+def leaf_size(_key, text, record, sizes: SizeBatch):
     size = get_size_trait(text, "leaf_size", "leaf")
-    size = Size.convert_units_to_cm(size)
 
     length = get_size_dim(size, "length")
     width = get_size_dim(size, "width")
     thickness = get_size_dim(size, "thickness")
 
-    record["leaf_length_min_cm"] = length.min
-    record["leaf_length_low_cm"] = length.low
-    record["leaf_length_high_cm"] = length.high
-    record["leaf_length_max_cm"] = length.max
-
-    record["leaf_width_min_cm"] = width.min
-    record["leaf_width_low_cm"] = width.low
-    record["leaf_width_high_cm"] = width.high
-    record["leaf_width_max_cm"] = width.max
-
-    record["leaf_thickness_min_cm"] = thickness.min
-    record["leaf_thickness_low_cm"] = thickness.low
-    record["leaf_thickness_high_cm"] = thickness.high
-    record["leaf_thickness_max_cm"] = thickness.max
+    sizes.add(record, "leaf_length", length)
+    sizes.add(record, "leaf_width", width)
+    sizes.add(record, "leaf_thickness", thickness)
 
     return has_value(length) or has_value(width) or has_value(thickness)
 
 
-def leaf_shape(_key, text, record):
-    record["leaf_shape"] = vocab_hits(text.lower(), SHAPES)
+def leaf_shape(_key, text, record, _sizes: SizeBatch):
+    record["leaf_shape"] = vocab_hits(text.lower(), "shape")
     return bool(record["leaf_shape"])
 
 
-def seed_size(_key, text, record):
+def seed_size(_key, text, record, sizes: SizeBatch):
     size = get_size_trait(text, "seed_size", "seed")
-    size = Size.convert_units_to_cm(size)
 
     length = get_size_dim(size, "length")
     width = get_size_dim(size, "width")
     diameter = get_size_dim(size, "diameter")
 
-    record["seed_length_min_cm"] = length.min
-    record["seed_length_low_cm"] = length.low
-    record["seed_length_high_cm"] = length.high
-    record["seed_length_max_cm"] = length.max
-
-    record["seed_width_min_cm"] = width.min
-    record["seed_width_low_cm"] = width.low
-    record["seed_width_high_cm"] = width.high
-    record["seed_width_max_cm"] = width.max
-
-    record["seed_diameter_min_cm"] = diameter.min
-    record["seed_diameter_low_cm"] = diameter.low
-    record["seed_diameter_high_cm"] = diameter.high
-    record["seed_diameter_max_cm"] = diameter.max
+    sizes.add(record, "seed_length", length)
+    sizes.add(record, "seed_width", width)
+    sizes.add(record, "seed_diameter", diameter)
 
     return has_value(length) or has_value(width)
 
 
-def fruit_type(key, text, record):
-    record["fruit_type"] = vocab_hits(text.lower(), FRUIT_TYPES, key.lower())
+def fruit_type(key, text, record, _sizes: SizeBatch):
+    record["fruit_type"] = vocab_hits(text.lower(), "fruit_type", key.lower())
     return bool(record["fruit_type"])
 
 
-def fruit_size(_key, text, record):
+def fruit_size(_key, text, record, sizes: SizeBatch):
     size = get_size_trait(text, "fruit_size", "fruit")
-    size = Size.convert_units_to_cm(size)
 
     length = get_size_dim(size, ["length", "height"])
     width = get_size_dim(size, "width")
     diameter = get_size_dim(size, "diameter")
 
-    record["fruit_length_min_cm"] = length.min
-    record["fruit_length_low_cm"] = length.low
-    record["fruit_length_high_cm"] = length.high
-    record["fruit_length_max_cm"] = length.max
-
-    record["fruit_width_min_cm"] = width.min
-    record["fruit_width_low_cm"] = width.low
-    record["fruit_width_high_cm"] = width.high
-    record["fruit_width_max_cm"] = width.max
-
-    record["fruit_diameter_min_cm"] = diameter.min
-    record["fruit_diameter_low_cm"] = diameter.low
-    record["fruit_diameter_high_cm"] = diameter.high
-    record["fruit_diameter_max_cm"] = diameter.max
+    sizes.add(record, "fruit_length", length)
+    sizes.add(record, "fruit_width", width)
+    sizes.add(record, "fruit_diameter", diameter)
 
     return has_value(length) or has_value(width)
 
 
 def get_size_trait(text: str, label: str, part: str) -> Size:
-    doc = PIPELINE(text)
+    from ccf.rules.size import Size  # noqa: PLC0415 Spacy is loaded by now
+
+    ents = get_cache().ents(text)
     ent = next(
-        (e._.trait for e in doc.ents if e.label_ == label and e._.trait.part == part),
+        (e.trait for e in ents if e.label == label and e.trait.part == part),
         None,
     )
     if not ent:
-        ent = next((e._.trait for e in doc.ents if e.label_ == "size"), Size())
+        ent = next((e.trait for e in ents if e.label == "size"), Size())
     return ent
 
 
+def finish_sizes(sizes: SizeBatch) -> int:
+    """Convert all of the sizes in the batch to centimeters."""
+    from ccf.rules.size import Size  # noqa: PLC0415
+
+    return sizes.finish(Size.factors_cm)
+
+
 def get_size_dim(size, dim: str | list[str] = "length") -> Dimension:
     dims = dim if isinstance(dim, list) else [dim]
     if not size:
@@ -179,22 +182,13 @@ def get_size_dim(size, dim: str | list[str] = "length") -> Dimension:
     return dim_
 
 
-def vocab_hits(text, vocab, key=None):
-    hits = {key: 1} if key and key.lower() in vocab else {}
-    hits |= {w: 1 for w in re.split(r"\W+", text) if w.lower() in vocab}
+def vocab_hits(text, vocab: str, key=None):
+    matcher = get_vocab()[vocab]
+    hits = {key: 1} if key and matcher.is_term(key) else {}
+    hits |= {text[h.start : h.end]: 1 for h in matcher.match(text)}
     return " | ".join(hits.keys())
 
 
-def get_info(soup):
-    info = soup.find("div", class_="treatment-info")
-    if not info:
-        return None
-    info = info.find_all(string=True)
-    info = [clean(x) for i in info if (x := i.strip()) and i.find(":") > -1]
-    info = {i.split(":")[0].strip(): i.split(":")[1].strip() for i in info}
-    return info
-
-
 def parse_info(info, record):
     phenology(info, record)
     habitat(info, record)
@@ -218,26 +212,22 @@ def elevation(info, record):
     record["elevation_max_m"] = elev.high
 
 
-def get_terms():
-    shape_file = Path(__file__).parent.parent / "rules" / "terms" / "shape_terms.csv"
-    fruit_file = Path(__file__).parent.parent / "rules" / "terms" / "fruit_terms.csv"
-    dur_file = Path(__file__).parent.parent / "rules" / "terms" / "leaf_terms.csv"
-
-    with shape_file.open() as f:
-        shapes = {r["pattern"] for r in csv.DictReader(f)}
-
-    with fruit_file.open() as f:
-        fruit_types = {
-            r["pattern"] for r in csv.DictReader(f) if r["label"] == "fruit_type"
-        }
-    fruit_types -= {"fruit", "fruits"}
-
-    with dur_file.open() as f:
-        duration = {
-            r["pattern"] for r in csv.DictReader(f) if r["label"] == "leaf_duration"
-        }
-
-    return shapes, fruit_types, duration
+@functools.cache
+def get_vocab() -> dict[str, VocabMatcher]:
+    """Build the vocabulary matchers the first time they are needed."""
+    return {
+        "shape": VocabMatcher.from_csvs(
+            [TERMS_DIR / "shape_terms.csv"], labels=["shape_term"]
+        ),
+        "fruit_type": VocabMatcher.from_csvs(
+            [TERMS_DIR / "fruit_terms.csv"],
+            labels=["fruit_type"],
+            exclude=["fruit", "fruits"],
+        ),
+        "leaf_duration": VocabMatcher.from_csvs(
+            [TERMS_DIR / "leaf_terms.csv"], labels=["leaf_duration"]
+        ),
+    }
 
 
 PARSE = {
@@ -0,0 +1,146 @@
+"""
+Keep a census of the treatment keys on every FNA page.
+
+Finding the keys that PARSE does not handle used to mean extracting the treatment
+from every page in the snapshot on every run. The census stores each page's keys in
+a SQLite index along with the page's digest. An update only extracts the treatments
+of pages that are new or have changed, spread over a pool of worker processes, and
+drops pages that are gone. Questions like "which keys are missing from PARSE" are
+then answered from the index without reading any pages.
+"""
+
+import contextlib
+import multiprocessing as mp
+import sqlite3
+from typing import TYPE_CHECKING, NamedTuple, Self
+
+from ccf.pylib.treatment import extract
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+
+    from ccf.pylib.page_store import PageDir, PageStore
+
+CENSUS_DB = "key_census.sqlite"
+CHUNK_SIZE = 32  # Pages sent to a worker at a time
+SAMPLES = 3  # Sample pages kept for each key in a report
+SAMPLE_LEN = 200  # Characters of a section's text kept as a sample
+
+
+class KeyCount(NamedTuple):
+    key: str
+    count: int  # Pages with the key
+    stems: list[str]  # A few of those pages
+    samples: list[str]  # The key's text on those pages
+
+
+def page_keys(job: tuple[str, str]) -> tuple[str, dict[str, str]]:
+    """Get the treatment keys on a page and the start of the text for each one."""
+    stem, text = job
+    sections = extract(text).as_dict()
+    return stem, {k: v[:SAMPLE_LEN] for k, v in sections.items()}
+
+
+class KeyCensus:
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        self.cxn = sqlite3.connect(db_path)
+        self.cxn.executescript(
+            """
+            create table if not exists pages (
+                stem   text primary key,
+                digest text not null
+            );
+            create table if not exists keys (
+                stem   text not null,
+                key    text not null,
+                sample text,
+                primary key (stem, key)
+            );
+            create index if not exists keys_key on keys (key);
+            """
+        )
+        self.cxn.commit()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.cxn.close()
+
+    def update(self, pages: PageStore | PageDir, *, workers: int = 1) -> dict[str, int]:
+        """Bring the census up to date with the pages and count what was done."""
+        known = dict(self.cxn.execute("select stem, digest from pages"))
+        digests = {s: pages.digest(s) for s in pages.stems()}
+
+        removed = known.keys() - digests.keys()
+        stale = [s for s, d in digests.items() if known.get(s) != d]
+
+        self.cxn.executemany("delete from keys where stem = ?", [(s,) for s in removed])
+        self.cxn.executemany(
+            "delete from pages where stem = ?", [(s,) for s in removed]
+        )
+        self.cxn.commit()
+
+        jobs = ((s, pages.read(s)) for s in stale)
+
+        with contextlib.ExitStack() as stack:
+            if workers > 1:
+                pool = stack.enter_context(mp.Pool(processes=workers))
+                results = pool.imap_unordered(page_keys, jobs, chunksize=CHUNK_SIZE)
+            else:
+                results = map(page_keys, jobs)
+
+            for i, (stem, keys) in enumerate(results, 1):
+                self.put(stem, digests[stem], keys)
+                if i % CHUNK_SIZE == 0:  # Keep the work done if the run dies
+                    self.cxn.commit()
+
+        self.cxn.commit()
+
+        return {
+            "added": sum(s not in known for s in stale),
+            "changed": sum(s in known for s in stale),
+            "removed": len(removed),
+            "unchanged": len(digests) - len(stale),
+        }
+
+    def put(self, stem: str, digest: str, keys: dict[str, str]) -> None:
+        self.cxn.execute("delete from keys where stem = ?", (stem,))
+        self.cxn.executemany(
+            "insert into keys (stem, key, sample) values (?, ?, ?)",
+            [(stem, k, v) for k, v in keys.items()],
+        )
+        self.cxn.execute(
+            "insert or replace into pages (stem, digest) values (?, ?)", (stem, digest)
+        )
+
+    def page_count(self) -> int:
+        return self.cxn.execute("select count(*) from pages").fetchone()[0]
+
+    def counts(self) -> dict[str, int]:
+        """Count the pages with each key."""
+        rows = self.cxn.execute(
+            "select key, count(*) from keys group by key order by key"
+        )
+        return dict(rows.fetchall())
+
+    def missing(self, known: Iterable[str]) -> list[KeyCount]:
+        """Get the keys that are not in known, with a few pages for each."""
+        known = set(known)
+        return [
+            self.key_count(key, count)
+            for key, count in self.counts().items()
+            if key not in known
+        ]
+
+    def key_count(self, key: str, count: int) -> KeyCount:
+        rows = self.cxn.execute(
+            "select stem, sample from keys where key = ? order by stem limit ?",
+            (key, SAMPLES),
+        ).fetchall()
+        return KeyCount(key, count, [r[0] for r in rows], [r[1] or "" for r in rows])
@@ -0,0 +1,234 @@
+"""
+Remember language model answers on disk so the same question is only asked once.
+
+An answer is keyed on everything that could change it: the model, the server it
+ran on, the DSPy signature (its fields and instructions), the prompt, and a hash
+of the input fields. The answers live in a SQLite file that is kept under a size
+limit by dropping the least recently used ones. The cache counts its hits and misses
+and adds up the model time each hit saved.
+
+Each answer keeps the latency and token counts it cost when the model gave it, so a
+hit reports the same usage as the original answer and only differs by being cached.
+
+A cache can be warmed from the predictions a prior run saved, so switching machines
+or clearing the cache does not mean asking the model everything again.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Self
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+CACHE_DB = Path.home() / ".cache" / "ccf" / "lm_cache.sqlite"
+MAX_BYTES = 256 * 1024 * 1024  # Drop the least recently used answers past this
+EVICT_EVERY = 100  # Check the size after this many new answers
+
+
+@dataclass
+class Answer:
+    fields: dict[str, str] = field(default_factory=dict)
+    latency: float = 0.0  # Seconds the model took
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached: bool = False  # The answer came from the cache and not the model
+
+
+def signature_key(signature: Any) -> str:
+    """Describe a DSPy signature by its name, fields, and instructions."""
+    return "\n".join(
+        [
+            getattr(signature, "__name__", str(signature)),
+            getattr(signature, "signature", ""),
+            getattr(signature, "instructions", ""),
+        ]
+    )
+
+
+def cache_key(
+    *, model: str, api_base: str, signature: str, prompt: str, inputs: dict
+) -> str:
+    inputs_hash = hashlib.sha256(
+        json.dumps(inputs, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+    parts = [model, api_base or "", signature, prompt, inputs_hash]
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+class LMCache:
+    def __init__(self, db_path: Path = CACHE_DB, *, max_bytes: int = MAX_BYTES) -> None:
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.saved = 0.0  # Seconds of model time the hits did not spend
+        self.added = 0
+        self.evicted = 0
+
+        # The LM runner asks from many threads
+        self.lock = threading.Lock()
+
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.cxn = sqlite3.connect(db_path, check_same_thread=False)
+        self.cxn.execute(
+            """
+            create table if not exists answers (
+                key               text primary key,
+                model             text not null,
+                answer            text not null,
+                bytes             integer not null,
+                latency           real not null default 0.0,
+                prompt_tokens     integer not null default 0,
+                completion_tokens integer not null default 0,
+                used              real not null
+            )
+            """
+        )
+        self.cxn.execute("create index if not exists answers_used on answers (used)")
+        self.cxn.commit()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self.lock:
+            self.evict()
+            self.cxn.close()
+
+    def get(self, key: str) -> dict[str, str] | None:
+        answer = self.lookup(key)
+        return None if answer is None else answer.fields
+
+    def lookup(self, key: str) -> Answer | None:
+        """Get an answer with the latency and tokens it cost the first time."""
+        with self.lock:
+            row = self.cxn.execute(
+                """
+                select answer, latency, prompt_tokens, completion_tokens
+                from answers where key = ?
+                """,
+                (key,),
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.saved += row[1]
+            self.cxn.execute(
+                "update answers set used = ? where key = ?", (time.time(), key)
+            )
+            self.cxn.commit()
+            return Answer(json.loads(row[0]), row[1], row[2], row[3], cached=True)
+
+    def put(
+        self,
+        key: str,
+        answer: dict[str, str],
+        *,
+        model: str,
+        latency: float = 0.0,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+    ) -> None:
+        data = json.dumps(answer)
+        with self.lock:
+            self.cxn.execute(
+                """
+                insert or replace into answers
+                    (key, model, answer, bytes, latency,
+                     prompt_tokens, completion_tokens, used)
+                values (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    key,
+                    model,
+                    data,
+                    len(data.encode("utf-8")),
+                    latency,
+                    prompt_tokens,
+                    completion_tokens,
+                    time.time(),
+                ),
+            )
+            self.cxn.commit()
+            self.added += 1
+            if self.added % EVICT_EVERY == 0:
+                self.evict()
+
+    def evict(self) -> int:
+        """Drop the least recently used answers until the cache fits its limit."""
+        total = self.cxn.execute("select coalesce(sum(bytes), 0) from answers")
+        excess = total.fetchone()[0] - self.max_bytes
+        if excess <= 0:
+            return 0
+
+        drop, dropped = [], 0
+        for key, size in self.cxn.execute(
+            "select key, bytes from answers order by used"
+        ):
+            if dropped >= excess:
+                break
+            drop.append((key,))
+            dropped += size
+
+        self.cxn.executemany("delete from answers where key = ?", drop)
+        self.cxn.commit()
+        self.evicted += len(drop)
+        return len(drop)
+
+    def warm(self, records: Iterable[dict], fields: list[str]) -> int:
+        """
+        Add the answers a prior run saved (see fna_try_lm --save-predictions).
+
+        A saved answer may only have some of the fields when only those were asked.
+        """
+        count = 0
+        for record in records:
+            key = cache_key(
+                model=record["model"],
+                api_base=record["api_base"],
+                signature=record["signature"],
+                prompt=record["prompt"],
+                inputs=record["inputs"],
+            )
+            answer = {f: record[f] for f in fields if f in record}
+            if not answer:
+                continue
+            self.put(
+                key,
+                answer,
+                model=record["model"],
+                latency=record.get("latency", 0.0),
+                prompt_tokens=record.get("prompt_tokens", 0),
+                completion_tokens=record.get("completion_tokens", 0),
+            )
+            count += 1
+        return count
+
+    def stats(self) -> dict[str, float]:
+        with self.lock:
+            entries, size = self.cxn.execute(
+                "select count(*), coalesce(sum(bytes), 0) from answers"
+            ).fetchone()
+        asked = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / asked if asked else 0.0,
+            "saved_secs": self.saved,
+            "entries": entries,
+            "bytes": size,
+            "evicted": self.evicted,
+        }
@@ -0,0 +1,121 @@
+"""
+Ask a language model about many examples at once.
+
+Calling the model for one example at a time leaves the model server idle while each
+response is scored and printed. The runner keeps up to `concurrency` requests in
+flight on a thread pool, which is plenty since the threads only wait on HTTP. A
+request that fails (a timeout, a dropped connection, a reply that does not parse)
+is retried after a backoff that doubles each time. Results come back in example
+order so the output and the scores match a serial run.
+
+The per-request timeout belongs to the model client (dspy.LM(timeout=...)) because
+a thread that is stuck in a request cannot be stopped from the outside.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+
+CONCURRENCY = 4  # Requests in flight at once
+TIMEOUT = 120.0  # Seconds to wait for one response
+RETRIES = 2  # Retries after the first attempt fails
+BACKOFF = 2.0  # Seconds to wait before the first retry, doubled after each one
+
+
+@dataclass
+class LMResult:
+    index: int
+    example: Any
+    prediction: Any = None  # None when every attempt failed
+    error: str = ""
+    attempts: int = 0
+    elapsed: float = 0.0  # Seconds for the attempt that finished
+
+    @property
+    def ok(self) -> bool:
+        return self.prediction is not None
+
+
+class LMRunner:
+    def __init__(
+        self,
+        predict: Callable[[Any], Any],
+        *,
+        concurrency: int = CONCURRENCY,
+        retries: int = RETRIES,
+        backoff: float = BACKOFF,
+    ) -> None:
+        self.predict = predict
+        self.concurrency = max(1, concurrency)
+        self.retries = retries
+        self.backoff = backoff
+
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0  # For checking the limit was kept
+
+    def run(self, examples: Iterable[Any]) -> Iterator[LMResult]:
+        """Yield a result for every example in example order."""
+        jobs = enumerate(examples)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            # map() starts the requests right away and yields the results in order
+            yield from pool.map(lambda job: self.call(*job), jobs)
+
+    def call(self, index: int, example: Any) -> LMResult:
+        result = LMResult(index=index, example=example)
+
+        for attempt in range(self.retries + 1):
+            result.attempts = attempt + 1
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+
+            self.started()
+            began = time.perf_counter()
+            try:
+                result.prediction = self.predict(example)
+                result.error = ""
+            except Exception as err:  # noqa: BLE001
+                result.error = f"{type(err).__name__}: {err}"
+                logging.warning(
+                    f"Example {index} attempt {attempt + 1}: {result.error}"
+                )
+            finally:
+                result.elapsed = time.perf_counter() - began
+                self.stopped()
+
+            if result.ok:
+                break
+
+        return result
+
+    @staticmethod
+    def unpack(results: Iterable[LMResult]) -> Iterator[LMResult]:
+        """Split the results for packs of examples into one result per example."""
+        index = 0
+        for result in results:
+            predictions = result.prediction or [None] * len(result.example)
+            for example, prediction in zip(result.example, predictions, strict=True):
+                yield LMResult(
+                    index=index,
+                    example=example,
+                    prediction=prediction,
+                    error=result.error,
+                    attempts=result.attempts,
+                    elapsed=result.elapsed / len(result.example),
+                )
+                index += 1
+
+    def started(self) -> None:
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def stopped(self) -> None:
+        with self.lock:
+            self.in_flight -= 1
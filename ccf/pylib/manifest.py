@@ -0,0 +1,227 @@
+"""
+Keep a manifest of every downloaded page.
+
+A page only counts as downloaded when the manifest says it was fetched, it passed
+validation, and the file on disk still has the size and content that were recorded.
+A file whose size and modification time match the manifest is trusted; otherwise its
+content is hashed and compared with the recorded digest.
+Pages are written to a temporary file and renamed into place so a crash never leaves
+a truncated page behind that looks complete. Pages that fail validation (error or
+interstitial pages) are recorded as invalid and fetched again on the next run.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from typing import TYPE_CHECKING, Self
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+OK = "ok"
+INVALID = "invalid"
+ERROR = "error"
+
+MEMORY = ":memory:"  # A manifest that is not saved
+
+FNA_RE = re.compile(r"""<span[^>]*\sclass=["'][^"']*\bstatement\b""")
+NATURE_SERVE_RE = re.compile(r"""\sclass=["'][^"']*\bdata-section\b""")
+
+
+NEW_COLUMNS = {
+    "fingerprint": "text",  # Added for refreshes
+    "mtime": "integer",  # Added for checking pages without reading them
+}
+
+
+class InvalidPageError(ValueError):
+    pass
+
+
+def fna_page(html: str) -> bool:
+    return bool(FNA_RE.search(html))
+
+
+def nature_serve_page(html: str) -> bool:
+    return bool(NATURE_SERVE_RE.search(html))
+
+
+def check_page(html: str, url: str, validate: Callable[[str], bool] | None) -> None:
+    if validate and not validate(html):
+        raise InvalidPageError(url)
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def write_atomic(path: Path, text: str) -> None:
+    """Write to a temporary file next to the target and then rename it into place."""
+    temp = path.with_name(f".{path.name}.tmp")
+    with temp.open("w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    temp.replace(path)
+
+
+class Manifest:
+    def __init__(self, db_path: Path | str, *, readonly: bool = False) -> None:
+        self.db_path = db_path
+        self.readonly = readonly  # For reading another snapshot's manifest
+
+        if readonly:
+            self.cxn = sqlite3.connect(
+                f"{db_path.resolve().as_uri()}?mode=ro", uri=True
+            )
+            return
+
+        self.cxn = sqlite3.connect(db_path)
+        self.cxn.execute(
+            """
+            create table if not exists pages (
+                url      text primary key,
+                path     text not null,
+                status   text not null,
+                bytes    integer,
+                digest   text,
+                duration real,
+                attempts integer not null default 0,
+                error    text,
+                fetched  real,
+                fingerprint text,
+                mtime    integer
+            )
+            """
+        )
+        columns = {r[1] for r in self.cxn.execute("pragma table_info(pages)")}
+        for column, type_ in NEW_COLUMNS.items():  # Manifests from older versions
+            if column not in columns:
+                self.cxn.execute(f"alter table pages add column {column} {type_}")
+        self.cxn.commit()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.cxn.close()
+
+    def get(self, url: str) -> dict | None:
+        cursor = self.cxn.execute("select * from pages where url = ?", (url,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip([c[0] for c in cursor.description], row, strict=True))
+
+    def is_done(
+        self, url: str, path: Path, validate: Callable[[str], bool] | None = None
+    ) -> bool:
+        """Check that the page is downloaded, valid, and unchanged on disk."""
+        row = self.get(url)
+
+        if row is None:
+            # A page downloaded before there was a manifest: check it once
+            if self.readonly or not path.exists():
+                return False  # A read only manifest cannot record what it found
+            html = path.read_text(encoding="utf-8")
+            valid = validate(html) if validate else True
+            status = OK if valid else INVALID
+            self.record(url, path, html, status=status, fetched=path.stat().st_mtime)
+            return valid
+
+        return row["status"] == OK and self.unchanged(row, path)
+
+    def unchanged(self, row: dict, path: Path) -> bool:
+        """Check that the file still has the size and content that were recorded."""
+        if not path.exists():
+            return False
+
+        stat = path.stat()
+        if stat.st_size != row["bytes"]:
+            return False
+        if stat.st_mtime_ns == row.get("mtime"):
+            return True
+
+        # The file was touched or copied, so check its content
+        if content_hash(path.read_bytes()) != row["digest"]:
+            return False
+        if self.readonly:
+            return True
+        self.cxn.execute(
+            "update pages set mtime = ? where url = ?", (stat.st_mtime_ns, row["url"])
+        )
+        self.cxn.commit()
+        return True
+
+    def record(
+        self,
+        url: str,
+        path: Path,
+        html: str,
+        *,
+        status: str = OK,
+        duration: float | None = None,
+        attempts: int = 0,
+        error: str | None = None,
+        fingerprint: str | None = None,
+        fetched: float | None = None,
+    ) -> None:
+        data = html.encode("utf-8")
+        mtime = path.stat().st_mtime_ns if path.exists() else None
+        self.put(
+            {
+                "url": url,
+                "path": str(path),
+                "status": status,
+                "bytes": len(data),
+                "digest": content_hash(data),
+                "duration": duration,
+                "attempts": attempts,
+                "error": error,
+                "fetched": fetched or time.time(),
+                "fingerprint": fingerprint,
+                "mtime": mtime,
+            }
+        )
+
+    def put(self, row: dict) -> None:
+        """Insert or replace a whole row, like one copied from another manifest."""
+        keys = ", ".join(row)
+        marks = ", ".join("?" * len(row))
+        self.cxn.execute(
+            f"insert or replace into pages ({keys}) values ({marks})",
+            tuple(row.values()),
+        )
+        self.cxn.commit()
+
+    def failed(
+        self,
+        url: str,
+        path: Path,
+        *,
+        status: str = ERROR,
+        duration: float | None = None,
+        attempts: int = 0,
+        error: str = "",
+    ) -> None:
+        self.cxn.execute(
+            """
+            insert or replace into pages
+                (url, path, status, duration, attempts, error, fetched)
+            values (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (url, str(path), status, duration, attempts, error, time.time()),
+        )
+        self.cxn.commit()
+
+    def counts(self) -> dict[str, int]:
+        counts = dict.fromkeys((OK, INVALID, ERROR), 0)
+        rows = self.cxn.execute("select status, count(*) from pages group by status")
+        counts |= dict(rows.fetchall())
+        return counts
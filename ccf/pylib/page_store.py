@@ -0,0 +1,263 @@
+"""
+Keep downloaded web pages compressed in a few packed segment files.
+
+A quarterly snapshot is tens of thousands of loose HTML files that are mostly
+boilerplate. The store compresses each page (zstd when the interpreter has it,
+otherwise gzip), appends it to a segment file, and records where it landed in a
+SQLite index keyed by the page stem (the old file name without ".html"). Identical
+pages are stored once and shared by content hash. Readers memory map the segments so
+iterating over a snapshot only touches the bytes it needs.
+
+Parsers should use open_pages() which reads either a store or a directory of loose
+HTML files, so both layouts work everywhere.
+"""
+
+import gzip
+import hashlib
+import mmap
+import sqlite3
+from typing import TYPE_CHECKING, Any, Self
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+    from pathlib import Path
+
+try:
+    from compression import zstd
+except ImportError:  # Python builds without zstd support
+    zstd = None
+
+INDEX = "index.sqlite"
+SEGMENT_SIZE = 256 * 1024 * 1024  # Start a new segment file after this many bytes
+
+ZSTD = "zstd"
+GZIP = "gzip"
+DEFAULT_CODEC = ZSTD if zstd else GZIP
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == ZSTD:
+        return zstd.compress(data)
+    return gzip.compress(data)
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == ZSTD:
+        return zstd.decompress(data)
+    return gzip.decompress(data)
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class PageDir:
+    """Read loose HTML files from a directory with the same interface as a store."""
+
+    def __init__(self, root: Path, suffix: str = ".html") -> None:
+        self.root = root
+        self.suffix = suffix
+        self._stems = sorted(p.stem for p in root.glob(f"*{suffix}"))
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._stems)
+
+    def __contains__(self, stem: str) -> bool:
+        return (self.root / f"{stem}{self.suffix}").exists()
+
+    def close(self) -> None:
+        pass
+
+    def stems(self) -> list[str]:
+        return list(self._stems)
+
+    def path(self, stem: str) -> Path:
+        return self.root / f"{stem}{self.suffix}"
+
+    def digest(self, stem: str) -> str:
+        """Tell when a file changed from its size and mtime without reading it."""
+        stat = self.path(stem).stat()
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    def read(self, stem: str) -> str:
+        with self.path(stem).open() as f:
+            return f.read()
+
+    def pages(
+        self, key: Callable[[str], Any] | None = None
+    ) -> Iterator[tuple[str, str]]:
+        for stem in sorted(self._stems, key=key):
+            yield stem, self.read(stem)
+
+
+class PageStore:
+    def __init__(self, root: Path, *, codec: str = DEFAULT_CODEC) -> None:
+        if codec == ZSTD and not zstd:
+            msg = "This Python was built without zstd support"
+            raise ValueError(msg)
+
+        self.root = root
+        self.codec = codec
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        self.cxn = sqlite3.connect(self.root / INDEX)
+        self.cxn.executescript(
+            """
+            create table if not exists blobs (
+                digest  text primary key,
+                segment integer not null,
+                offset  integer not null,
+                length  integer not null,
+                size    integer not null,
+                codec   text not null
+            );
+            create table if not exists pages (
+                stem   text primary key,
+                digest text not null references blobs (digest)
+            );
+            """
+        )
+        self.cxn.commit()
+
+        self._maps: dict[int, tuple[Any, mmap.mmap]] = {}
+        self._index = self._load_index()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, stem: str) -> bool:
+        return stem in self._index
+
+    @staticmethod
+    def is_store(root: Path) -> bool:
+        return (root / INDEX).exists()
+
+    def close(self) -> None:
+        self._unmap()
+        self.cxn.commit()
+        self.cxn.close()
+
+    def _load_index(self) -> dict[str, tuple[str, int, int, int, str]]:
+        rows = self.cxn.execute(
+            """
+            select stem, pages.digest, segment, offset, length, codec
+              from pages join blobs using (digest)
+            """
+        )
+        return {r[0]: r[1:] for r in rows}
+
+    def segment_path(self, segment: int) -> Path:
+        return self.root / f"segment_{segment:05d}.pack"
+
+    def stems(self) -> list[str]:
+        return sorted(self._index)
+
+    def digest(self, stem: str) -> str:
+        return self._index[stem][0]
+
+    def put(self, stem: str, html: str) -> bool:
+        """Add a page to the store. Return True if its content was not stored yet."""
+        data = html.encode("utf-8")
+        digest = content_hash(data)
+
+        row = self.cxn.execute(
+            "select segment, offset, length, codec from blobs where digest = ?",
+            (digest,),
+        ).fetchone()
+
+        new = row is None
+        if new:
+            row = self._append(data)
+            self.cxn.execute(
+                """
+                insert into blobs (digest, segment, offset, length, size, codec)
+                values (?, ?, ?, ?, ?, ?)
+                """,
+                (digest, *row[:3], len(data), row[3]),
+            )
+
+        self.cxn.execute(
+            "insert or replace into pages (stem, digest) values (?, ?)", (stem, digest)
+        )
+        self._index[stem] = (digest, *row)
+        return new
+
+    def put_many(self, pages: Iterable[tuple[str, str]]) -> int:
+        added = sum(self.put(stem, html) for stem, html in pages)
+        self.cxn.commit()
+        return added
+
+    def _append(self, data: bytes) -> tuple[int, int, int, str]:
+        packed = compress(data, self.codec)
+
+        (segment,) = self.cxn.execute("select max(segment) from blobs").fetchone()
+        segment = segment or 0
+        path = self.segment_path(segment)
+        if path.exists() and path.stat().st_size + len(packed) > SEGMENT_SIZE:
+            segment += 1
+            path = self.segment_path(segment)
+
+        with path.open("ab") as f:
+            offset = f.tell()
+            f.write(packed)
+
+        self._unmap(segment)  # The old map does not cover the new bytes
+        return segment, offset, len(packed), self.codec
+
+    def _map(self, segment: int) -> mmap.mmap:
+        if segment not in self._maps:
+            f = self.segment_path(segment).open("rb")
+            self._maps[segment] = (f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        return self._maps[segment][1]
+
+    def _unmap(self, segment: int | None = None) -> None:
+        segments = list(self._maps) if segment is None else [segment]
+        for seg in segments:
+            if seg in self._maps:
+                f, mapped = self._maps.pop(seg)
+                mapped.close()
+                f.close()
+
+    def read(self, stem: str) -> str:
+        _, segment, offset, length, codec = self._index[stem]
+        mapped = self._map(segment)
+        return decompress(mapped[offset : offset + length], codec).decode("utf-8")
+
+    def pages(
+        self, key: Callable[[str], Any] | None = None
+    ) -> Iterator[tuple[str, str]]:
+        for stem in sorted(self._index, key=key):
+            yield stem, self.read(stem)
+
+    def stats(self) -> dict[str, int]:
+        pages, blobs, stored, size = self.cxn.execute(
+            """
+            select (select count(*) from pages), count(*), sum(length), sum(size)
+              from blobs
+            """
+        ).fetchone()
+        return {
+            "pages": pages,
+            "unique": blobs,
+            "stored_bytes": stored or 0,
+            "html_bytes": size or 0,
+        }
+
+
+def open_pages(source: Path) -> PageStore | PageDir:
+    """Read pages from a page store or from a directory of loose HTML files."""
+    if PageStore.is_store(source):
+        return PageStore(source)
+    return PageDir(source)
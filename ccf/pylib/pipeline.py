@@ -1,20 +1,43 @@
+import hashlib
+import logging
+import shutil
+import tempfile
+import time
+from importlib import metadata
+from pathlib import Path
 from typing import TYPE_CHECKING
 
-import spacy
-from traiter.pipes import extensions, tokenizer
-
-from ccf.rules.margin import Margin
-from ccf.rules.shape import Shape
-from ccf.rules.surface import Surface
-
 if TYPE_CHECKING:
     from spacy.language import Language
 
+RULES_DIR = Path(__file__).parent.parent / "rules"
+
+FULL = "full"  # The trained English model minus the entity recognizer
+LEAN = "lean"  # A blank English model: no tagger, parser, lemmatizer, or vectors
+PROFILES = (FULL, LEAN)
+
+CACHE_DIR = Path.home() / ".cache" / "ccf" / "pipelines"  # Built pipelines go here
+
+
+def build(profile: str = FULL) -> Language:
+    """
+    Build the trait pipeline.
 
-def build() -> Language:
-    extensions.add_extensions()
+    The rules only match on token text, so the lean profile gives the same traits
+    as the full one while loading much faster and using much less memory.
+    """
+    import spacy  # noqa: PLC0415
+    from traiter.pipes import tokenizer  # noqa: PLC0415
 
-    nlp = spacy.load("en_core_web_md", exclude=["ner"])
+    # Importing the rules registers the trait extensions
+    from ccf.rules.margin import Margin  # noqa: PLC0415
+    from ccf.rules.shape import Shape  # noqa: PLC0415
+    from ccf.rules.surface import Surface  # noqa: PLC0415
+
+    if profile == LEAN:
+        nlp = spacy.blank("en")
+    else:
+        nlp = spacy.load("en_core_web_md", exclude=["ner"])
 
     tokenizer.setup_tokenizer(nlp)
 
@@ -23,3 +46,71 @@ def build() -> Language:
     Surface.pipe(nlp)
 
     return nlp
+
+
+def fingerprint(profile: str = FULL) -> str:
+    """Hash everything that changes what the pipeline finds in a text."""
+    digest = hashlib.sha256(f"profile={profile}\n".encode())
+
+    for package in ("spacy", "traiter", "en_core_web_md"):
+        try:
+            version = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            version = ""
+        digest.update(f"{package}={version}\n".encode())
+
+    paths = [
+        Path(__file__),
+        Path(__file__).parent / "dimension.py",  # Cached traits hold these
+        *RULES_DIR.glob("**/*.py"),
+        *RULES_DIR.glob("**/*.csv"),
+    ]
+    for path in sorted(paths):
+        digest.update(path.relative_to(RULES_DIR.parent).as_posix().encode())
+        digest.update(path.read_bytes())
+
+    return digest.hexdigest()
+
+
+def load(profile: str = FULL, cache_dir: Path | None = CACHE_DIR) -> Language:
+    """
+    Load the built pipeline from the cache, building and saving it if it is stale.
+
+    Cached pipelines are kept in a directory named for their fingerprint, so any
+    change to a term file or a rule module builds a new one.
+    """
+    import spacy  # noqa: PLC0415
+
+    from ccf.rules import margin, shape, surface  # noqa: F401, PLC0415 Register factories
+
+    if not cache_dir:
+        return build(profile)
+
+    path = cache_dir / fingerprint(profile)
+    began = time.perf_counter()
+
+    if path.exists():
+        try:
+            nlp = spacy.load(path)
+        except (OSError, ValueError) as err:
+            logging.warning(f"Rebuilding the pipeline in {path}: {err}")
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            elapsed = time.perf_counter() - began
+            logging.info(f"Pipeline loaded from cache (warm) in {elapsed:.2f}s")
+            return nlp
+
+    nlp = build(profile)
+    elapsed = time.perf_counter() - began
+    logging.info(f"Pipeline built (cold) in {elapsed:.2f}s")
+
+    # Save into a temporary directory first so no one loads a half written pipeline
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    temp = Path(tempfile.mkdtemp(dir=cache_dir, prefix=".building-"))
+    try:
+        nlp.to_disk(temp)
+        temp.rename(path)
+    except OSError:  # Another process saved it first
+        shutil.rmtree(temp, ignore_errors=True)
+
+    return nlp
@@ -0,0 +1,124 @@
+"""
+Write records to disk in batches as they are parsed.
+
+Records are buffered and every batch is written to its own Parquet part file, so
+memory stays flat and a run that dies late still leaves its parts behind. Records
+do not all have the same keys (a new state or province column can show up on any
+page), so each part has only the columns it saw. Finalizing merges the parts one at
+a time into a single Parquet and/or CSV file with the union of the columns, in an
+order chosen at that point.
+
+Every value is stored as a string or null.
+"""
+
+import csv
+import shutil
+from typing import TYPE_CHECKING, Self
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+BATCH_SIZE = 1_000  # Records in a part file
+PLACEHOLDER = "__rows__"  # Holds the rows of a part whose records are all empty
+
+
+class RecordWriter:
+    def __init__(self, parts_dir: Path, *, batch_size: int = BATCH_SIZE) -> None:
+        self.parts_dir = parts_dir
+        self.batch_size = batch_size
+        self.batch: list[dict] = []
+        self.columns: dict[str, None] = {}  # Dicts preserve order sets do not
+        self.parts: list[Path] = []
+        self.count = 0
+
+        shutil.rmtree(parts_dir, ignore_errors=True)  # Parts from an older run
+        parts_dir.mkdir(parents=True)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.flush()
+
+    def write(self, record: dict) -> None:
+        self.batch.append(record)
+        self.columns |= dict.fromkeys(record)
+        self.count += 1
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.batch:
+            return
+
+        # A batch of empty records still needs a column to hold its rows, it is
+        # dropped when the parts are merged
+        columns = dict.fromkeys(k for r in self.batch for k in r) or [PLACEHOLDER]
+        table = pa.table(
+            {
+                c: pa.array([as_str(r.get(c)) for r in self.batch], type=pa.string())
+                for c in columns
+            }
+        )
+
+        path = self.parts_dir / f"part_{len(self.parts):05d}.parquet"
+        pq.write_table(table, path)
+        self.parts.append(path)
+        self.batch = []
+
+    def finalize(
+        self,
+        *,
+        parquet_path: Path | None = None,
+        csv_path: Path | None = None,
+        order: Callable[[list[str]], list[str]] | None = None,
+    ) -> list[str]:
+        """Merge the parts into the output files and delete them."""
+        self.flush()
+
+        columns = list(self.columns)
+        columns = order(columns) if order else columns
+        schema = pa.schema([(c, pa.string()) for c in columns])
+
+        parquet = pq.ParquetWriter(parquet_path, schema) if parquet_path else None
+        csv_file = csv_path.open("w", newline="") if csv_path else None
+        csv_writer = csv.writer(csv_file, lineterminator="\n") if csv_file else None
+
+        try:
+            if csv_writer:
+                csv_writer.writerow(columns)
+
+            for part in self.parts:
+                table = pq.read_table(part)
+                missing = [c for c in columns if c not in table.column_names]
+                for column in missing:
+                    table = table.append_column(
+                        column, pa.nulls(table.num_rows, type=pa.string())
+                    )
+                table = table.select(columns)
+
+                if parquet:
+                    parquet.write_table(table)
+
+                if csv_writer:
+                    rows = zip(*(table[c].to_pylist() for c in columns), strict=True)
+                    csv_writer.writerows(
+                        ["" if v is None else v for v in row] for row in rows
+                    )
+
+        finally:
+            if parquet:
+                parquet.close()
+            if csv_file:
+                csv_file.close()
+
+        shutil.rmtree(self.parts_dir)
+        return columns
+
+
+def as_str(value: object) -> str | None:
+    return value if value is None or isinstance(value, str) else str(value)
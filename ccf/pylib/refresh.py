@@ -0,0 +1,98 @@
+"""
+Build a new snapshot from the previous one, refetching only what changed.
+
+A page is carried forward (hard linked, or copied across file systems) when the
+previous snapshot has a valid copy, the export record it came from has not changed,
+and it is younger than the age limit. Everything else is left for the fetcher. The
+carried rows keep their original fetch time so pages still age out eventually.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from typing import TYPE_CHECKING
+
+from ccf.pylib.manifest import MEMORY, Manifest
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+    from pathlib import Path
+
+    from ccf.pylib.fetcher import Job
+
+DAY = 24 * 60 * 60
+
+
+def record_fingerprint(record: dict) -> str:
+    """Hash an export record so any change to it is noticed."""
+    data = json.dumps(record, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def carry_forward(src: Path, dst: Path) -> None:
+    dst.unlink(missing_ok=True)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def refresh(
+    jobs: Iterable[Job],
+    previous_dir: Path,
+    manifest: Manifest,
+    *,
+    max_age_days: float | None = None,
+    previous_fingerprints: dict[str, str] | None = None,
+    validate: Callable[[str], bool] | None = None,
+) -> list[Job]:
+    """Carry unchanged pages forward and return the jobs that still need fetching."""
+    previous_fingerprints = previous_fingerprints or {}
+    max_age = max_age_days * DAY if max_age_days else None
+    now = time.time()
+
+    fetch, carried, current = [], 0, 0
+
+    # The previous snapshot is only read. Without a manifest its pages are checked
+    # in a scratch one held in memory.
+    previous_db = previous_dir / "manifest.sqlite"
+    if previous_db.exists():
+        previous = Manifest(previous_db, readonly=True)
+    else:
+        previous = Manifest(MEMORY)
+
+    with previous:
+        for job in jobs:
+            if manifest.is_done(job.url, job.path, validate):
+                current += 1
+                continue
+
+            old_path = previous_dir / job.path.name
+            if not previous.is_done(job.url, old_path, validate):
+                fetch.append(job)
+                continue
+
+            row = previous.get(job.url)
+
+            old_fingerprint = row.get("fingerprint")  # Old manifests lack it
+            old_fingerprint = old_fingerprint or previous_fingerprints.get(job.url)
+            if job.fingerprint and job.fingerprint != old_fingerprint:
+                fetch.append(job)
+                continue
+
+            if max_age and now - row["fetched"] > max_age:
+                fetch.append(job)
+                continue
+
+            carry_forward(old_path, job.path)
+            manifest.put(row | {"path": str(job.path), "fingerprint": job.fingerprint})
+            carried += 1
+
+    logging.info(
+        f"Refresh: {current} pages are current, {carried} carried forward, "
+        f"{len(fetch)} to fetch"
+    )
+    return fetch
@@ -0,0 +1,101 @@
+"""
+Pack several short species descriptions into one language model request.
+
+Every request pays for the prompt template, the instructions, and an HTTP round
+trip no matter how short the description is. Packing sends a JSON list of
+descriptions, each with an id, and asks for a JSON list of traits back with one
+object per id. The answer is unpacked into one dict of trait fields per description
+along with the ids the model skipped, so the caller can ask again.
+
+Packs are filled in example order until the next description would push the
+estimated prompt plus answer past the context window. A description is measured as
+it is rendered, with its family, taxon, id, and JSON punctuation. Token counts are
+estimated at about four characters a token, which is close enough to leave a safety
+margin.
+"""
+
+import json
+import re
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+CONTEXT_TOKENS = 8_192  # The model's context window
+OVERHEAD_TOKENS = 800  # The instructions, field descriptions, and template
+ANSWER_TOKENS = 250  # The answer for one description
+MAX_PACK = 8  # Descriptions in a pack no matter how short they are
+CHARS_PER_TOKEN = 4
+
+FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def pack(
+    items: Iterable[Any],
+    describe: Callable[[Any], dict[str, str]],
+    *,
+    context_tokens: int = CONTEXT_TOKENS,
+    overhead_tokens: int = OVERHEAD_TOKENS,
+    answer_tokens: int = ANSWER_TOKENS,
+    max_pack: int = MAX_PACK,
+) -> list[list[Any]]:
+    """Group items in order so each group fits in the context window."""
+    packs, current, used = [], [], overhead_tokens
+
+    for item in items:
+        tokens = estimate_tokens(render([describe(item)])) + answer_tokens
+        if current and (used + tokens > context_tokens or len(current) >= max_pack):
+            packs.append(current)
+            current, used = [], overhead_tokens
+        current.append(item)  # An item that is too big on its own gets its own pack
+        used += tokens
+
+    if current:
+        packs.append(current)
+
+    return packs
+
+
+def render(descriptions: list[dict[str, str]]) -> str:
+    """Write the numbered descriptions as the JSON the model reads."""
+    return json.dumps(
+        [{"id": i} | d for i, d in enumerate(descriptions, 1)],
+        ensure_ascii=False,
+        indent=1,
+    )
+
+
+def unpack(
+    answer: str, count: int, fields: list[str]
+) -> tuple[list[dict[str, str]], list[int]]:
+    """Get the fields for each description by id and the ids that were skipped."""
+    results = [dict.fromkeys(fields, "") for _ in range(count)]
+    found = set()
+
+    try:
+        slots = json.loads(FENCE_RE.sub("", answer.strip()))
+    except json.JSONDecodeError:
+        return results, list(range(1, count + 1))
+
+    if isinstance(slots, dict):  # Some models wrap the list in an object
+        slots = next((v for v in slots.values() if isinstance(v, list)), [])
+
+    for position, slot in enumerate(slots if isinstance(slots, list) else []):
+        if not isinstance(slot, dict):
+            continue
+        try:
+            index = int(slot.get("id", position + 1))
+        except TypeError, ValueError:
+            continue
+        if not 1 <= index <= count:
+            continue
+        found.add(index)
+        results[index - 1] |= {
+            f: "" if slot.get(f) is None else str(slot[f]) for f in fields if f in slot
+        }
+
+    return results, [i for i in range(1, count + 1) if i not in found]
@@ -0,0 +1,170 @@
+"""
+Fill the language model trait fields with the rule parsers.
+
+The fields are the ones in trait_fields.TRAIT_FIELDS and each value is the text the
+trait was found in, like "2-10 cm", because that is what the models are asked for.
+Treatment sections are routed to the fillers with the same keys as
+fna_parse_treatment.PARSE.
+
+A field is unsure when the rules could not find a trait for the right plant part
+and fell back on the first size in the section. Callers can leave unsure and empty
+fields for a language model.
+"""
+
+import re
+from typing import TYPE_CHECKING
+
+from ccf.pylib import fna_parse_treatment as parser
+from ccf.pylib.trait_fields import TRAIT_FIELDS
+
+if TYPE_CHECKING:
+    from ccf.pylib.doc_cache import Ent
+    from ccf.rules.size import Size
+
+
+def rule_traits(
+    sections: dict[str, str], info: dict[str, str]
+) -> tuple[dict[str, str], set[str]]:
+    """Get the trait fields the rules can fill and the ones they are unsure of."""
+    traits = dict.fromkeys(TRAIT_FIELDS, "")
+    unsure = set()
+
+    used = set()
+    for key, text in sections.items():
+        funcs = parser.PARSE.get(key)
+        fill = FILL.get(funcs[0]) if funcs else None
+        if fill and fill not in used:
+            used.add(fill)  # Only use a fill function once
+            unsure |= fill(key, text, traits)
+
+    phenology(info, traits)
+    habitat(info, traits)
+    elevation(info, traits)
+
+    return traits, {u for u in unsure if traits[u]}
+
+
+def rule_texts(sections: dict[str, str], info: dict[str, str]) -> list[str]:
+    """Get the texts rule_traits() will run through spaCy so they can be primed."""
+    texts = []
+    for key, text in sections.items():
+        funcs = parser.PARSE.get(key)
+        if funcs and funcs[0] in FILL:
+            texts.append(text)
+    texts.append(info.get("Elevation", ""))
+    return texts
+
+
+def get_size_trait(ents: list[Ent], label: str, part: str) -> tuple[Size, bool]:
+    """Get the size for the part and if it really was for that part."""
+    from ccf.rules.size import Size  # noqa: PLC0415 Spacy is loaded by now
+
+    ent = next(
+        (e.trait for e in ents if e.label == label and e.trait.part == part),
+        None,
+    )
+    if ent:
+        return ent, True
+    ent = next((e.trait for e in ents if e.label == "size"), Size())
+    return ent, not label
+
+
+def get_size_dim(size: Size, text: str, dim: str) -> str:
+    dim_ = next((d for d in size.dims if d.dim == dim), None)
+    value = ""
+    if dim_:
+        value = text[dim_.start : dim_.end]
+        value = re.sub(r"[.]$", "", value)
+        value += "" if value.endswith(dim_.units) else f" {dim_.units}"
+    return value
+
+
+def vocab_hits(text: str, ents: list[Ent], trait: str) -> str:
+    start, end = -1, -1
+
+    for ent in ents:
+        if ent.label == trait:
+            start = ent.start if start == -1 else start
+            end = ent.end
+
+        # Don't cross another entity
+        elif ent.label != trait and start != -1:
+            break
+
+    value = text[start:end] if start != -1 else ""
+    return value
+
+
+def plants(_key: str, text: str, traits: dict[str, str]) -> set[str]:
+    ents = parser.get_cache().ents(text)
+    traits["deciduousness"] = vocab_hits(text, ents, "leaf_duration")
+
+    size, _ = get_size_trait(ents, "", "")
+    traits["plant_height"] = get_size_dim(size, text, "length")
+    return set()
+
+
+def leaves(_key: str, text: str, traits: dict[str, str]) -> set[str]:
+    ents = parser.get_cache().ents(text)
+
+    traits["leaf_shape"] = vocab_hits(text, ents, "shape")
+
+    size, sure = get_size_trait(ents, "leaf_size", "leaf")
+
+    traits["leaf_length"] = get_size_dim(size, text, "length")
+    traits["leaf_width"] = get_size_dim(size, text, "width")
+    traits["leaf_thickness"] = get_size_dim(size, text, "thickness")
+    return set() if sure else {"leaf_length", "leaf_width", "leaf_thickness"}
+
+
+def seeds(_key: str, text: str, traits: dict[str, str]) -> set[str]:
+    ents = parser.get_cache().ents(text)
+    size, sure = get_size_trait(ents, "seed_size", "seed")
+
+    traits["seed_length"] = get_size_dim(size, text, "length")
+    traits["seed_width"] = get_size_dim(size, text, "width")
+    return set() if sure else {"seed_length", "seed_width"}
+
+
+def fruits(key: str, text: str, traits: dict[str, str]) -> set[str]:
+    ents = parser.get_cache().ents(text)
+    # A key is only a word or two so look it up instead of running spaCy on it
+    hits = parser.get_vocab()["fruit_type"].match(key)
+    key_type = key[hits[0].start : hits[-1].end] if hits else ""
+    fruit_type = vocab_hits(text, ents, "fruit_type")
+
+    traits["fruit_type"] = key_type
+    traits["fruit_type"] += " " if key_type and fruit_type else ""
+    traits["fruit_type"] += fruit_type
+
+    size, sure = get_size_trait(ents, "fruit_size", "fruit")
+
+    traits["fruit_length"] = get_size_dim(size, text, "length")
+    traits["fruit_width"] = get_size_dim(size, text, "width")
+    return set() if sure else {"fruit_length", "fruit_width"}
+
+
+def phenology(info: dict[str, str], traits: dict[str, str]) -> None:
+    value = info.get("Phenology", "")
+    value = re.sub(r"[.]$", "", value)
+    traits["phenology"] = value
+
+
+def habitat(info: dict[str, str], traits: dict[str, str]) -> None:
+    traits["habitat"] = info.get("Habitat", "")
+
+
+def elevation(info: dict[str, str], traits: dict[str, str]) -> None:
+    text = info.get("Elevation", "")
+    ents = parser.get_cache().ents(text)
+    size, _ = get_size_trait(ents, "", "")
+    traits["elevation"] = get_size_dim(size, text, "length")
+
+
+# The treatment keys in PARSE are routed here by their first parse function
+FILL = {
+    parser.plant_height: plants,
+    parser.leaf_size: leaves,
+    parser.fruit_size: fruits,
+    parser.seed_size: seeds,
+}
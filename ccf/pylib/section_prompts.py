@@ -0,0 +1,70 @@
+"""
+Split a language model request into one smaller request per group of traits.
+
+Sending the whole treatment for every trait wastes prompt tokens on long treatments,
+the leaf fields only need the leaf sections. The trait fields are grouped by the
+part of the plant they describe and each group gets only its own sections, which
+are found with the same keys as fna_parse_treatment.PARSE. Phenology, habitat, and
+elevation come from the treatment info instead of the sections.
+
+A group with no sections is not sent at all, its fields are just empty.
+"""
+
+from typing import TYPE_CHECKING, NamedTuple
+
+from ccf.pylib import fna_parse_treatment as parser
+from ccf.pylib.trait_fields import TRAIT_FIELDS
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+GROUPS = {
+    "plant": ("plant_height", "deciduousness"),
+    "leaf": ("leaf_shape", "leaf_length", "leaf_width", "leaf_thickness"),
+    "fruit": ("fruit_type", "fruit_length", "fruit_width"),
+    "seed": ("seed_length", "seed_width"),
+    "info": ("phenology", "habitat", "elevation"),
+}
+
+INFO_KEYS = ("Phenology", "Habitat", "Elevation")
+
+# The treatment keys in PARSE are grouped by their first parse function
+KEY_GROUPS = {
+    parser.plant_height: "plant",
+    parser.leaf_size: "leaf",
+    parser.fruit_size: "fruit",
+    parser.seed_size: "seed",
+}
+
+
+class SectionPrompt(NamedTuple):
+    group: str
+    fields: tuple[str, ...]
+    text: str  # Only the sections for the group
+
+
+def key_group(key: str) -> str | None:
+    funcs = parser.PARSE.get(key)
+    return KEY_GROUPS.get(funcs[0]) if funcs else None
+
+
+def section_prompts(
+    sections: dict[str, str],
+    info: dict[str, str],
+    fields: Iterable[str] = TRAIT_FIELDS,
+) -> list[SectionPrompt]:
+    """Get a prompt for each group of fields that has text to send."""
+    fields = set(fields)
+
+    texts = {g: [] for g in GROUPS}
+    for key, text in sections.items():
+        if group := key_group(key):
+            texts[group].append(f"{key} {text}")
+    texts["info"] = [f"{k}: {info[k]}" for k in INFO_KEYS if info.get(k)]
+
+    prompts = []
+    for group, group_fields in GROUPS.items():
+        wanted = tuple(f for f in group_fields if f in fields)
+        if wanted and texts[group]:
+            prompts.append(SectionPrompt(group, wanted, "\n".join(texts[group])))
+    return prompts
@@ -0,0 +1,100 @@
+"""
+Convert size dimensions to centimeters and check their ranges in bulk.
+
+Parsing a treatment finds a handful of dimensions (length, width, ...) per trait.
+Instead of converting each min/low/high/max value one at a time, the dimensions for a
+whole batch of records are gathered into one NumPy array, converted with a single
+multiply by their unit factors, and checked for ranges that are out of order, like
+a low value that is bigger than the high value.
+
+Values are rounded with Python's round() and not np.round(), which rounds the binary
+value and can disagree in the last place (0.0025 -> 0.002 instead of 0.003).
+"""
+
+import itertools
+import logging
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from ccf.pylib.dimension import Dimension
+
+FIELDS = ("min", "low", "high", "max")
+DIGITS = 3  # Round centimeters to this many decimal places
+
+# Every pair of present values must be in order (min <= low <= high <= max), not
+# only neighbors, because a missing value would hide a pair like min > high
+RANGE_CHECKS = list(itertools.combinations(range(len(FIELDS)), 2))
+
+
+def values_array(dims: Iterable[Dimension]) -> np.ndarray:
+    """Get an (n, 4) array of the min, low, high, max values, NaN when missing."""
+    rows = [
+        [np.nan if (v := getattr(d, f)) is None else v for f in FIELDS] for d in dims
+    ]
+    return np.array(rows, dtype=np.float64).reshape(-1, len(FIELDS))
+
+
+def factors_array(
+    dims: Iterable[Dimension], factors_cm: dict[str, float]
+) -> np.ndarray:
+    """Get the centimeter factor for each dimension, NaN for unknown units."""
+    return np.array([factors_cm.get(d.units, np.nan) for d in dims], dtype=np.float64)
+
+
+def to_cm(dims: list[Dimension], factors_cm: dict[str, float]) -> np.ndarray:
+    """Convert the values the same way round(value * factor, 3) does."""
+    values = values_array(dims) * factors_array(dims, factors_cm)[:, np.newaxis]
+    rounded = [[round(v, DIGITS) for v in row] for row in values.tolist()]
+    return np.array(rounded, dtype=np.float64).reshape(-1, len(FIELDS))
+
+
+def range_errors(values: np.ndarray) -> np.ndarray:
+    """Flag the rows where any two present values are out of order."""
+    errors = np.zeros(values.shape[0], dtype=bool)
+    for lo, hi in RANGE_CHECKS:
+        errors |= values[:, lo] > values[:, hi]  # NaN comparisons are false
+    return errors
+
+
+class SizeBatch:
+    """Collect the dimensions of many records and fill in their *_cm fields at once."""
+
+    def __init__(self) -> None:
+        self.items: list[tuple[dict, str, Dimension]] = []
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def add(self, record: dict, prefix: str, dim: Dimension) -> None:
+        # Add the fields now so the record keeps its field order
+        record |= {f"{prefix}_{f}_cm": None for f in FIELDS}
+        self.items.append((record, prefix, dim))
+
+    def finish(self, factors_cm: dict[str, float]) -> int:
+        """Convert everything collected, flag bad ranges, and empty the batch."""
+        if not self.items:
+            return 0
+
+        values = to_cm([d for *_, d in self.items], factors_cm)
+        errors = range_errors(values)
+
+        for (record, prefix, _), row, error in zip(
+            self.items, values.tolist(), errors.tolist(), strict=True
+        ):
+            for field, value in zip(FIELDS, row, strict=True):
+                record[f"{prefix}_{field}_cm"] = None if np.isnan(value) else value
+            if error:
+                record["range_errors"] = ", ".join(
+                    filter(None, [record.get("range_errors"), prefix])
+                )
+
+        count = int(errors.sum())
+        if count:
+            logging.info(f"{count} of {len(self.items)} sizes have out of order ranges")
+
+        self.items = []
+        return count
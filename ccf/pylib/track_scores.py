@@ -1,10 +1,15 @@
 from dataclasses import dataclass, field, make_dataclass
+from typing import TYPE_CHECKING
 
-import dspy
 import Levenshtein
+import numpy as np
 from rich import print as rprint
 
-from ccf.pylib.trait_extractor import TRAIT_FIELDS
+from ccf.pylib.batch_scores import ScoreTable
+from ccf.pylib.trait_fields import TRAIT_FIELDS
+
+if TYPE_CHECKING:
+    import dspy
 
 Traits = make_dataclass(
     "Traits",
@@ -61,11 +66,36 @@ class TrackScores:
         rprint(f"[blue]Score = {(self.total_score * 100.0):6.2f}")
 
     @staticmethod
-    def summarize_scores(scores: list) -> None:
+    def summarize_scores(scores: list, cache_stats: dict | None = None) -> None:
+        table = ScoreTable(
+            fields=TRAIT_FIELDS,
+            taxa=[s.taxon for s in scores],
+            scores=np.array(
+                [[getattr(s.scores, f) for f in TRAIT_FIELDS] for s in scores],
+                dtype=np.float64,
+            ).reshape(-1, len(TRAIT_FIELDS)),
+        )
+        TrackScores.summarize_table(table, cache_stats)
+
+    @staticmethod
+    def summarize_table(table: ScoreTable, cache_stats: dict | None = None) -> None:
         rprint("\n[blue]Score summary:\n")
-        count = float(len(scores))
-        for fld in TRAIT_FIELDS:
-            score: float = sum(getattr(s.scores, fld) for s in scores)
-            rprint(f"[blue]{fld + ':':<16} {score / count * 100.0:6.2f}")
-        total_score = sum(s.total_score for s in scores) / count * 100.0
+        summary = table.summary()
+        for fld in table.fields:
+            rprint(f"[blue]{fld + ':':<16} {summary[fld]['mean'] * 100.0:6.2f}")
+        total_score = summary["total"]["mean"] * 100.0
         rprint(f"\n[blue]{'Total Score:':<16} {total_score:6.2f}\n")
+
+        if cache_stats:
+            TrackScores.summarize_cache(cache_stats)
+
+    @staticmethod
+    def summarize_cache(stats: dict) -> None:
+        rprint("[blue]Cache summary:\n")
+        rprint(f"[blue]{'Hits:':<16} {stats['hits']}")
+        rprint(f"[blue]{'Misses:':<16} {stats['misses']}")
+        rprint(f"[blue]{'Hit rate:':<16} {stats['hit_rate'] * 100.0:6.2f}")
+        rprint(f"[blue]{'Time saved:':<16} {stats['saved_secs']:.1f}s")
+        rprint(f"[blue]{'Answers:':<16} {stats['entries']}")
+        rprint(f"[blue]{'Size:':<16} {stats['bytes'] / 1024**2:.1f} MB")
+        rprint(f"[blue]{'Evicted:':<16} {stats['evicted']}\n")
@@ -0,0 +1,175 @@
+"""
+Ask a language model for trait fields, answering from the cache when it can.
+
+A question is the model, the server, the DSPy signature, the prompt, and the input
+fields, which is also what the cache is keyed on. There are three kinds of questions:
+all of the trait fields for a description, only some of them (a signature with the
+other outputs deleted), and all of them for a pack of descriptions at once.
+
+A packed answer that does not parse raises PackError before it is cached so the
+runner retries it instead of the cache remembering it. When a packed answer only
+skips some descriptions its other slots are kept and the skipped descriptions are
+asked about one at a time. Every answer is also kept in `answers` so a run can save
+them for warming another cache.
+
+An answer comes with the latency and tokens it cost. A cached answer reports what it
+cost when the model first gave it, so only its `cached` flag tells them apart.
+"""
+
+import time
+from typing import TYPE_CHECKING
+
+import dspy
+
+from ccf.pylib import lm_cache
+from ccf.pylib import request_packer as packer
+from ccf.pylib import trait_extractor as te
+from ccf.pylib.trait_fields import TRAIT_FIELDS
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from ccf.pylib.lm_cache import Answer, LMCache
+
+
+class PackError(ValueError):
+    pass
+
+
+def describe(example: dspy.Example) -> dict[str, str]:
+    """Get the inputs for asking about an example."""
+    return {"family": example.family, "taxon": example.taxon, "text": example.text}
+
+
+def lm_usage(pred: dspy.Prediction) -> tuple[int, int]:
+    """Get the prompt and completion tokens a prediction used."""
+    usage = pred.get_lm_usage() if hasattr(pred, "get_lm_usage") else None
+    usage = (usage or {}).values()
+    prompt = sum(u.get("prompt_tokens") or 0 for u in usage)
+    completion = sum(u.get("completion_tokens") or 0 for u in usage)
+    return prompt, completion
+
+
+class TraitAsker:
+    def __init__(
+        self, *, model: str, api_base: str, cache: LMCache | None = None
+    ) -> None:
+        self.model = model
+        self.api_base = api_base
+        self.cache = cache
+        self.answers: list[dict] = []  # Everything the model answered
+
+    def request(
+        self, signature: type[dspy.Signature], prompt: str, inputs: dict
+    ) -> dict:
+        return {
+            "model": self.model,
+            "api_base": self.api_base,
+            "signature": lm_cache.signature_key(signature),
+            "prompt": prompt,
+            "inputs": inputs,
+        }
+
+    def answer(
+        self,
+        req: dict,
+        signature: type[dspy.Signature],
+        fields: list[str],
+        check: Callable[[dict[str, str]], object] | None = None,
+    ) -> Answer:
+        """Get the answer to a request from the cache or else from the model."""
+        key = lm_cache.cache_key(**req)
+
+        answer = self.cache.lookup(key) if self.cache else None
+
+        if answer is not None and check:
+            try:
+                check(answer.fields)
+            except PackError:
+                answer = None  # Ask again, the cache was warmed with a bad answer
+
+        if answer is None:
+            began = time.perf_counter()
+            pred = dspy.Predict(signature)(**req["inputs"], prompt=req["prompt"])
+            latency = time.perf_counter() - began
+            answer = lm_cache.Answer(
+                {f: getattr(pred, f) for f in fields}, latency, *lm_usage(pred)
+            )
+
+            if check:
+                check(answer.fields)  # Raises before a bad answer is cached
+
+            if self.cache:
+                self.cache.put(
+                    key,
+                    answer.fields,
+                    model=self.model,
+                    latency=answer.latency,
+                    prompt_tokens=answer.prompt_tokens,
+                    completion_tokens=answer.completion_tokens,
+                )
+
+        self.answers.append(
+            req
+            | answer.fields
+            | {
+                "latency": answer.latency,
+                "prompt_tokens": answer.prompt_tokens,
+                "completion_tokens": answer.completion_tokens,
+            }
+        )
+        return answer
+
+    def ask_usage(
+        self, example: dspy.Example, fields: tuple[str, ...], text: str | None = None
+    ) -> Answer:
+        """Ask the model for some of the trait fields with what they cost."""
+        if len(fields) == len(TRAIT_FIELDS):
+            signature, prompt = te.TraitExtractor, te.PROMPT
+        else:
+            signature, prompt = te.sub_signature(fields), te.prompt_for(fields)
+
+        inputs = describe(example) | ({} if text is None else {"text": text})
+        req = self.request(signature, prompt, inputs)
+        return self.answer(req, signature, list(fields))
+
+    def ask(
+        self, example: dspy.Example, fields: tuple[str, ...], text: str | None = None
+    ) -> dict[str, str]:
+        """Ask the model for some of the trait fields."""
+        return self.ask_usage(example, fields, text).fields
+
+    def ask_scoped(
+        self, example: dspy.Example, fields: tuple[str, ...]
+    ) -> dict[str, str]:
+        """Ask for each group of fields with only the sections for that group."""
+        # The section prompts need the rule parsers, so only load them when asked
+        from ccf.pylib.section_prompts import section_prompts  # noqa: PLC0415
+
+        if not (example.sections or example.info):
+            return self.ask(example, fields)
+
+        answer = dict.fromkeys(fields, "")
+        for prompt in section_prompts(example.sections, example.info, fields):
+            answer |= self.ask(example, prompt.fields, prompt.text)
+        return answer
+
+    def ask_pack(self, pack: list[dspy.Example]) -> list[dict[str, str]]:
+        """Ask about several examples in one request."""
+        signature = te.PackedTraitExtractor
+        inputs = {"descriptions": packer.render([describe(e) for e in pack])}
+        req = self.request(signature, te.PROMPT, inputs)
+
+        def check(answer: dict[str, str]) -> None:
+            _, missing = packer.unpack(answer["traits"], len(pack), TRAIT_FIELDS)
+            if len(missing) == len(pack):
+                msg = "The packed answer has nothing for any description"
+                raise PackError(msg)
+
+        answer = self.answer(req, signature, ["traits"], check).fields
+        unpacked, missing = packer.unpack(answer["traits"], len(pack), TRAIT_FIELDS)
+
+        for i in missing:  # Ask about each skipped description on its own
+            unpacked[i - 1] = self.ask(pack[i - 1], tuple(TRAIT_FIELDS))
+
+        return unpacked
@@ -1,10 +1,17 @@
+import functools
 import json
 import random
-from pathlib import Path
+from typing import TYPE_CHECKING
 
 import dspy
 import Levenshtein
 
+from ccf.pylib.trait_fields import INPUT_FIELDS, TRAIT_FIELDS
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+
 PROMPT = """
     What is the plant size,
     leaf shape, leaf length, leaf width, leaf thickness,
@@ -41,18 +48,50 @@ class TraitExtractor(dspy.Signature):
     elevation: str = dspy.OutputField(default="", desc="The elevation")
 
 
-TRAIT_FIELDS = [
-    t for t in vars(TraitExtractor()) if t not in ("family", "taxon", "text", "prompt")
-]
+class PackedTraitExtractor(dspy.Signature):
+    """Analyze several species descriptions and extract trait information for each."""
+
+    descriptions: str = dspy.InputField(
+        desc="A JSON list of species descriptions, each with an id, family, taxon, "
+        "and text"
+    )
+    prompt: str = dspy.InputField(default="", desc="Extract these traits")
+
+    traits: str = dspy.OutputField(
+        default="",
+        desc="A JSON list with one object for each description with its id and "
+        f"these keys: {', '.join(TRAIT_FIELDS)}",
+    )
+
+
+def prompt_for(fields: Iterable[str]) -> str:
+    """Ask for only some of the traits."""
+    traits = ", ".join(f.replace("_", " ") for f in fields)
+    return f"What is the {traits}? If it is not mentioned return an empty value."
+
+
+@functools.cache
+def sub_signature(fields: tuple[str, ...]) -> type[dspy.Signature]:
+    """Make a TraitExtractor that only has these output fields."""
+    signature = TraitExtractor
+    for fld in TRAIT_FIELDS:
+        if fld not in fields:
+            signature = signature.delete(fld)
+    return signature
 
 
 def dict2example(dct: dict[str, str]) -> dspy.Example:
     example = dspy.Example(
         family=dct["family"], taxon=dct["taxon"], text=dct["text"], prompt=PROMPT
-    ).with_inputs("family", "taxon", "text", "prompt")
+    ).with_inputs(*INPUT_FIELDS)
 
     for fld in TRAIT_FIELDS:
         setattr(example, fld, dct[fld])
+
+    # Older training data does not have these so the rules cannot be run again
+    example.sections = dct.get("sections", {})
+    example.info = dct.get("info", {})
+
     return example
 
 
@@ -0,0 +1,25 @@
+"""
+The trait fields the language models extract.
+
+These must match the output fields of trait_extractor.TraitExtractor. They live on
+their own so scoring and data prep code can use them without importing DSPy.
+"""
+
+INPUT_FIELDS = ["family", "taxon", "text", "prompt"]
+
+TRAIT_FIELDS = [
+    "plant_height",
+    "leaf_shape",
+    "leaf_length",
+    "leaf_width",
+    "leaf_thickness",
+    "fruit_type",
+    "fruit_length",
+    "fruit_width",
+    "seed_length",
+    "seed_width",
+    "deciduousness",
+    "phenology",
+    "habitat",
+    "elevation",
+]
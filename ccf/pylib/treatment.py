@@ -0,0 +1,141 @@
+"""
+Extract the treatment statement from an FNA page.
+
+A treatment is a span.statement element with bold keys ("Leaves", "Seeds", ...)
+each followed by the text for that key. We walk the statement element once with
+lxml and pair every key with the text after it. Italic and other inline markup is
+folded into the text. Herbaceous treatments often start with "Perennials;" instead
+of a bold key, so those habit words also become keys.
+
+The section texts are joined into one treatment text ("Key text Key text ...") and
+every section records where its text is in it.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+import lxml.html
+
+from ccf.pylib import str_util
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+HABIT_RE = re.compile(r"(Perennials|Annuals|Biennials);")
+
+STATEMENT = "//span[contains(concat(' ', normalize-space(@class), ' '), ' statement ')]"
+INFO = "//div[contains(concat(' ', normalize-space(@class), ' '), ' treatment-info ')]"
+
+
+@dataclass(slots=True)
+class Section:
+    key: str
+    text: str
+    start: int  # Where the text starts in the treatment text
+    end: int
+
+
+@dataclass
+class Treatment:
+    text: str = ""
+    sections: list[Section] = field(default_factory=list)
+
+    def as_dict(self) -> dict[str, str]:
+        # A repeated key keeps its last text
+        return {s.key: s.text for s in self.sections if s.key}
+
+
+def parse_html(page: str) -> lxml.html.HtmlElement:
+    return lxml.html.document_fromstring(page)
+
+
+def extract(
+    page: str | lxml.html.HtmlElement,
+    *,
+    clean: Callable[[str], str] = str_util.clean,
+    split_habits: bool = True,
+) -> Treatment:
+    """Get the sections of the treatment statement on the page."""
+    root = parse_html(page) if isinstance(page, str) else page
+
+    statements = root.xpath(STATEMENT)
+    if not statements:
+        return Treatment()
+
+    pairs = []  # Dicts would lose repeated keys
+    key, texts = "", []
+
+    for is_key, piece in pieces(statements[0], split_habits=split_habits):
+        if is_key and piece.strip():
+            pairs.append((key, texts))
+            key, texts = piece, []
+        else:
+            texts.append(piece)
+
+    pairs.append((key, texts))
+
+    treatment = Treatment()
+    parts, offset = [], 0
+
+    for key, texts in pairs:
+        key = clean(key.strip())
+        text = clean("".join(texts).strip())
+        if not key and not text:
+            continue
+
+        if key:
+            parts.append(key)
+            offset += len(key) + 1
+
+        treatment.sections.append(Section(key, text, offset, offset + len(text)))
+        parts.append(text)
+        offset += len(text) + 1
+
+    treatment.text = " ".join(parts)
+    return treatment
+
+
+def pieces(
+    element: lxml.html.HtmlElement, *, split_habits: bool = True
+) -> Iterator[tuple[bool, str]]:
+    """Yield (is_key, text) for the bold keys and the text between them in order."""
+    for is_key, text in _pieces(element):
+        if is_key or not split_habits:
+            yield is_key, text
+            continue
+
+        # re.split alternates between text and the captured habit word
+        for i, part in enumerate(HABIT_RE.split(text)):
+            if part:
+                yield bool(i % 2), part
+
+
+def _pieces(element: lxml.html.HtmlElement) -> Iterator[tuple[bool, str]]:
+    if element.text:
+        yield False, element.text
+
+    for child in element:
+        if not isinstance(child.tag, str):  # Comments and processing instructions
+            pass
+        elif child.tag == "b":
+            yield True, child.text_content()
+        elif child.find(".//b") is not None:
+            yield from _pieces(child)
+        else:
+            yield False, child.text_content()
+
+        if child.tail:
+            yield False, child.tail
+
+
+def extract_info(
+    root: lxml.html.HtmlElement, *, clean: Callable[[str], str] = str_util.clean
+) -> dict[str, str] | None:
+    """Get the "Key: value" lines in the treatment info (phenology, habitat, ...)."""
+    infos = root.xpath(INFO)
+    if not infos:
+        return None
+
+    lines = [clean(x) for i in infos[0].itertext() if (x := i.strip()) and ":" in i]
+    return {ln.split(":")[0].strip(): ln.split(":")[1].strip() for ln in lines}
@@ -0,0 +1,124 @@
+"""
+Find vocabulary terms in text with an Aho-Corasick automaton.
+
+The automaton is built once from the term CSVs and then finds every single-word,
+multi-word, and hyphenated term in one pass over the text, no matter how many terms
+there are. Matching ignores case. A hit must start and end on a word boundary, and
+when hits overlap the leftmost then longest one wins, so "semi-deciduous" is one hit
+and not also "deciduous".
+
+This is for traits that are only a vocabulary lookup, like leaf shape or fruit type,
+where running the spaCy pipeline would be overkill.
+"""
+
+import csv
+from collections import deque
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple, Self
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+TERMS_DIR = Path(__file__).parent.parent / "rules" / "terms"
+
+
+class Hit(NamedTuple):
+    label: str
+    term: str  # The term as written in the CSV
+    start: int
+    end: int
+
+
+class VocabMatcher:
+    def __init__(self, terms: dict[str, str]) -> None:
+        """Build the automaton from {term: label}."""
+        self.goto: list[dict[str, int]] = [{}]
+        self.fail: list[int] = [0]
+        self.out: list[list[tuple[str, str]]] = [[]]
+
+        for term, label in terms.items():
+            self._add(term.lower(), term, label)
+
+        self._link()
+
+    @classmethod
+    def from_csvs(
+        cls,
+        paths: Iterable[Path],
+        *,
+        labels: Iterable[str] | None = None,
+        exclude: Iterable[str] = (),
+    ) -> Self:
+        """Build a matcher from term CSVs with "label" and "pattern" columns."""
+        labels = set(labels) if labels is not None else None
+        exclude = set(exclude)
+        terms = {}
+        for path in paths:
+            with path.open() as f:
+                for row in csv.DictReader(f):
+                    if labels is not None and row["label"] not in labels:
+                        continue
+                    if row["pattern"] in exclude:
+                        continue
+                    terms[row["pattern"]] = row["label"]
+        return cls(terms)
+
+    def _add(self, chars: str, term: str, label: str) -> None:
+        state = 0
+        for char in chars:
+            if char not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+                self.goto[state][char] = len(self.goto) - 1
+            state = self.goto[state][char]
+        self.out[state].append((term, label))
+
+    def _link(self) -> None:
+        """Add the failure links breadth first, so shorter suffixes come first."""
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                if self.fail[child] == child:
+                    self.fail[child] = 0
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def find_all(self, text: str) -> list[Hit]:
+        """Find every term on word boundaries including ones that overlap."""
+        hits = []
+        state = 0
+        for i, char in enumerate(text):
+            char = char.lower()  # Lower case one at a time to keep the offsets
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for term, label in self.out[state]:
+                start = i - len(term) + 1
+                if is_boundary(text, start - 1) and is_boundary(text, i + 1):
+                    hits.append(Hit(label, term, start, i + 1))
+        return hits
+
+    def match(self, text: str) -> list[Hit]:
+        """Find the terms in text order, leftmost and then longest when they overlap."""
+        hits = sorted(self.find_all(text), key=lambda h: (h.start, -h.end))
+        kept, end = [], 0
+        for hit in hits:
+            if hit.start >= end:
+                kept.append(hit)
+                end = hit.end
+        return kept
+
+    def is_term(self, text: str) -> bool:
+        """Check if the whole text is one term."""
+        text = text.strip()
+        return any(h.start == 0 and h.end == len(text) for h in self.find_all(text))
+
+
+def is_boundary(text: str, i: int) -> bool:
+    return i < 0 or i >= len(text) or not (text[i].isalnum() or text[i] == "_")
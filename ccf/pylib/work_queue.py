@@ -0,0 +1,179 @@
+"""
+A persistent work queue for long page harvests.
+
+Items move from pending to in_flight to done, or to failed when a fetch gives up.
+Failed items are retried on an exponential backoff schedule until they run out of
+attempts. The queue lives in a SQLite file so a crashed harvest resumes exactly where
+it stopped: anything left in_flight is put back into pending when the queue reopens.
+"""
+
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Self
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+FAILED = "failed"
+
+MAX_ATTEMPTS = 5  # Give up on an item after this many failed attempts
+BACKOFF = 30.0  # Seconds to wait before the first retry, doubled after each failure
+MAX_BACKOFF = 3600.0  # Never wait longer than this between retries
+
+
+@dataclass
+class WorkItem:
+    key: str
+    url: str
+    path: Path
+    attempts: int = 0
+
+
+class WorkQueue:
+    def __init__(
+        self,
+        db_path: Path,
+        *,
+        max_attempts: int = MAX_ATTEMPTS,
+        backoff: float = BACKOFF,
+        max_backoff: float = MAX_BACKOFF,
+    ) -> None:
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.cxn = sqlite3.connect(db_path)
+        self.cxn.execute(
+            """
+            create table if not exists work (
+                key      text primary key,
+                url      text not null,
+                path     text not null,
+                state    text not null default 'pending',
+                attempts integer not null default 0,
+                next_try real not null default 0.0,
+                error    text,
+                updated  real
+            )
+            """
+        )
+        self.cxn.commit()
+        self.recover()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.cxn.close()
+
+    def recover(self) -> int:
+        """Return anything a crashed run left in flight to the pending state."""
+        cursor = self.cxn.execute(
+            "update work set state = ? where state = ?", (PENDING, IN_FLIGHT)
+        )
+        self.cxn.commit()
+        return cursor.rowcount
+
+    def add(self, items: Iterable[WorkItem]) -> int:
+        """Queue new items, ignoring any that are already in the queue."""
+        before = self.cxn.total_changes
+        self.cxn.executemany(
+            "insert or ignore into work (key, url, path) values (?, ?, ?)",
+            [(i.key, i.url, str(i.path)) for i in items],
+        )
+        self.cxn.commit()
+        return self.cxn.total_changes - before
+
+    def claim(self, limit: int) -> list[WorkItem]:
+        """Move up to limit items that are ready to run into the in_flight state."""
+        now = time.time()
+        rows = self.cxn.execute(
+            """
+            select key, url, path, attempts from work
+             where (state = ? or (state = ? and attempts < ?)) and next_try <= ?
+             order by rowid
+             limit ?
+            """,
+            (PENDING, FAILED, self.max_attempts, now, limit),
+        ).fetchall()
+        self.cxn.executemany(
+            "update work set state = ?, updated = ? where key = ?",
+            [(IN_FLIGHT, now, r[0]) for r in rows],
+        )
+        self.cxn.commit()
+        return [
+            WorkItem(key=r[0], url=r[1], path=Path(r[2]), attempts=r[3]) for r in rows
+        ]
+
+    def done(self, key: str) -> None:
+        self.cxn.execute(
+            "update work set state = ?, error = null, updated = ? where key = ?",
+            (DONE, time.time(), key),
+        )
+        self.cxn.commit()
+
+    def requeue(self, key: str) -> None:
+        """Send a finished item back to pending with a fresh set of attempts."""
+        self.cxn.execute(
+            """
+            update work set state = ?, attempts = 0, next_try = 0.0, updated = ?
+             where key = ? and state = ?
+            """,
+            (PENDING, time.time(), key, DONE),
+        )
+        self.cxn.commit()
+
+    def failed(self, key: str, error: str = "") -> None:
+        """Record a failure and schedule the next attempt."""
+        now = time.time()
+        (attempts,) = self.cxn.execute(
+            "select attempts from work where key = ?", (key,)
+        ).fetchone()
+        attempts += 1
+        self.cxn.execute(
+            """
+            update work
+               set state = ?, attempts = ?, next_try = ?, error = ?, updated = ?
+             where key = ?
+            """,
+            (FAILED, attempts, now + self.delay(attempts), error, now, key),
+        )
+        self.cxn.commit()
+
+    def release(self, keys: Iterable[str], error: str = "") -> int:
+        """Fail any of these items that are still in flight, returning how many."""
+        keys = list(keys)
+        marks = ", ".join("?" * len(keys))
+        rows = self.cxn.execute(
+            f"select key from work where state = ? and key in ({marks})",
+            (IN_FLIGHT, *keys),
+        ).fetchall()
+        for (key,) in rows:
+            self.failed(key, error)
+        return len(rows)
+
+    def delay(self, attempts: int) -> float:
+        return min(self.backoff * 2.0 ** (attempts - 1), self.max_backoff)
+
+    def next_retry(self) -> float | None:
+        """Return when the next failed item becomes ready, if any remain retryable."""
+        (next_try,) = self.cxn.execute(
+            "select min(next_try) from work where state = ? and attempts < ?",
+            (FAILED, self.max_attempts),
+        ).fetchone()
+        return next_try
+
+    def counts(self) -> dict[str, int]:
+        counts = dict.fromkeys((PENDING, IN_FLIGHT, DONE, FAILED), 0)
+        rows = self.cxn.execute("select state, count(*) from work group by state")
+        counts |= dict(rows.fetchall())
+        return counts
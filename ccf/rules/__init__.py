@@ -0,0 +1,38 @@
+"""
+Register what spaCy needs to run the trait rules when the rules are imported.
+
+Registering on import, and not when the pipeline is built, means spaCy's worker
+processes (nlp.pipe with n_process > 1) have everything as soon as they load the
+rules. spaCy sends each parsed doc back from a worker with Doc.to_bytes(), which uses
+msgpack, and msgpack cannot serialize the trait dataclasses the rules put on the
+entities. The encoder here pickles them inside the message and the decoder unpickles
+them in the parent.
+"""
+
+import dataclasses
+import pickle
+from typing import TYPE_CHECKING, Any
+
+import srsly
+from traiter.pipes import extensions
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+TRAIT_KEY = "__ccf_trait__"  # Marks a pickled trait in a serialized doc
+
+extensions.add_extensions()
+
+
+@srsly.msgpack_encoders("ccf_trait")
+def encode_trait(obj: Any, chain: Callable[[Any], Any] | None = None) -> Any:
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return {TRAIT_KEY: pickle.dumps(obj)}
+    return obj if chain is None else chain(obj)
+
+
+@srsly.msgpack_decoders("ccf_trait")
+def decode_trait(obj: Any, chain: Callable[[Any], Any] | None = None) -> Any:
+    if isinstance(obj, dict) and TRAIT_KEY in obj:
+        return pickle.loads(obj[TRAIT_KEY])  # noqa: S301 Our own workers' docs
+    return obj if chain is None else chain(obj)
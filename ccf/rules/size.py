@@ -1,3 +1,4 @@
+import math
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import ClassVar
@@ -11,6 +12,7 @@ from traiter.pylib.pattern_compiler import Compiler
 from traiter.rules import terms as t_terms
 from traiter.rules.base import Base
 
+from ccf.pylib import size_batch
 from ccf.pylib.dimension import Dimension
 
 ALL_CSVS = [
@@ -32,7 +34,7 @@ class Size(Base):
     replace: ClassVar[dict[str, str]] = term_util.look_up_table(ALL_CSVS, "replace")
     # ---------------------
 
-    dims: list[Dimension] = field(default_factory=list)
+    dims: tuple[Dimension, ...] = field(default_factory=tuple)
 
     @classmethod
     def pipe(cls, nlp: Language):
@@ -166,21 +168,15 @@ class Size(Base):
 
                 setattr(dim, key, float(value))
 
-        trait = cls.from_ent(ent, dims=dims)
+        trait = cls.from_ent(ent, dims=tuple(dims))
         return trait
 
     @classmethod
     def convert_units_to_cm(cls, size_trait):
-        for dim in size_trait.dims:
-            for key in ("min", "low", "high", "max"):
-                value = getattr(dim, key)
-                if value is None:
-                    continue
-
-                factor = cls.factors_cm.get(dim.units)
-
-                value = round(value * factor, 3)
-                setattr(dim, key, value)
+        values = size_batch.to_cm(size_trait.dims, cls.factors_cm)
+        for dim, row in zip(size_trait.dims, values.tolist(), strict=True):
+            for key, value in zip(size_batch.FIELDS, row, strict=True):
+                setattr(dim, key, None if math.isnan(value) else value)
         return size_trait
 
     @classmethod
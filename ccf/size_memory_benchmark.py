@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+import argparse
+import logging
+import random
+import textwrap
+import tracemalloc
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from pylib import log
+from pylib.dimension import Dimension
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+@dataclass(eq=False)
+class DictDimension:
+    """Dimension the way it was before it had slots."""
+
+    dim: str = None
+    units: str = None
+    min: float = None
+    low: float = None
+    high: float = None
+    max: float = None
+    start: int = None
+    end: int = None
+
+
+def main(args: argparse.Namespace) -> None:
+    log.started(args=args)
+
+    before = measure(lambda: synthetic(args.sizes, DictDimension, list, args.seed))
+    after = measure(lambda: synthetic(args.sizes, Dimension, tuple, args.seed))
+
+    logging.info(f"Dict dimensions in lists:    {report(before, args.sizes)}")
+    logging.info(f"Slotted dimensions in tuples: {report(after, args.sizes)}")
+    reduction = 1.0 - after / before if before else 0.0
+    logging.info(f"Reduction {reduction:.1%}")
+
+    log.finished()
+
+
+def synthetic(count: int, dim_class: type, container: type, seed: int) -> list:
+    """Make sizes like the ones in FNA treatments: 1 to 3 dimensions each."""
+    rng = random.Random(seed)  # noqa: S311
+    sizes = []
+    for _ in range(count):
+        dims = []
+        for name in ("length", "width", "thickness")[: rng.choice((1, 2, 2, 3))]:
+            low = round(rng.uniform(0.1, 20.0), 1)
+            high = round(low + rng.uniform(0.1, 20.0), 1)
+            dims.append(
+                dim_class(
+                    dim=name,
+                    units=rng.choice(("mm", "cm", "m")),
+                    low=low,
+                    high=high,
+                    max=high * 2 if rng.random() < 0.2 else None,
+                    start=0,
+                    end=rng.randint(5, 30),
+                )
+            )
+        sizes.append(container(dims))
+    return sizes
+
+
+def measure(build: Callable[[], list]) -> int:
+    """Get the memory held by the objects that build() makes."""
+    tracemalloc.start()
+    sizes = build()
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del sizes
+    return current
+
+
+def report(used: int, count: int) -> str:
+    return f"{used:,} bytes ({used / count:.1f} bytes/size)"
+
+
+def parse_args() -> argparse.Namespace:
+    arg_parser = argparse.ArgumentParser(
+        allow_abbrev=True,
+        description=textwrap.dedent(
+            """
+            Compare the memory used by size dimensions with and without slots on a
+            large synthetic set of sizes.
+            """
+        ),
+    )
+
+    arg_parser.add_argument(
+        "--sizes",
+        type=int,
+        default=500_000,
+        metavar="INT",
+        help="""Make this many sizes. (default: %(default)s)""",
+    )
+
+    arg_parser.add_argument(
+        "--seed",
+        type=int,
+        default=992,
+        metavar="INT",
+        help="""Random number seed. (default: %(default)s)""",
+    )
+
+    args = arg_parser.parse_args()
+
+    return args
+
+
+if __name__ == "__main__":
+    ARGS = parse_args()
+    main(ARGS)
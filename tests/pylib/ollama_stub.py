@@ -0,0 +1,121 @@
+"""A stand-in for an Ollama server that answers /api/chat like ollama_chat models."""
+
+import contextlib
+import json
+import threading
+import time
+import urllib.request
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Self
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+def echo(messages: list[dict]) -> str:
+    """Answer in the DSPy chat format with the last user message."""
+    return f"[[ ## answer ## ]]\n{messages[-1]['content']}\n\n[[ ## completed ## ]]"
+
+
+class OllamaStub:
+    def __init__(
+        self,
+        *,
+        reply: Callable[[list[dict]], str] = echo,
+        delay: Callable[[str], float] = lambda _: 0.0,
+        fail_first: int = 0,  # Failed responses to each new message before it works
+    ) -> None:
+        self.reply = reply
+        self.delay = delay
+        self.fail_first = fail_first
+
+        self.lock = threading.Lock()
+        self.seen: Counter[str] = Counter()
+        self.requests: list[dict] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def api_base(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> Self:
+        self.thread.start()
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handler(self) -> type[BaseHTTPRequestHandler]:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *_: object) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length))
+                status, data = stub.chat(body)
+                payload = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                # The client may have timed out and gone away
+                with contextlib.suppress(BrokenPipeError, ConnectionResetError):
+                    self.wfile.write(payload)
+
+        return Handler
+
+    def chat(self, body: dict) -> tuple[int, dict]:
+        content = body["messages"][-1]["content"]
+
+        with self.lock:
+            self.requests.append(body)
+            self.seen[content] += 1
+            failing = self.seen[content] <= self.fail_first
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        try:
+            time.sleep(self.delay(content))
+            if failing:
+                return 500, {"error": "model is busy"}
+            answer = self.reply(body["messages"])
+            return 200, {
+                "model": body.get("model", ""),
+                "created_at": "2025-01-01T00:00:00Z",
+                "message": {"role": "assistant", "content": answer},
+                "done": True,
+                "done_reason": "stop",
+                "prompt_eval_count": len(content.split()),
+                "eval_count": len(answer.split()),
+            }
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def chat(api_base: str, model: str, content: str, *, timeout: float = 10.0) -> dict:
+    """Post one message the way ollama_chat does and return the response."""
+    data = json.dumps(
+        {
+            "model": model,
+            "messages": [{"role": "user", "content": content}],
+            "stream": False,
+        }
+    ).encode()
+    request = urllib.request.Request(  # noqa: S310
+        f"{api_base}/api/chat",
+        data=data,
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:  # noqa: S310
+        return json.load(response)
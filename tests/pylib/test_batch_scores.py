@@ -0,0 +1,59 @@
+import unittest
+from types import SimpleNamespace
+
+import Levenshtein
+
+from ccf.pylib.batch_scores import score_batch
+
+FIELDS = ["leaf_shape", "seed_length"]
+
+EXAMPLES = [
+    {"taxon": "Aster novae", "leaf_shape": "ovate", "seed_length": "2-3 mm"},
+    {"taxon": "Poa annua", "leaf_shape": "linear", "seed_length": ""},
+    {"taxon": "Rosa blanda", "leaf_shape": "", "seed_length": ""},
+]
+
+PREDICTIONS = [
+    SimpleNamespace(leaf_shape="ovate", seed_length="2 mm"),
+    SimpleNamespace(leaf_shape="lanceolate", seed_length=None),
+    SimpleNamespace(leaf_shape="", seed_length=""),
+]
+
+
+class TestBatchScores(unittest.TestCase):
+    def test_score_batch_01(self) -> None:
+        """It gives the same scores as Levenshtein.ratio."""
+        table = score_batch(EXAMPLES, PREDICTIONS, fields=FIELDS)
+        for i, (example, pred) in enumerate(zip(EXAMPLES, PREDICTIONS, strict=True)):
+            for j, field in enumerate(FIELDS):
+                expect = Levenshtein.ratio(example[field], getattr(pred, field) or "")
+                self.assertAlmostEqual(table.scores[i, j], expect)
+
+    def test_score_batch_02(self) -> None:
+        """It summarizes each field and the totals."""
+        summary = score_batch(EXAMPLES, PREDICTIONS, fields=FIELDS).summary()
+        self.assertAlmostEqual(summary["seed_length"]["exact"], 2 / 3)
+        self.assertAlmostEqual(summary["total"]["exact"], 1 / 3)
+        self.assertEqual(list(summary), [*FIELDS, "total"])
+
+    def test_score_batch_03(self) -> None:
+        """It gives a row for each example."""
+        rows = score_batch(EXAMPLES, PREDICTIONS, fields=FIELDS).records()
+        self.assertEqual(
+            [r["taxon"] for r in rows], ["Aster novae", "Poa annua", "Rosa blanda"]
+        )
+        self.assertEqual(
+            rows[2],
+            {
+                "taxon": "Rosa blanda",
+                "leaf_shape": 1.0,
+                "seed_length": 1.0,
+                "total": 1.0,
+            },
+        )
+
+    def test_score_batch_04(self) -> None:
+        """It handles an empty run."""
+        table = score_batch([], [], fields=FIELDS)
+        self.assertEqual(table.scores.shape, (0, 2))
+        self.assertEqual(table.summary(), {})
@@ -0,0 +1,24 @@
+import pickle
+import unittest
+
+from ccf.pylib.dimension import Dimension
+
+
+class TestDimension(unittest.TestCase):
+    def test_dimension_01(self) -> None:
+        """It compares dimensions by identity."""
+        dim = Dimension(dim="length", units="cm", low=1.0, high=2.0)
+        self.assertEqual(dim, dim)
+        self.assertNotEqual(dim, Dimension(dim="length", units="cm", low=1.0, high=2.0))
+
+    def test_dimension_02(self) -> None:
+        """It does not give each dimension a __dict__."""
+        self.assertFalse(hasattr(Dimension(), "__dict__"))
+
+    def test_dimension_03(self) -> None:
+        """It survives a round trip through the doc cache's pickles."""
+        data = pickle.dumps(Dimension(dim="width", units="mm", low=3.0))
+        dim = pickle.loads(data)  # noqa: S301
+        self.assertEqual(
+            (dim.dim, dim.units, dim.low, dim.high), ("width", "mm", 3.0, None)
+        )
@@ -0,0 +1,128 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any
+
+from ccf.pylib.doc_cache import COMMIT_EVERY, DocCache, Ent
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+
+class FakeNlp:
+    """Tag every word that starts with a capital letter."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.batch_sizes = []
+        self.n_processes = []
+
+    def __call__(self, text: str) -> SimpleNamespace:
+        self.calls += 1
+        ents, start = [], 0
+        for word in text.split():
+            start = text.index(word, start)
+            if word[0].isupper():
+                ents.append(
+                    SimpleNamespace(
+                        label_="cap",
+                        start_char=start,
+                        end_char=start + len(word),
+                        _=SimpleNamespace(trait=word.lower()),
+                    )
+                )
+            start += len(word)
+        return SimpleNamespace(ents=ents)
+
+    def pipe(
+        self, texts: Iterable[Any], *, as_tuples: bool, batch_size: int, n_process: int
+    ) -> Iterator[Any]:
+        self.batch_sizes.append(batch_size)
+        self.n_processes.append(n_process)
+        for item in texts:
+            text, context = item if as_tuples else (item, None)
+            doc = self(text)
+            yield (doc, context) if as_tuples else doc
+
+
+class TestDocCache(unittest.TestCase):
+    def test_ents_01(self) -> None:
+        """It parses a text only once."""
+        nlp = FakeNlp()
+        cache = DocCache(nlp, "v1")
+        first = cache.ents("Leaves Ovate")
+        self.assertEqual(cache.ents("Leaves Ovate "), first)
+        self.assertEqual(
+            first, [Ent("cap", 0, 6, "leaves"), Ent("cap", 7, 12, "ovate")]
+        )
+        self.assertEqual((nlp.calls, cache.hits, cache.misses), (1, 1, 1))
+
+    def test_ents_02(self) -> None:
+        """It does not share entries between pipeline versions."""
+        self.assertNotEqual(
+            DocCache(None, "v1").key("a"), DocCache(None, "v2").key("a")
+        )
+
+    def test_ents_03(self) -> None:
+        """It evicts the least recently used text."""
+        cache = DocCache(FakeNlp(), "v1", max_size=2)
+        cache.ents("A")
+        cache.ents("B")
+        cache.ents("A")
+        cache.ents("C")
+        self.assertEqual(len(cache.cache), 2)
+        self.assertIn(cache.key("A"), cache.cache)
+        self.assertNotIn(cache.key("B"), cache.cache)
+
+    def test_prime_01(self) -> None:
+        """It parses each new text once when priming."""
+        nlp = FakeNlp()
+        cache = DocCache(nlp, "v1")
+        cache.ents("A")
+        cache.prime(["A", "B", "B", "C"], batch_size=2, n_process=3)
+        self.assertEqual(nlp.calls, 3)
+        self.assertEqual((nlp.batch_sizes, nlp.n_processes), ([2], [3]))
+        cache.ents("C")
+        self.assertEqual(nlp.calls, 3)
+
+    def test_prime_02(self) -> None:
+        """It primes more texts than fit in the cache a chunk at a time."""
+        nlp = FakeNlp()
+        cache = DocCache(nlp, "v1", max_size=100)
+        items = [[f"Text {i}"] for i in range(150)]
+        for item in cache.primed(items, lambda i: i):
+            cache.ents(item[0])
+        self.assertEqual(nlp.calls, 150)
+        self.assertEqual((cache.hits, cache.misses), (150, 150))
+        self.assertEqual(len(nlp.batch_sizes), 2)
+
+    def test_spill_01(self) -> None:
+        """It reads evicted entries back from the spill file in a later run."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db = Path(temp_dir) / "docs.sqlite"
+
+            cache = DocCache(FakeNlp(), "v1", max_size=1, spill_db=db)
+            cache.ents("A b")
+            cache.ents("C d")
+            cache.close()
+
+            nlp = FakeNlp()
+            cache = DocCache(nlp, "v1", max_size=1, spill_db=db)
+            self.assertEqual(cache.ents("A b"), [Ent("cap", 0, 1, "a")])
+            self.assertEqual(cache.ents("C d"), [Ent("cap", 0, 1, "c")])
+            self.assertEqual((nlp.calls, cache.spill_hits), (0, 2))
+            cache.close()
+
+    def test_spill_02(self) -> None:
+        """It commits spilled entries before it is closed."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db = Path(temp_dir) / "docs.sqlite"
+            cache = DocCache(FakeNlp(), "v1", max_size=1, spill_db=db)
+            for i in range(COMMIT_EVERY + 1):
+                cache.ents(f"Text {i}")
+            with sqlite3.connect(db) as cxn:
+                (count,) = cxn.execute("select count(*) from ents").fetchone()
+            self.assertEqual(count, COMMIT_EVERY)
+            cache.close()
@@ -0,0 +1,141 @@
+import asyncio
+import time
+import unittest
+from pathlib import Path
+from typing import Any
+
+from ccf.pylib.fetcher import ContextPool, Fetcher, FetchStats, HostLimiter, Job
+
+URL = "http://floranorthamerica.org/Aster_novae"
+HTML = '<span class="statement">Herbs</span>'
+
+
+class FakePage:
+    def __init__(self, context: FakeContext) -> None:
+        self.context = context
+
+    async def goto(self, url: str, wait_until: str) -> None:
+        visits = self.context.browser.visits
+        visits.append((url, wait_until))
+        if len(visits) <= self.context.browser.fail_first:
+            raise TimeoutError(url)
+
+    async def content(self) -> str:
+        return HTML
+
+    async def close(self) -> None:
+        pass
+
+
+class FakeContext:
+    def __init__(self, browser: FakeBrowser, viewport: dict) -> None:
+        self.browser = browser
+        self.viewport = viewport
+        self.closed = False
+
+    async def new_page(self) -> FakePage:
+        return FakePage(self)
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self, *, fail_first: int = 0, contexts: int = 100) -> None:
+        self.fail_first = fail_first  # Page loads that time out
+        self.contexts = contexts  # Contexts it can open before it refuses
+        self.opened: list[FakeContext] = []
+        self.visits: list[tuple[str, str]] = []
+
+    async def new_context(self, viewport: dict) -> FakeContext:
+        if len(self.opened) >= self.contexts:
+            msg = "browser has crashed"
+            raise RuntimeError(msg)
+        self.opened.append(FakeContext(self, viewport))
+        return self.opened[-1]
+
+
+def fetch(browser: FakeBrowser, jobs: list[Job], **kwargs: Any) -> list[Job]:
+    """Fetch the jobs with one context and return the ones that were saved."""
+    saved = []
+
+    async def run() -> None:
+        pool = ContextPool(browser, size=1, pages_per_context=0)
+        await pool.open()
+        fetcher = Fetcher(
+            pool=pool,
+            limiter=HostLimiter(delay=0.0),
+            save=lambda job, _: saved.append(job),
+            **kwargs,
+        )
+        for job in jobs:
+            await fetcher.fetch(job)
+
+    asyncio.run(run())
+    return saved
+
+
+class TestFetcher(unittest.TestCase):
+    def test_fetcher_01(self) -> None:
+        """It replaces a context after it has served its pages."""
+        browser = FakeBrowser()
+
+        async def run() -> ContextPool:
+            pool = ContextPool(browser, size=1, pages_per_context=2)
+            await pool.open()
+            for _ in range(5):
+                async with pool.page():
+                    pass
+            return pool
+
+        pool = asyncio.run(run())
+        self.assertEqual(pool.recycled, 2)
+        self.assertEqual([c.closed for c in browser.opened], [True, True, False])
+        self.assertEqual(pool.slots.qsize(), 1)
+
+    def test_fetcher_02(self) -> None:
+        """It keeps the old context when a new one cannot be opened."""
+        browser = FakeBrowser(contexts=1)
+
+        async def run() -> ContextPool:
+            pool = ContextPool(browser, size=1, pages_per_context=1)
+            await pool.open()
+            for _ in range(3):
+                async with pool.page():
+                    pass
+            return pool
+
+        pool = asyncio.run(run())
+        self.assertEqual(pool.recycled, 0)
+        self.assertEqual(pool.slots.qsize(), 1)
+        self.assertFalse(browser.opened[0].closed)
+
+    def test_fetcher_03(self) -> None:
+        """It retries a page after waiting the given delay."""
+        browser = FakeBrowser(fail_first=1)
+        job = Job(url=URL, path=Path("Aster_novae.html"))
+        began = time.perf_counter()
+        saved = fetch(browser, [job], retries=2, delay=0.05)
+        self.assertGreaterEqual(time.perf_counter() - began, 0.05)
+        self.assertEqual(saved, [job])
+        self.assertEqual(len(browser.visits), 2)
+
+    def test_fetcher_04(self) -> None:
+        """It does not wait after the last attempt fails."""
+        browser = FakeBrowser(fail_first=2)
+        failures = []
+        stats = FetchStats()
+        job = Job(url=URL, path=Path("Aster_novae.html"))
+        began = time.perf_counter()
+        saved = fetch(
+            browser,
+            [job],
+            retries=2,
+            delay=0.2,
+            stats=stats,
+            on_failure=lambda j, e: failures.append((j, type(e))),
+        )
+        self.assertLess(time.perf_counter() - began, 0.4)
+        self.assertEqual(saved, [])
+        self.assertEqual(failures, [(job, TimeoutError)])
+        self.assertEqual((stats.fetched, stats.failed), (0, 1))
@@ -0,0 +1,54 @@
+import unittest
+
+from ccf.pylib import fna_parse_treatment as fpt
+
+TREATMENTS = [
+    (
+        {"taxon": "Aster novae"},
+        {
+            "Perennials": "40-120 cm; rhizomes woody.",
+            "Leaves": "blades ovate to lanceolate, 2-10 x 0.5-2 cm, margins serrate.",
+            "Cypselae": "obovoid, 2-3 mm.",
+        },
+        {"Phenology": "Flowering Aug-Oct.", "Elevation": "0-300 m"},
+    ),
+    (
+        {"taxon": "Aster pilosus"},
+        {
+            "Herbs": "annual, to 1.5 m.",
+            "Leaves": "deciduous; blades linear, 1-8 cm.",
+            "Seeds": "1 mm.",
+        },
+        None,
+    ),
+]
+
+
+def copy_pages() -> list[tuple[dict, dict, dict | None]]:
+    return [(dict(r), dict(t), dict(i) if i else None) for r, t, i in TREATMENTS]
+
+
+class TestParseTreatments(unittest.TestCase):
+    def test_parse_treatments_01(self) -> None:
+        """Batched parsing gives the same records as parsing one page at a time."""
+        expect = []
+        for record, treatment, info in copy_pages():
+            fpt.parse_treatment(record, treatment)
+            if info:
+                fpt.parse_info(info, record)
+            expect.append(record)
+
+        self.assertEqual(fpt.parse_treatments(copy_pages(), batch_size=2), expect)
+
+    def test_parse_treatments_02(self) -> None:
+        """It does not parse text that is already cached."""
+        fpt.parse_treatments(copy_pages())
+        misses = fpt.get_cache().misses
+        fpt.parse_treatments(copy_pages())
+        self.assertEqual(fpt.get_cache().misses, misses)
+
+    def test_parse_treatments_03(self) -> None:
+        """It gives the same records when spaCy runs in worker processes."""
+        expect = fpt.parse_treatments(copy_pages())
+        fpt.get_cache().cache.clear()  # Parse every text again in the workers
+        self.assertEqual(fpt.parse_treatments(copy_pages(), n_process=2), expect)
@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from ccf.pylib.key_census import KeyCensus
+from ccf.pylib.page_store import PageDir
+
+
+def page(*keys: str) -> str:
+    bolds = " ".join(f"<b>{k}</b> {k.lower()} text." for k in keys)
+    return f'<html><body><span class="statement">{bolds}</span></body></html>'
+
+
+class TestKeyCensus(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        self.write("Asteraceae_Aster_novae", page("Leaves", "Cypselae"))
+        self.write("Poaceae_Poa_annua", page("Leaves", "Spikelets"))
+        self.db = self.root / "census.sqlite"
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def write(self, stem: str, html: str) -> None:
+        path = self.root / f"{stem}.html"
+        path.write_text(html)
+        mtime = path.stat().st_mtime_ns + 1_000_000_000
+        os.utime(path, ns=(mtime, mtime))  # Fast rewrites can keep the same mtime
+
+    def test_key_census_01(self) -> None:
+        """It counts the pages with each key."""
+        with KeyCensus(self.db) as census:
+            done = census.update(PageDir(self.root))
+            self.assertEqual(done["added"], 2)
+            self.assertEqual(
+                census.counts(), {"Cypselae": 1, "Leaves": 2, "Spikelets": 1}
+            )
+
+    def test_key_census_02(self) -> None:
+        """It only reads pages that are new or changed."""
+        with KeyCensus(self.db) as census:
+            census.update(PageDir(self.root))
+            self.write("Poaceae_Poa_annua", page("Leaves", "Caryopses"))
+            self.write("Rosaceae_Rosa_blanda", page("Stems"))
+            done = census.update(PageDir(self.root))
+            self.assertEqual(
+                done, {"added": 1, "changed": 1, "removed": 0, "unchanged": 1}
+            )
+            self.assertNotIn("Spikelets", census.counts())
+
+    def test_key_census_03(self) -> None:
+        """It drops pages that are gone."""
+        with KeyCensus(self.db) as census:
+            census.update(PageDir(self.root))
+            (self.root / "Poaceae_Poa_annua.html").unlink()
+            done = census.update(PageDir(self.root))
+            self.assertEqual(done["removed"], 1)
+            self.assertEqual(census.page_count(), 1)
+            self.assertEqual(census.counts(), {"Cypselae": 1, "Leaves": 1})
+
+    def test_key_census_04(self) -> None:
+        """It finds keys that are not known with sample pages."""
+        with KeyCensus(self.db) as census:
+            census.update(PageDir(self.root), workers=2)
+            missing = census.missing(["Leaves", "Cypselae"])
+            self.assertEqual([m.key for m in missing], ["Spikelets"])
+            self.assertEqual(missing[0].stems, ["Poaceae_Poa_annua"])
+            self.assertEqual(missing[0].samples, ["spikelets text."])
+
+    def test_key_census_05(self) -> None:
+        """It keeps the census between runs."""
+        with KeyCensus(self.db) as census:
+            census.update(PageDir(self.root))
+        with KeyCensus(self.db) as census:
+            done = census.update(PageDir(self.root))
+            self.assertEqual(done["unchanged"], 2)
+            self.assertEqual(census.counts()["Leaves"], 2)
@@ -0,0 +1,83 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from ccf.pylib.lm_cache import Answer, LMCache, cache_key
+
+REQUEST = {
+    "model": "ollama_chat/gemma3:27b",
+    "api_base": "http://localhost:11434",
+    "signature": "TraitExtractor\nfamily, taxon, text, prompt -> leaf_shape",
+    "prompt": "What is the leaf shape?",
+    "inputs": {"family": "Asteraceae", "taxon": "Aster novae", "text": "Leaves ovate"},
+}
+
+
+class TestLMCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = Path(self.temp_dir.name) / "lm_cache.sqlite"
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_cache_key_01(self) -> None:
+        """It changes the key when any part of the request changes."""
+        key = cache_key(**REQUEST)
+        for field, value in [
+            ("model", "ollama_chat/llama3"),
+            ("api_base", "http://gpu:11434"),
+            ("signature", "TraitExtractor\nfamily, taxon, text -> leaf_shape"),
+            ("prompt", "What is the leaf size?"),
+            ("inputs", REQUEST["inputs"] | {"text": "Leaves linear"}),
+        ]:
+            with self.subTest(field=field):
+                self.assertNotEqual(cache_key(**(REQUEST | {field: value})), key)
+
+    def test_lm_cache_01(self) -> None:
+        """It counts hits, misses, and the model time the hits saved."""
+        key = cache_key(**REQUEST)
+        with LMCache(self.db) as cache:
+            self.assertIsNone(cache.get(key))
+            cache.put(key, {"leaf_shape": "ovate"}, model="m", latency=2.5)
+            self.assertEqual(cache.get(key), {"leaf_shape": "ovate"})
+            self.assertEqual(cache.get(key), {"leaf_shape": "ovate"})
+            stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 1))
+        self.assertEqual(stats["saved_secs"], 5.0)
+
+    def test_lm_cache_02(self) -> None:
+        """It drops the least recently used answers when it is too big."""
+        with LMCache(self.db, max_bytes=30) as cache:
+            for key in ("a", "b", "c"):
+                cache.put(key, {"leaf_shape": "ovate"}, model="m")
+            cache.get("a")
+            self.assertEqual(cache.evict(), 2)
+            self.assertIsNotNone(cache.get("a"))
+            self.assertIsNone(cache.get("b"))
+            self.assertIsNone(cache.get("c"))
+
+    def test_lm_cache_03(self) -> None:
+        """It is warmed from saved predictions and keeps them between runs."""
+        record = REQUEST | {"leaf_shape": "ovate", "latency": 3.0}
+        with LMCache(self.db) as cache:
+            self.assertEqual(cache.warm([record], ["leaf_shape"]), 1)
+        with LMCache(self.db) as cache:
+            self.assertEqual(cache.get(cache_key(**REQUEST)), {"leaf_shape": "ovate"})
+            self.assertEqual(cache.stats()["saved_secs"], 3.0)
+
+    def test_lm_cache_04(self) -> None:
+        """It gives back the latency and tokens the answer first cost."""
+        with LMCache(self.db) as cache:
+            cache.put(
+                "a",
+                {"leaf_shape": "ovate"},
+                model="m",
+                latency=2.5,
+                prompt_tokens=300,
+                completion_tokens=40,
+            )
+            self.assertEqual(
+                cache.lookup("a"),
+                Answer({"leaf_shape": "ovate"}, 2.5, 300, 40, cached=True),
+            )
@@ -0,0 +1,61 @@
+import unittest
+
+from ccf.pylib.lm_runner import LMRunner
+from tests.pylib.ollama_stub import OllamaStub, chat
+
+MODEL = "gemma3:27b"
+
+
+def client(stub: OllamaStub, *, timeout: float = 10.0):  # noqa: ANN201
+    def predict(text: str) -> str:
+        response = chat(stub.api_base, MODEL, text, timeout=timeout)
+        return response["message"]["content"]
+
+    return predict
+
+
+class TestLMRunner(unittest.TestCase):
+    def test_lm_runner_01(self) -> None:
+        """It returns the results in example order when replies finish out of order."""
+        texts = [f"taxon {i}" for i in range(8)]
+        with OllamaStub(delay=lambda t: 0.05 * (8 - int(t.split()[-1]))) as stub:
+            runner = LMRunner(client(stub), concurrency=4, backoff=0.0)
+            results = list(runner.run(texts))
+        self.assertEqual([r.example for r in results], texts)
+        self.assertTrue(all(r.ok for r in results))
+        self.assertIn("taxon 3", results[3].prediction)
+
+    def test_lm_runner_02(self) -> None:
+        """It never has more requests in flight than its limit."""
+        with OllamaStub(delay=lambda _: 0.05) as stub:
+            runner = LMRunner(client(stub), concurrency=3, backoff=0.0)
+            list(runner.run([f"taxon {i}" for i in range(12)]))
+        self.assertEqual(stub.max_in_flight, 3)
+        self.assertEqual(runner.max_in_flight, 3)
+
+    def test_lm_runner_03(self) -> None:
+        """It retries requests that fail."""
+        with OllamaStub(fail_first=1) as stub:
+            runner = LMRunner(client(stub), concurrency=2, retries=1, backoff=0.0)
+            results = list(runner.run(["taxon 1", "taxon 2"]))
+        self.assertTrue(all(r.ok for r in results))
+        self.assertEqual([r.attempts for r in results], [2, 2])
+        self.assertEqual(len(stub.requests), 4)
+
+    def test_lm_runner_04(self) -> None:
+        """It gives up on a request that keeps timing out."""
+        with OllamaStub(delay=lambda _: 0.5) as stub:
+            runner = LMRunner(
+                client(stub, timeout=0.1), concurrency=1, retries=1, backoff=0.0
+            )
+            (result,) = runner.run(["taxon 1"])
+        self.assertFalse(result.ok)
+        self.assertEqual(result.attempts, 2)
+        self.assertIn("timed out", result.error)
+
+    def test_lm_runner_05(self) -> None:
+        """It splits packed results into one result per example."""
+        runner = LMRunner(lambda pack: [t.upper() for t in pack], backoff=0.0)
+        results = list(runner.unpack(runner.run([["a", "b"], ["c"]])))
+        self.assertEqual([r.index for r in results], [0, 1, 2])
+        self.assertEqual([r.prediction for r in results], ["A", "B", "C"])
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from ccf.pylib.manifest import (
+    ERROR,
+    INVALID,
+    OK,
+    Manifest,
+    fna_page,
+    nature_serve_page,
+    write_atomic,
+)
+
+URL = "http://floranorthamerica.org/Aster_novae"
+
+
+class TestManifest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        self.path = self.root / "Asteraceae_Aster_novae.html"
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_manifest_01(self) -> None:
+        """It writes files without leaving temporary files behind."""
+        write_atomic(self.path, "<html>ä</html>")
+        self.assertEqual(self.path.read_text(encoding="utf-8"), "<html>ä</html>")
+        self.assertEqual([p.name for p in self.root.iterdir()], [self.path.name])
+
+    def test_manifest_02(self) -> None:
+        """It is not done when the file was truncated after it was recorded."""
+        html = '<span class="statement">Herbs</span>'
+        write_atomic(self.path, html)
+        with Manifest(self.root / "manifest.sqlite") as manifest:
+            manifest.record(URL, self.path, html, duration=1.5, attempts=1)
+            self.assertTrue(manifest.is_done(URL, self.path, fna_page))
+            self.path.write_text(html[:10])
+            self.assertFalse(manifest.is_done(URL, self.path, fna_page))
+
+    def test_manifest_03(self) -> None:
+        """It checks pages downloaded before the manifest existed."""
+        write_atomic(self.path, "<html>Service unavailable</html>")
+        with Manifest(self.root / "manifest.sqlite") as manifest:
+            self.assertFalse(manifest.is_done(URL, self.path, fna_page))
+            self.assertEqual(manifest.get(URL)["status"], INVALID)
+            self.assertFalse(manifest.is_done(URL, self.path, fna_page))
+
+    def test_manifest_04(self) -> None:
+        """It counts failures."""
+        with Manifest(self.root / "manifest.sqlite") as manifest:
+            manifest.failed(URL, self.path, attempts=2, error="timeout")
+            self.assertEqual(manifest.counts(), {OK: 0, INVALID: 0, ERROR: 1})
+            self.assertFalse(manifest.is_done(URL, self.path))
+
+    def test_manifest_05(self) -> None:
+        """It recognizes good pages."""
+        self.assertTrue(fna_page('<span id="x" class="statement">'))
+        self.assertFalse(fna_page('<div class="statement-list">'))
+        self.assertTrue(nature_serve_page('<div class="data-section col">'))
+        self.assertFalse(nature_serve_page("<div>Access denied</div>"))
+
+    def test_manifest_06(self) -> None:
+        """It is not done when the content changed but the size did not."""
+        html = '<span class="statement">Herbs</span>'
+        write_atomic(self.path, html)
+        with Manifest(self.root / "manifest.sqlite") as manifest:
+            manifest.record(URL, self.path, html, duration=1.5, attempts=1)
+            stat = self.path.stat()
+            os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+            self.assertTrue(manifest.is_done(URL, self.path))
+            self.path.write_text(html.replace("Herbs", "Trees"))
+            self.assertFalse(manifest.is_done(URL, self.path))
@@ -0,0 +1,50 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from ccf.pylib.page_store import GZIP, PageDir, PageStore, open_pages
+
+
+class TestPageStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_page_store_01(self) -> None:
+        """It reads back what was written."""
+        with PageStore(self.root / "store") as store:
+            store.put("Aster_novae", "<html>ä</html>")
+            self.assertEqual(store.read("Aster_novae"), "<html>ä</html>")
+
+    def test_page_store_02(self) -> None:
+        """It stores identical pages once."""
+        with PageStore(self.root / "store", codec=GZIP) as store:
+            self.assertTrue(store.put("a", "<html>same</html>"))
+            self.assertFalse(store.put("b", "<html>same</html>"))
+            self.assertEqual(store.digest("a"), store.digest("b"))
+            self.assertEqual(store.stats()["unique"], 1)
+
+    def test_page_store_03(self) -> None:
+        """It reopens the index and iterates in stem order."""
+        with PageStore(self.root / "store", codec=GZIP) as store:
+            store.put_many([("b", "two"), ("a", "one")])
+
+        with open_pages(self.root / "store") as pages:
+            self.assertIsInstance(pages, PageStore)
+            self.assertEqual(list(pages.pages()), [("a", "one"), ("b", "two")])
+
+    def test_page_store_04(self) -> None:
+        """It reads loose HTML files with the same interface."""
+        (self.root / "b_c.html").write_text("two")
+        (self.root / "a_d.html").write_text("one")
+
+        with open_pages(self.root) as pages:
+            self.assertIsInstance(pages, PageDir)
+            self.assertEqual(len(pages), 2)
+            self.assertEqual(
+                list(pages.pages(key=lambda s: s.split("_")[1:])),
+                [("b_c", "two"), ("a_d", "one")],
+            )
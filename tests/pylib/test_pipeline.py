@@ -0,0 +1,64 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from ccf.pylib import pipeline
+from ccf.pylib.str_util import clean
+
+FULL = pipeline.build(pipeline.FULL)
+LEAN = pipeline.build(pipeline.LEAN)
+
+CORPUS = [
+    "Leaf blades deltate to ± rhombic or ovate,",
+    "glabrous flowers",
+    "margin shallowly undulate-crenate",
+    "reniform, undulate-margined",
+    "margins thickened-corrugated",
+    "margins coarsely toothed or remotely sinuate-dentate to serrate,",
+    (
+        "Leaves: blades ovate to lanceolate, 2-10 x 0.5-2 cm, margins serrate, "
+        "surfaces glabrous or sparsely pilose."
+    ),
+    "Plants deciduous; stems erect, to 1.5 m. Leaf blades linear, 1-8 cm.",
+    "Achenes obovoid, 2-3 mm, faces glabrous. Seeds brown, 1 mm.",
+    "Elevation 0-300 m",
+]
+
+
+def traits(nlp, text: str) -> list:
+    doc = nlp(clean(" ".join(text.split())))
+    return [(e.label_, e.start_char, e.end_char, e._.trait) for e in doc.ents]
+
+
+class TestPipeline(unittest.TestCase):
+    def test_lean_01(self) -> None:
+        """The lean profile finds the same traits as the full one."""
+        for text in CORPUS:
+            with self.subTest(text=text):
+                self.assertEqual(traits(LEAN, text), traits(FULL, text))
+
+    def test_lean_02(self) -> None:
+        """The lean profile does not load the trained components."""
+        self.assertNotIn("tagger", LEAN.pipe_names)
+        self.assertNotIn("parser", LEAN.pipe_names)
+        self.assertEqual(LEAN.vocab.vectors.shape[0], 0)
+
+    def test_fingerprint_01(self) -> None:
+        """Each profile has its own fingerprint."""
+        self.assertNotEqual(
+            pipeline.fingerprint(pipeline.FULL), pipeline.fingerprint(pipeline.LEAN)
+        )
+
+    def test_load_01(self) -> None:
+        """A pipeline loaded from the cache finds the same traits as a built one."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_dir = Path(temp_dir)
+            pipeline.load(pipeline.LEAN, cache_dir=cache_dir)
+            self.assertEqual(
+                [p.name for p in cache_dir.iterdir()],
+                [pipeline.fingerprint(pipeline.LEAN)],
+            )
+            warm = pipeline.load(pipeline.LEAN, cache_dir=cache_dir)
+            for text in CORPUS:
+                with self.subTest(text=text):
+                    self.assertEqual(traits(warm, text), traits(LEAN, text))
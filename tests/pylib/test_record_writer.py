@@ -0,0 +1,84 @@
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Any
+
+import pyarrow.parquet as pq
+
+from ccf.pylib.record_writer import RecordWriter
+
+RECORDS = [
+    {"Scientific Name": "Aster novae", "Texas": "S3"},
+    {"Scientific Name": "Aster pilosus", "Quebec": "S2", "Ohio": None},
+    {},
+    {"Scientific Name": "Aster, laevis", "Alberta": "S5", "Texas": "S1"},
+]
+
+
+def write(temp_dir: Path, **kwargs: Any) -> tuple[list[str], Path, Path]:
+    parquet_path = temp_dir / "out.parquet"
+    csv_path = temp_dir / "out.csv"
+    with RecordWriter(temp_dir / "parts", batch_size=2) as writer:
+        for record in RECORDS:
+            writer.write(record)
+        columns = writer.finalize(
+            parquet_path=parquet_path, csv_path=csv_path, **kwargs
+        )
+    return columns, parquet_path, csv_path
+
+
+class TestRecordWriter(unittest.TestCase):
+    def test_finalize_01(self) -> None:
+        """It merges parts with different columns into one table."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            columns, parquet_path, _ = write(Path(temp_dir))
+            table = pq.read_table(parquet_path)
+            self.assertEqual(
+                columns, ["Scientific Name", "Texas", "Quebec", "Ohio", "Alberta"]
+            )
+            self.assertEqual(table.column_names, columns)
+            self.assertEqual(
+                table.to_pylist()[1],
+                {
+                    "Scientific Name": "Aster pilosus",
+                    "Texas": None,
+                    "Quebec": "S2",
+                    "Ohio": None,
+                    "Alberta": None,
+                },
+            )
+            self.assertEqual(table.num_rows, 4)
+
+    def test_finalize_02(self) -> None:
+        """It orders the columns when finalizing."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            columns, _, csv_path = write(Path(temp_dir), order=sorted)
+            self.assertEqual(
+                csv_path.read_text().splitlines(),
+                [
+                    "Alberta,Ohio,Quebec,Scientific Name,Texas",
+                    ",,,Aster novae,S3",
+                    ",,S2,Aster pilosus,",
+                    ",,,,",
+                    'S5,,,"Aster, laevis",S1',
+                ],
+            )
+            self.assertEqual(columns, sorted(columns))
+
+    def test_finalize_03(self) -> None:
+        """It deletes the part files."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            write(Path(temp_dir))
+            self.assertFalse((Path(temp_dir) / "parts").exists())
+
+    def test_finalize_04(self) -> None:
+        """It keeps the rows of a part whose records are all empty."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            parquet_path = Path(temp_dir) / "out.parquet"
+            with RecordWriter(Path(temp_dir) / "parts", batch_size=2) as writer:
+                for record in [{}, {}, {"a": "1"}]:
+                    writer.write(record)
+                columns = writer.finalize(parquet_path=parquet_path)
+            table = pq.read_table(parquet_path)
+            self.assertEqual(columns, ["a"])
+            self.assertEqual(table.to_pylist(), [{"a": None}, {"a": None}, {"a": "1"}])
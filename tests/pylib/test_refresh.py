@@ -0,0 +1,88 @@
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from ccf.pylib.fetcher import Job
+from ccf.pylib.manifest import Manifest, write_atomic
+from ccf.pylib.refresh import record_fingerprint, refresh
+
+HTML = '<div class="data-section">Aster</div>'
+
+
+class TestRefresh(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        root = Path(self.temp_dir.name)
+        self.old_dir = root / "pages_26q2"
+        self.new_dir = root / "pages_26q3"
+        self.old_dir.mkdir()
+        self.new_dir.mkdir()
+
+        self.record = {"scientificName": "Aster novae", "gRank": "G5"}
+        self.url = "https://explorer.natureserve.org/Aster"
+
+        old_path = self.old_dir / "Aster_novae_1.html"
+        write_atomic(old_path, HTML)
+        with Manifest(self.old_dir / "manifest.sqlite") as old:
+            old.record(
+                self.url, old_path, HTML, fingerprint=record_fingerprint(self.record)
+            )
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def job(self, record: dict) -> Job:
+        return Job(
+            url=self.url,
+            path=self.new_dir / "Aster_novae_1.html",
+            fingerprint=record_fingerprint(record),
+        )
+
+    def test_refresh_01(self) -> None:
+        """It carries unchanged pages forward."""
+        job = self.job(self.record)
+        with Manifest(self.new_dir / "manifest.sqlite") as manifest:
+            self.assertEqual(refresh([job], self.old_dir, manifest), [])
+            self.assertTrue(manifest.is_done(job.url, job.path))
+        self.assertEqual(job.path.read_text(), HTML)
+
+    def test_refresh_02(self) -> None:
+        """It fetches pages whose export record changed."""
+        job = self.job(self.record | {"gRank": "G3"})
+        with Manifest(self.new_dir / "manifest.sqlite") as manifest:
+            self.assertEqual(refresh([job], self.old_dir, manifest), [job])
+        self.assertFalse(job.path.exists())
+
+    def test_refresh_03(self) -> None:
+        """It fetches pages that are too old."""
+        job = self.job(self.record)
+        with Manifest(self.old_dir / "manifest.sqlite") as old:
+            row = old.get(self.url)
+            old.put(row | {"fetched": time.time() - 100 * 24 * 60 * 60})
+        with Manifest(self.new_dir / "manifest.sqlite") as manifest:
+            fetch = refresh([job], self.old_dir, manifest, max_age_days=90)
+        self.assertEqual(fetch, [job])
+
+    def test_refresh_04(self) -> None:
+        """It uses the previous export when the old manifest has no fingerprint."""
+        job = self.job(self.record)
+        (self.old_dir / "manifest.sqlite").unlink()
+        previous = {self.url: record_fingerprint(self.record)}
+        with Manifest(self.new_dir / "manifest.sqlite") as manifest:
+            fetch = refresh(
+                [job], self.old_dir, manifest, previous_fingerprints=previous
+            )
+        self.assertEqual(fetch, [])
+
+    def test_refresh_05(self) -> None:
+        """It does not change the previous snapshot's manifest."""
+        job = self.job(self.record)
+        old_db = self.old_dir / "manifest.sqlite"
+        os.utime(self.old_dir / "Aster_novae_1.html")  # Forces a digest check
+        before = old_db.read_bytes()
+        with Manifest(self.new_dir / "manifest.sqlite") as manifest:
+            self.assertEqual(refresh([job], self.old_dir, manifest), [])
+        self.assertEqual(old_db.read_bytes(), before)
+        self.assertFalse((self.old_dir / "manifest.sqlite-journal").exists())
@@ -0,0 +1,86 @@
+import json
+import unittest
+
+from ccf.pylib import request_packer as packer
+
+FIELDS = ["leaf_shape", "seed_length"]
+
+
+def describe(text: object) -> dict[str, str]:
+    return {"text": str(text)}
+
+
+class TestRequestPacker(unittest.TestCase):
+    def test_pack_01(self) -> None:
+        """It fills packs in order without going past the context window."""
+        texts = ["x" * 400] * 5  # 109 tokens each when rendered plus the answer
+        packs = packer.pack(
+            texts,
+            describe,
+            context_tokens=500,
+            overhead_tokens=100,
+            answer_tokens=91,
+        )
+        self.assertEqual([len(p) for p in packs], [2, 2, 1])
+
+    def test_pack_02(self) -> None:
+        """It puts a description that is too big on its own."""
+        texts = ["short", "x" * 4000, "short"]
+        packs = packer.pack(texts, describe, context_tokens=500)
+        self.assertEqual(packs, [["short"], ["x" * 4000], ["short"]])
+
+    def test_pack_03(self) -> None:
+        """It limits the number of descriptions in a pack."""
+        packs = packer.pack(range(5), describe, max_pack=2)
+        self.assertEqual(packs, [[0, 1], [2, 3], [4]])
+
+    def test_pack_04(self) -> None:
+        """It counts the family, taxon, and JSON around the text."""
+        item = {
+            "family": "Asteraceae",
+            "taxon": "Aster novae-angliae",
+            "text": "x" * 360,
+        }
+        packs = packer.pack(
+            [item] * 2,
+            lambda d: d,
+            context_tokens=300,
+            overhead_tokens=100,
+            answer_tokens=0,
+        )
+        self.assertEqual([len(p) for p in packs], [1, 1])
+
+    def test_render_01(self) -> None:
+        """It numbers the descriptions."""
+        rendered = json.loads(packer.render([{"taxon": "A"}, {"taxon": "B"}]))
+        self.assertEqual(rendered, [{"id": 1, "taxon": "A"}, {"id": 2, "taxon": "B"}])
+
+    def test_unpack_01(self) -> None:
+        """It puts each answer in its slot by id."""
+        answer = """```json
+            [{"id": 2, "leaf_shape": "ovate", "seed_length": null},
+             {"id": "1", "leaf_shape": "linear", "seed_length": "2 mm"}]
+        ```"""
+        self.assertEqual(
+            packer.unpack(answer, 2, FIELDS),
+            (
+                [
+                    {"leaf_shape": "linear", "seed_length": "2 mm"},
+                    {"leaf_shape": "ovate", "seed_length": ""},
+                ],
+                [],
+            ),
+        )
+
+    def test_unpack_02(self) -> None:
+        """It gives empty fields and the ids for skipped slots and bad answers."""
+        empty = dict.fromkeys(FIELDS, "")
+        answer = '{"traits": [{"id": 3, "leaf_shape": "ovate"}]}'
+        self.assertEqual(packer.unpack(answer, 2, FIELDS), ([empty, empty], [1, 2]))
+        self.assertEqual(packer.unpack("I cannot do that.", 1, FIELDS), ([empty], [1]))
+
+    def test_unpack_03(self) -> None:
+        """It reports the ids the model skipped."""
+        answer = '[{"id": 2, "leaf_shape": "ovate"}, {"id": 3, "leaf_shape": ""}]'
+        _, missing = packer.unpack(answer, 3, FIELDS)
+        self.assertEqual(missing, [1])
@@ -0,0 +1,39 @@
+import unittest
+
+from ccf.pylib.rule_traits import rule_traits
+from ccf.pylib.trait_fields import TRAIT_FIELDS
+
+SECTIONS = {
+    "Perennials": "40-120 cm; rhizomes woody.",
+    "Leaves": "deciduous; blades ovate to lanceolate, 2-10 x 0.5-2 cm.",
+    "Anthers": "yellow.",
+}
+INFO = {"Phenology": "Flowering Aug-Oct.", "Habitat": "Moist meadows"}
+
+
+class TestRuleTraits(unittest.TestCase):
+    def test_rule_traits_01(self) -> None:
+        """It fills every trait field from the sections and info."""
+        traits, _ = rule_traits(SECTIONS, INFO)
+        self.assertEqual(list(traits), TRAIT_FIELDS)
+        self.assertIn("ovate", traits["leaf_shape"])
+        self.assertEqual(traits["phenology"], "Flowering Aug-Oct")
+        self.assertEqual(traits["habitat"], "Moist meadows")
+
+    def test_rule_traits_02(self) -> None:
+        """It leaves fields empty for sections the treatment does not have."""
+        traits, unsure = rule_traits(SECTIONS, INFO)
+        for field in ("fruit_type", "fruit_length", "seed_length", "elevation"):
+            self.assertEqual(traits[field], "")
+            self.assertNotIn(field, unsure)
+
+    def test_rule_traits_03(self) -> None:
+        """It is only unsure of fields it filled."""
+        traits, unsure = rule_traits({"Seeds": "brown, 2-3 mm."}, {})
+        self.assertTrue(all(traits[f] for f in unsure))
+
+    def test_rule_traits_04(self) -> None:
+        """It gives empty fields when there is nothing to parse."""
+        traits, unsure = rule_traits({}, {})
+        self.assertEqual(traits, dict.fromkeys(TRAIT_FIELDS, ""))
+        self.assertEqual(unsure, set())
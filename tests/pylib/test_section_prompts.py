@@ -0,0 +1,40 @@
+import unittest
+
+from ccf.pylib.section_prompts import key_group, section_prompts
+
+SECTIONS = {
+    "Perennials": "40-120 cm; rhizomes woody.",
+    "Leaves": "blades ovate to lanceolate, 2-10 x 0.5-2 cm.",
+    "Anthers": "yellow.",
+    "Cypselae": "obovoid, 2-3 mm.",
+}
+INFO = {"Phenology": "Flowering Aug-Oct.", "Elevation": "0-300 m"}
+
+
+class TestSectionPrompts(unittest.TestCase):
+    def test_key_group_01(self) -> None:
+        """It groups treatment keys the way PARSE does."""
+        self.assertEqual(key_group("Leaves"), "leaf")
+        self.assertEqual(key_group("Cypselae"), "fruit")
+        self.assertIsNone(key_group("Anthers"))
+        self.assertIsNone(key_group("Not a key"))
+
+    def test_section_prompts_01(self) -> None:
+        """It only sends the sections for each group."""
+        prompts = {p.group: p for p in section_prompts(SECTIONS, INFO)}
+        self.assertEqual(list(prompts), ["plant", "leaf", "fruit", "info"])
+        self.assertEqual(
+            prompts["leaf"].text, "Leaves blades ovate to lanceolate, 2-10 x 0.5-2 cm."
+        )
+        self.assertEqual(
+            prompts["info"].text, "Phenology: Flowering Aug-Oct.\nElevation: 0-300 m"
+        )
+        self.assertNotIn("yellow", "".join(p.text for p in prompts.values()))
+
+    def test_section_prompts_02(self) -> None:
+        """It only asks for the fields it is given."""
+        prompts = section_prompts(SECTIONS, INFO, ["leaf_width", "elevation"])
+        self.assertEqual(
+            [(p.group, p.fields) for p in prompts],
+            [("leaf", ("leaf_width",)), ("info", ("elevation",))],
+        )
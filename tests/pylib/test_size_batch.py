@@ -0,0 +1,66 @@
+import math
+import unittest
+
+from ccf.pylib.dimension import Dimension
+from ccf.pylib.size_batch import SizeBatch, to_cm
+
+FACTORS = {"cm": 1.0, "mm": 0.1, "m": 100.0}
+
+
+class TestSizeBatch(unittest.TestCase):
+    def test_finish_01(self) -> None:
+        """It converts every dimension in the batch to centimeters."""
+        first, second = {"taxon": "a"}, {"taxon": "b"}
+        batch = SizeBatch()
+        batch.add(first, "leaf_length", Dimension(units="mm", low=2.0, high=10.0))
+        batch.add(first, "leaf_width", Dimension())
+        batch.add(second, "plant_height", Dimension(units="m", min=0.5, high=1.5))
+        batch.finish(FACTORS)
+
+        self.assertEqual(
+            first,
+            {
+                "taxon": "a",
+                "leaf_length_min_cm": None,
+                "leaf_length_low_cm": 0.2,
+                "leaf_length_high_cm": 1.0,
+                "leaf_length_max_cm": None,
+                "leaf_width_min_cm": None,
+                "leaf_width_low_cm": None,
+                "leaf_width_high_cm": None,
+                "leaf_width_max_cm": None,
+            },
+        )
+        self.assertEqual(second["plant_height_min_cm"], 50.0)
+        self.assertEqual(second["plant_height_high_cm"], 150.0)
+        self.assertEqual(len(batch), 0)
+
+    def test_finish_02(self) -> None:
+        """It flags ranges that are out of order."""
+        record = {}
+        batch = SizeBatch()
+        batch.add(record, "seed_length", Dimension(units="mm", low=3.0, high=2.0))
+        batch.add(record, "seed_width", Dimension(units="mm", min=2.0, low=1.0))
+        batch.add(record, "seed_diameter", Dimension(units="mm", low=1.0, max=2.0))
+        self.assertEqual(batch.finish(FACTORS), 2)
+        self.assertEqual(record["range_errors"], "seed_length, seed_width")
+
+    def test_finish_03(self) -> None:
+        """It flags values that are out of order when the value between is missing."""
+        record = {}
+        batch = SizeBatch()
+        batch.add(record, "leaf_length", Dimension(units="cm", min=3.0, high=2.0))
+        batch.add(record, "leaf_width", Dimension(units="cm", low=3.0, max=2.0))
+        self.assertEqual(batch.finish(FACTORS), 2)
+        self.assertEqual(record["range_errors"], "leaf_length, leaf_width")
+
+    def test_to_cm_01(self) -> None:
+        """It rounds like Python's round()."""
+        dims = [Dimension(units="cm", low=0.0025, high=0.0055, max=0.0095)]
+        expect = [
+            None if v is None else round(v * 1.0, 3)
+            for v in (dims[0].min, dims[0].low, dims[0].high, dims[0].max)
+        ]
+        row = [None if math.isnan(v) else v for v in to_cm(dims, FACTORS).tolist()[0]]
+        self.assertEqual(row, expect)
+        self.assertEqual(row, [None, 0.003, 0.005, 0.009])
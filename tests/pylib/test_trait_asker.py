@@ -0,0 +1,78 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import dspy
+from dspy.utils import DummyLM
+
+from ccf.pylib import lm_cache
+from ccf.pylib.trait_asker import PackError, TraitAsker
+from ccf.pylib.trait_fields import TRAIT_FIELDS
+
+MODEL = "ollama_chat/gemma3:27b"
+API_BASE = "http://localhost:11434"
+
+EXAMPLES = [
+    dspy.Example(family="Asteraceae", taxon="Aster novae", text="Leaves ovate"),
+    dspy.Example(family="Poaceae", taxon="Poa annua", text="Leaves linear"),
+]
+
+
+def traits(*ids: int) -> str:
+    return json.dumps([{"id": i, "leaf_shape": f"shape {i}"} for i in ids])
+
+
+class TestTraitAsker(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = lm_cache.LMCache(Path(self.temp_dir.name) / "lm_cache.sqlite")
+        self.asker = TraitAsker(model=MODEL, api_base=API_BASE, cache=self.cache)
+
+    def tearDown(self) -> None:
+        self.cache.close()
+        self.temp_dir.cleanup()
+
+    def ask_pack(self, *answers: dict[str, str]) -> list[dict[str, str]]:
+        with dspy.context(lm=DummyLM(list(answers))):
+            return self.asker.ask_pack(EXAMPLES)
+
+    def test_trait_asker_01(self) -> None:
+        """It raises on a packed answer that does not parse without caching it."""
+        error = ""
+        try:
+            self.ask_pack({"traits": "I cannot do that."})
+        except PackError as err:
+            error = str(err)
+        self.assertIn("nothing for any description", error)
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_trait_asker_02(self) -> None:
+        """It asks again when the cache holds a packed answer that does not parse."""
+        self.ask_pack({"traits": traits(1, 2)})
+        (answer,) = self.asker.answers
+        self.cache.warm([answer | {"traits": "[]"}], ["traits"])
+
+        unpacked = self.ask_pack({"traits": traits(1, 2)})
+        self.assertEqual([u["leaf_shape"] for u in unpacked], ["shape 1", "shape 2"])
+        self.assertEqual(self.asker.answers[-1]["traits"], traits(1, 2))
+
+    def test_trait_asker_03(self) -> None:
+        """It answers from the cache the second time it is asked."""
+        answer = dict.fromkeys(TRAIT_FIELDS, "ovate")
+        with dspy.context(lm=DummyLM([answer])):
+            first = self.asker.ask(EXAMPLES[0], tuple(TRAIT_FIELDS))
+            second = self.asker.ask(EXAMPLES[0], tuple(TRAIT_FIELDS))
+        self.assertEqual(first, second)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_trait_asker_04(self) -> None:
+        """It keeps the slots a packed answer has and asks about a skipped one alone."""
+        single = dict.fromkeys(TRAIT_FIELDS, "") | {"leaf_shape": "linear"}
+        for run in range(2):  # The second run is answered from the cache
+            with self.subTest(run=run):
+                unpacked = self.ask_pack({"traits": traits(1)}, single)
+                self.assertEqual(
+                    [u["leaf_shape"] for u in unpacked], ["shape 1", "linear"]
+                )
+        self.assertEqual(self.cache.stats()["entries"], 2)
@@ -0,0 +1,14 @@
+import unittest
+
+from ccf.pylib.trait_extractor import TraitExtractor
+from ccf.pylib.trait_fields import INPUT_FIELDS, TRAIT_FIELDS
+
+
+class TestTraitFields(unittest.TestCase):
+    def test_trait_fields_01(self) -> None:
+        """It has the same trait fields as the trait extractor's outputs."""
+        self.assertEqual(list(TraitExtractor.output_fields), TRAIT_FIELDS)
+
+    def test_trait_fields_02(self) -> None:
+        """It has the same input fields as the trait extractor."""
+        self.assertEqual(list(TraitExtractor.input_fields), INPUT_FIELDS)
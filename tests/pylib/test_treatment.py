@@ -0,0 +1,52 @@
+import unittest
+
+from ccf.pylib import treatment
+
+PAGE = """<html><body>
+<span class="statement">Perennials; 40-120 cm; rhizomes <i>woody</i>.
+<b>Leaves</b> blades ovate to lanceolate, 2-10 × 0.5-2 cm.
+<b>Cypselae</b> obovoid, 2–3 mm.</span>
+<div class="treatment-info"><p>Phenology: Flowering Aug-Oct.</p>
+<p>Elevation: 0-300 m</p><p>Ala., Ark.</p></div>
+</body></html>"""
+
+
+class TestTreatment(unittest.TestCase):
+    def test_extract_01(self) -> None:
+        """It pairs keys with their text."""
+        self.assertEqual(
+            treatment.extract(PAGE).as_dict(),
+            {
+                "Perennials": "40-120 cm; rhizomes woody.",
+                "Leaves": "blades ovate to lanceolate, 2-10 x 0.5-2 cm.",
+                "Cypselae": "obovoid, 2-3 mm.",
+            },
+        )
+
+    def test_extract_02(self) -> None:
+        """It records where each section's text is in the treatment text."""
+        treat = treatment.extract(PAGE)
+        for section in treat.sections:
+            self.assertEqual(treat.text[section.start : section.end], section.text)
+        self.assertTrue(treat.text.startswith("Perennials 40-120 cm;"))
+
+    def test_extract_03(self) -> None:
+        """It leaves habit words in the text when asked to."""
+        treat = treatment.extract(PAGE, clean=str.strip, split_habits=False)
+        self.assertEqual(treat.sections[0].key, "")
+        self.assertEqual(treat.sections[0].text[:11], "Perennials;")
+        self.assertEqual(
+            treat.as_dict()["Leaves"], "blades ovate to lanceolate, 2-10 × 0.5-2 cm."
+        )
+
+    def test_extract_04(self) -> None:
+        """It returns an empty treatment when the page has no statement."""
+        self.assertEqual(treatment.extract("<html><body></body></html>").as_dict(), {})
+
+    def test_extract_info_01(self) -> None:
+        """It gets the key and value lines from the treatment info."""
+        root = treatment.parse_html(PAGE)
+        self.assertEqual(
+            treatment.extract_info(root),
+            {"Phenology": "Flowering Aug-Oct.", "Elevation": "0-300 m"},
+        )
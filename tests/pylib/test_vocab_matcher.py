@@ -0,0 +1,61 @@
+import unittest
+
+from ccf.pylib.vocab_matcher import TERMS_DIR, Hit, VocabMatcher
+
+MATCHER = VocabMatcher(
+    {
+        "deciduous": "leaf_duration",
+        "semi-deciduous": "leaf_duration",
+        "ovate": "shape",
+        "broadly ovate": "shape",
+        "he": "other",
+        "she": "other",
+    }
+)
+
+
+class TestVocabMatcher(unittest.TestCase):
+    def test_match_01(self) -> None:
+        """It finds single and multi-word terms in order with their offsets."""
+        self.assertEqual(
+            MATCHER.match("Leaves Broadly ovate, deciduous."),
+            [
+                Hit("shape", "broadly ovate", 7, 20),
+                Hit("leaf_duration", "deciduous", 22, 31),
+            ],
+        )
+
+    def test_match_02(self) -> None:
+        """It prefers the longest term when terms overlap."""
+        self.assertEqual(
+            MATCHER.match("semi-deciduous"),
+            [Hit("leaf_duration", "semi-deciduous", 0, 14)],
+        )
+
+    def test_match_03(self) -> None:
+        """It only matches whole words."""
+        self.assertEqual(MATCHER.match("obovate the shed"), [])
+
+    def test_match_04(self) -> None:
+        """It finds terms that end inside other terms."""
+        self.assertEqual(
+            MATCHER.find_all("she he"),
+            [
+                Hit("other", "she", 0, 3),
+                Hit("other", "he", 4, 6),
+            ],
+        )
+
+    def test_is_term_01(self) -> None:
+        """It checks if a whole text is a term."""
+        self.assertTrue(MATCHER.is_term("Deciduous "))
+        self.assertFalse(MATCHER.is_term("deciduous leaves"))
+
+    def test_from_csvs_01(self) -> None:
+        """It builds a matcher from the term files."""
+        matcher = VocabMatcher.from_csvs(
+            [TERMS_DIR / "fruit_terms.csv"], labels=["fruit_type"], exclude=["fruit"]
+        )
+        self.assertEqual(
+            [h.label for h in matcher.match("fruit an achene")], ["fruit_type"]
+        )
@@ -0,0 +1,77 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from ccf.pylib.work_queue import DONE, FAILED, IN_FLIGHT, PENDING, WorkItem, WorkQueue
+
+
+class TestWorkQueue(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.temp_dir.name) / "queue.sqlite"
+        self.items = [
+            WorkItem(key=f"k{i}", url=f"https://example.org/{i}", path=Path(f"{i}"))
+            for i in range(3)
+        ]
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_work_queue_01(self) -> None:
+        """It does not queue an item twice."""
+        with WorkQueue(self.db_path) as queue:
+            self.assertEqual(queue.add(self.items), 3)
+            self.assertEqual(queue.add(self.items), 0)
+            self.assertEqual(queue.counts()[PENDING], 3)
+
+    def test_work_queue_02(self) -> None:
+        """It resumes items that were in flight when a run died."""
+        with WorkQueue(self.db_path) as queue:
+            queue.add(self.items)
+            claimed = queue.claim(2)
+            queue.done(claimed[0].key)
+            self.assertEqual(queue.counts()[IN_FLIGHT], 1)
+
+        with WorkQueue(self.db_path) as queue:
+            counts = queue.counts()
+            self.assertEqual(counts[IN_FLIGHT], 0)
+            self.assertEqual(counts[DONE], 1)
+            self.assertEqual([i.key for i in queue.claim(5)], ["k1", "k2"])
+
+    def test_work_queue_03(self) -> None:
+        """It retries failed items after a backoff."""
+        with WorkQueue(self.db_path, backoff=0.0) as queue:
+            queue.add(self.items[:1])
+            queue.failed(queue.claim(1)[0].key, "timeout")
+            self.assertEqual(queue.counts()[FAILED], 1)
+            retry = queue.claim(1)
+            self.assertEqual(retry[0].attempts, 1)
+
+    def test_work_queue_04(self) -> None:
+        """It gives up on items after too many failures."""
+        with WorkQueue(self.db_path, max_attempts=2, backoff=0.0) as queue:
+            queue.add(self.items[:1])
+            queue.failed(queue.claim(1)[0].key)
+            queue.failed(queue.claim(1)[0].key)
+            self.assertEqual(queue.claim(1), [])
+            self.assertIsNone(queue.next_retry())
+
+    def test_work_queue_05(self) -> None:
+        """It doubles the backoff after each failure."""
+        with WorkQueue(self.db_path, backoff=10.0, max_backoff=25.0) as queue:
+            self.assertEqual(
+                [queue.delay(a) for a in (1, 2, 3)],
+                [10.0, 20.0, 25.0],
+            )
+
+    def test_work_queue_06(self) -> None:
+        """It fails the items a batch left in flight."""
+        with WorkQueue(self.db_path, backoff=0.0) as queue:
+            queue.add(self.items)
+            batch = queue.claim(2)
+            queue.done(batch[0].key)
+            self.assertEqual(queue.release([i.key for i in batch], "crashed"), 1)
+            counts = queue.counts()
+            self.assertEqual(
+                (counts[IN_FLIGHT], counts[DONE], counts[FAILED]), (0, 1, 1)
+            )
@@ -1,7 +1,7 @@
 from ccf.pylib import pipeline
 from ccf.pylib.str_util import clean
 
-PIPELINE = pipeline.build()
+PIPELINE = pipeline.load(cache_dir=None)  # Tests never write to the user's cache
 
 
 def parse(text: str) -> list:
@@ -0,0 +1,79 @@
+import json
+import tempfile
+import unittest
+from argparse import Namespace
+from pathlib import Path
+
+import pyarrow.parquet as pq
+
+from ccf import fna_eval_lm
+from ccf.pylib.trait_fields import TRAIT_FIELDS
+from tests.pylib.ollama_stub import OllamaStub
+
+ANSWER = dict.fromkeys(TRAIT_FIELDS, "") | {
+    "leaf_shape": "ovate",
+    "seed_length": "2 mm",
+}
+
+
+def reply(_messages: list[dict]) -> str:
+    """Answer with every trait field in the DSPy chat format."""
+    fields = "\n\n".join(f"[[ ## {k} ## ]]\n{v}" for k, v in ANSWER.items())
+    return f"{fields}\n\n[[ ## completed ## ]]"
+
+
+def example(i: int) -> dict:
+    return {
+        "family": "Asteraceae",
+        "taxon": f"Aster species{i}",
+        "text": f"Leaves ovate. Seeds {i} mm.",
+        **dict.fromkeys(TRAIT_FIELDS, ""),
+        "leaf_shape": "ovate",
+        "seed_length": f"{i} mm",
+    }
+
+
+class TestFnaEvalLm(unittest.TestCase):
+    def test_eval_01(self) -> None:
+        """It scores a split, writes the results, and reuses cached answers."""
+        with tempfile.TemporaryDirectory() as temp_dir, OllamaStub(reply=reply) as stub:
+            temp_dir = Path(temp_dir)
+            examples_json = temp_dir / "examples.json"
+            examples_json.write_text(json.dumps([example(i) for i in range(6)]))
+
+            runs = []
+            for run in range(2):
+                out = temp_dir / f"run_{run}.parquet"
+                args = Namespace(
+                    examples_json=examples_json,
+                    out_parquet=out,
+                    out_csv=None,
+                    split="test",
+                    train_split=0.0,
+                    dev_split=0.0,
+                    seed=1,
+                    model="ollama_chat/gemma3:27b",
+                    api_base=stub.api_base,
+                    api_key=None,
+                    concurrency=3,
+                    timeout=10.0,
+                    retries=0,
+                    limit=0,
+                    no_cache=True,
+                    cache_db=temp_dir / "lm_cache.sqlite",
+                    cache_mb=1,
+                )
+                fna_eval_lm.main(args)
+                runs.append(pq.read_table(out).to_pylist())
+
+            self.assertEqual(len(stub.requests), 6)  # The second run was cached
+            first, second = runs
+            self.assertEqual(len(first), 6)
+            self.assertEqual({r["cached"] for r in first}, {False})
+            self.assertEqual({r["cached"] for r in second}, {True})
+            self.assertEqual({r["leaf_shape_score"] for r in first}, {1.0})
+            self.assertEqual({r["attempts"] for r in first}, {1})
+            # A cached answer reports what it cost the first time
+            self.assertEqual([r | {"cached": True} for r in first], second)
+            seed_two = next(r for r in first if r["taxon"] == "Aster species2")
+            self.assertEqual(seed_two["seed_length_score"], 1.0)
@@ -0,0 +1,61 @@
+import contextlib
+import io
+import tempfile
+import unittest
+from argparse import Namespace
+from pathlib import Path
+
+from ccf import fna_rule_parser
+
+LEAVES = [
+    "blades deltate to ovate, margins serrate, surfaces glabrous.",
+    "blades linear, margins entire.",
+    "",
+    "blades lanceolate to elliptic, surfaces pubescent.",
+    "blades ± rhombic, margins crenate.",
+]
+
+
+def page(leaves: str) -> str:
+    if not leaves:
+        return "<html><body><p>No treatment</p></body></html>"
+    return (
+        '<html><body><span class="statement">'
+        f"<b>Perennials;</b> 10-20 cm. <b>Leaves</b> {leaves}"
+        "</span></body></html>"
+    )
+
+
+class TestFnaRuleParser(unittest.TestCase):
+    def test_workers_01(self) -> None:
+        """It writes the same CSV with a process pool as it does serially."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_dir = Path(temp_dir)
+
+            html_dir = temp_dir / "html"
+            html_dir.mkdir()
+            names = []
+            for i, leaves in enumerate(LEAVES):
+                name = f"Aster species{i}"
+                names.append(name)
+                path = html_dir / f"{i}_{name.replace(' ', '_')}.html"
+                path.write_text(page(leaves))
+
+            target_csv = temp_dir / "targets.csv"
+            target_csv.write_text("\n".join(names) + "\n")
+
+            outputs = []
+            for workers in (1, 3):
+                out_csv = temp_dir / f"workers_{workers}.csv"
+                args = Namespace(
+                    html_dir=html_dir,
+                    target_csv=target_csv,
+                    out_csv=out_csv,
+                    profile="full",
+                    workers=workers,
+                )
+                with contextlib.redirect_stdout(io.StringIO()) as stdout:
+                    fna_rule_parser.main(args)
+                outputs.append((out_csv.read_bytes(), stdout.getvalue()))
+
+            self.assertEqual(outputs[0], outputs[1])
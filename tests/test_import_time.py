@@ -0,0 +1,59 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+HEAVY = ["spacy", "dspy", "pandas", "playwright"]
+
+# Seconds to import a script without running it. Raise these only on purpose.
+BUDGETS = {
+    "ccf/fna_downloader.py": 0.5,
+    "ccf/fna_get_keys.py": 1.0,
+    "ccf/fna_eval_lm.py": 1.0,
+    "ccf/fna_rule_parser.py": 1.0,
+    "ccf/fna_training_data.py": 1.0,
+    "ccf/fna_try_lm.py": 1.0,
+    "ccf/natureserve_downloader.py": 0.5,
+    "ccf/natureserve_parser.py": 1.0,
+    "ccf/pack_pages.py": 0.5,
+}
+
+PROBE = """
+import json, runpy, sys, time
+sys.path.insert(0, "ccf")
+began = time.perf_counter()
+runpy.run_path(sys.argv[1], run_name="import_time")
+elapsed = time.perf_counter() - began
+heavy = [m for m in sys.argv[2:] if m in sys.modules]
+print(json.dumps({"elapsed": elapsed, "heavy": heavy}))
+"""
+
+
+def import_script(script: str) -> dict:
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", PROBE, script, *HEAVY],
+        cwd=ROOT,
+        env=os.environ | {"PYTHONPATH": str(ROOT)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+class TestImportTime(unittest.TestCase):
+    def test_import_time_01(self) -> None:
+        """It does not import heavy packages until a script needs them."""
+        for script in BUDGETS:
+            with self.subTest(script=script):
+                self.assertEqual(import_script(script)["heavy"], [])
+
+    def test_import_time_02(self) -> None:
+        """It starts every script within its budget."""
+        for script, budget in BUDGETS.items():
+            with self.subTest(script=script):
+                self.assertLessEqual(import_script(script)["elapsed"], budget)
@@ -0,0 +1,75 @@
+import unittest
+
+from ccf import natureserve_parser
+
+
+def pair(label: str, value: str) -> str:
+    return (
+        '<div class="data-pair">'
+        f'<div class="label-div">{label}:</div>'
+        f'<div class="value-div">{value}</div>'
+        "</div>"
+    )
+
+
+def section(heading: str, value: str) -> str:
+    return (
+        '<div class="data-section">'
+        f'<h2 class="label-div">{heading}</h2>'
+        f'<div class="value-div">{value}</div>'
+        "</div>"
+    )
+
+
+PAGE = (
+    "<html><head><script>var state = {};</script></head><body>"
+    '<nav><div class="data-pair"><div class="label-div">Menu:</div>'
+    '<div class="value-div">Explorer</div></div></nav>'
+    + section(
+        "Classification",
+        pair("Scientific Name", "Aster novae-angliae")
+        + pair("Order", "Asterales")
+        + pair("Family", "Asteraceae")
+        + pair("Genus", "Symphyotrichum")
+        + pair("NatureServe Unique Identifier", "ELEMENT_GLOBAL.2.1"),
+    )
+    + section(
+        "Conservation Status",
+        '<div class="sub-section-1"><h3 class="label-div">NatureServe Status</h3>'
+        + pair("Global Status", "G5")
+        + pair("Rank Method Used", "None")
+        + "</div>"
+        + '<div class="nation-data">'
+        + pair("Canada", "N5")
+        + pair("United States", "N5")
+        + "</div>",
+    )
+    + section(
+        "Distribution",
+        pair("Endemism", "occurs (regularly, as a native taxon) in multiple nations")
+        + '<div class="nation-list">United States: MA, NY, VT</div>',
+    )
+    + section("Ecology and Life History", pair("Habitat Type", "Terrestrial"))
+    + section("Other", pair("Ignored", "yes"))
+    + '<div class="map"><script>drawMap();</script></div>'
+    + "</body></html>"
+)
+
+
+class TestNatureServeParser(unittest.TestCase):
+    def test_parse_page_01(self) -> None:
+        """It parses the data sections the same with and without straining."""
+        strained = natureserve_parser.parse_page(PAGE)
+        self.assertEqual(strained, natureserve_parser.parse_page(PAGE, strained=False))
+
+    def test_parse_page_02(self) -> None:
+        """It parses every data section."""
+        rec = natureserve_parser.parse_page(PAGE)
+        self.assertEqual(rec["Scientific Name"], "Aster novae-angliae")
+        self.assertEqual(rec["Global Status"], "G5")
+        self.assertEqual(rec["Rank Method Used"], "")
+        self.assertEqual(rec["Canada"], "N5")
+        self.assertEqual(rec["Distribution United States"], "MA, NY, VT")
+        self.assertEqual(rec["Habitat Type"], "Terrestrial")
+        self.assertNotIn("Menu", rec)
+        self.assertNotIn("Ignored", rec)